@@ -0,0 +1,773 @@
+"""Incrementally maintained SLA aggregates and time-bucket rollups."""
+import heapq
+import math
+import threading
+from collections import Counter, defaultdict
+
+import numpy as np
+import pandas as pd
+
+from reports import SUMMARY_COLUMNS
+from storage import DATETIME_FORMAT, dataset_version, fetch_incident_changes, fetch_validation_changes, get_meta
+
+TREND_MAX_POINTS = 500
+TREND_HOURLY_MAX_DAYS = 14  # Longer ranges are plotted per day...
+TREND_DAILY_MAX_DAYS = 366  # ...and longer still per week
+SKETCH_RELATIVE_ACCURACY = 0.01  # Percentiles are within 1% of a true duration
+SLA_QUANTILES = (50, 95, 99)
+WORK_QUEUE_SORTS = {  # label -> (column, descending)
+    'Oldest first': ('datetime', False),
+    'Newest first': ('datetime', True),
+    'Longest first': ('duration', True),
+    'Shortest first': ('duration', False),
+}
+WORK_QUEUE_SCAN_CHUNK = 256  # Pending flags checked at a time when stepping past validated items
+WORK_QUEUE_SELECTIONS = 16  # Filtered orderings kept per queue
+
+
+class DurationSketch:
+    """
+    Mergeable quantile sketch of durations, in the style of DDSketch.
+
+    Durations are counted in logarithmic bins ``SKETCH_RELATIVE_ACCURACY`` wide, so any
+    quantile is estimated within that relative error, whatever the number of values. A
+    sketch supports removals (a TP flipped to FP), and merging two sketches just adds their
+    bin counts, so a range query combines the sketches of the buckets it covers instead of
+    sorting raw durations.
+    """
+
+    __slots__ = ('bins',)
+
+    _gamma = (1 + SKETCH_RELATIVE_ACCURACY) / (1 - SKETCH_RELATIVE_ACCURACY)
+    _log_gamma = math.log(_gamma)
+    _ZERO = -(1 << 30)  # Bin of zero-length durations
+
+    def __init__(self):
+        self.bins = {}  # bin index -> count
+
+    def _index(self, duration):
+        return math.ceil(math.log(duration) / self._log_gamma) if duration > 0 else self._ZERO
+
+    def add(self, duration):
+        index = self._index(duration)
+        self.bins[index] = self.bins.get(index, 0) + 1
+
+    def remove(self, duration):
+        index = self._index(duration)
+        if self.bins[index] == 1:
+            del self.bins[index]
+        else:
+            self.bins[index] -= 1
+
+    def merge(self, other):
+        for index, count in other.bins.items():
+            self.bins[index] = self.bins.get(index, 0) + count
+
+    def quantiles(self, qs=SLA_QUANTILES):
+        """Returns the estimated ``qs`` percentiles (0-100), or NaNs when the sketch is empty."""
+        total = sum(self.bins.values())
+        if not total:
+            return [math.nan] * len(qs)
+        indexes = sorted(self.bins)
+        cumulative = np.cumsum([self.bins[index] for index in indexes])
+        results = []
+        for q in qs:
+            position = int(np.searchsorted(cumulative, q / 100 * (total - 1), side='right'))
+            index = indexes[min(position, len(indexes) - 1)]
+            results.append(0.0 if index == self._ZERO else 2 * self._gamma ** index / (self._gamma + 1))
+        return results
+
+
+class _RunningAggregate:
+    """Running count/sum/min/max of TP downtime, supporting removals, optionally with a ``DurationSketch``."""
+
+    __slots__ = ('incidents', 'count', 'total', 'sketch', '_min_heap', '_max_heap', '_removed_min', '_removed_max')
+
+    def __init__(self, sketched=False):
+        self.incidents = 0  # TP incidents, including any without a duration
+        self.count = 0  # TP incidents with a duration
+        self.total = 0
+        self.sketch = DurationSketch() if sketched else None
+        self._min_heap = []
+        self._max_heap = []
+        # Durations removed but still sitting in each heap; created on the first removal
+        self._removed_min = None
+        self._removed_max = None
+
+    def add(self, duration):
+        self.incidents += 1
+        if duration is None:
+            return
+        self.count += 1
+        self.total += duration
+        heapq.heappush(self._min_heap, duration)
+        heapq.heappush(self._max_heap, -duration)
+        if self.sketch is not None:
+            self.sketch.add(duration)
+
+    def remove(self, duration):
+        self.incidents -= 1
+        if duration is None:
+            return
+        self.count -= 1
+        self.total -= duration
+        if self.sketch is not None:
+            self.sketch.remove(duration)
+        if self.count == 0:
+            self.total = 0
+            self._min_heap, self._max_heap = [], []
+            self._removed_min = self._removed_max = None
+        else:
+            if self._removed_min is None:
+                self._removed_min, self._removed_max = Counter(), Counter()
+            self._removed_min[duration] += 1
+            self._removed_max[duration] += 1
+
+    @property
+    def minimum(self):
+        # Lazily drop removed values from the top of the heap; each value is popped at most once.
+        while self._removed_min and self._min_heap and self._removed_min[self._min_heap[0]]:
+            self._removed_min[heapq.heappop(self._min_heap)] -= 1
+        return self._min_heap[0] if self._min_heap else None
+
+    @property
+    def maximum(self):
+        while self._removed_max and self._max_heap and self._removed_max[-self._max_heap[0]]:
+            self._removed_max[-heapq.heappop(self._max_heap)] -= 1
+        return -self._max_heap[0] if self._max_heap else None
+
+
+def _summary_frame(aggregates):
+    """Builds the summary table from ``{customer: (count, total, minimum, maximum)}``."""
+    rows = []
+    for name in sorted(aggregates):
+        count, total, minimum, maximum = aggregates[name]
+        mean = round(total / count, 2) if count else math.nan
+        rows.append((name, total, mean, minimum, maximum))
+    return pd.DataFrame(rows, columns=SUMMARY_COLUMNS)
+
+
+class _ValidationFollower:
+    """
+    Base for in-memory views over one dataset's incidents that follow validation changes.
+
+    Subclasses implement ``_load`` for the incident rows, ``_add``/``_remove`` for one TP
+    incident, ``_reset`` to drop every TP incident and ``_clear`` to drop every incident.
+    The base tracks which incidents are TP and catches up with new validations through the
+    same change-sequence delta query as ``ValidationCache``; a new validations epoch (all
+    validations deleted) resets the view. Incidents inserted or changed by a watched-folder
+    ingest are replayed the same way from the incidents version, while a new dataset
+    epoch (the dataset was replaced, so rows may be gone) rebuilds the view from scratch.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._incidents = {}  # monitor_id -> subclass-specific incident details
+        self._tp_ids = set()
+        self.dataset = None
+        self.epoch = None
+        self.high_water = 0
+        self.incidents_epoch = None
+        self.incidents_version = 0
+
+    @classmethod
+    def from_db(cls, conn, dataset):
+        """Builds the view from the incidents of ``dataset`` and the current validations."""
+        view = cls()
+        view.dataset = dataset
+        view._load_all(conn)
+        return view
+
+    def _load_all(self, conn):
+        # Read the high-water marks first: anything written meanwhile is replayed by refresh().
+        self.epoch = get_meta(conn, 'validations_epoch', '0')
+        self.high_water = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM validations").fetchone()[0]
+        self.incidents_version, self.incidents_epoch = dataset_version(conn, self.dataset) or (0, None)
+        rows = [tuple(row) for row in conn.execute("""
+            SELECT i.monitor_id, i.name, i.duration, i.datetime_ist, i.owner, v.decision
+            FROM incidents i
+            LEFT JOIN validations v ON v.monitor_id = i.monitor_id
+            WHERE i.dataset = ? AND i.name IS NOT NULL
+        """, (self.dataset,))]
+        self._load_incidents(rows)
+
+    def _load_incidents(self, rows):
+        """Loads (monitor_id, name, duration, datetime_ist, owner, decision) rows, replacing known incidents."""
+        for row in rows:
+            if row[0] in self._tp_ids:
+                self._tp_ids.discard(row[0])
+                self._remove(row[0])
+            self._incidents.pop(row[0], None)
+        rows = [row for row in rows if row[1] is not None]
+        self._load(rows)
+        for row in rows:
+            if row[5] == 'TP':
+                self._apply(row[0], 'TP')
+
+    def _load(self, rows):
+        raise NotImplementedError
+
+    def _add(self, monitor_id):
+        raise NotImplementedError
+
+    def _remove(self, monitor_id):
+        raise NotImplementedError
+
+    def _reset(self):
+        raise NotImplementedError
+
+    def _clear(self):
+        raise NotImplementedError
+
+    def _apply(self, monitor_id, decision):
+        if monitor_id not in self._incidents:
+            return
+        was_tp = monitor_id in self._tp_ids
+        is_tp = decision == 'TP'
+        if was_tp == is_tp:
+            return
+        if is_tp:
+            self._tp_ids.add(monitor_id)
+            self._add(monitor_id)
+        else:
+            self._tp_ids.discard(monitor_id)
+            self._remove(monitor_id)
+
+    def refresh(self, conn):
+        """
+        Applies incident and validation changes since the last refresh.
+
+        A new validations epoch resets the view, and a new dataset epoch rebuilds it.
+        """
+        with self._lock:
+            if (dataset_version(conn, self.dataset) or (0, None))[1] != self.incidents_epoch:
+                self._incidents.clear()
+                self._tp_ids.clear()
+                self._clear()
+                self._load_all(conn)
+                return
+            epoch = get_meta(conn, 'validations_epoch', '0')
+            if epoch != self.epoch:
+                self._tp_ids.clear()
+                self._reset()
+                self.epoch, self.high_water = epoch, 0
+            incident_changes = fetch_incident_changes(conn, self.dataset, self.incidents_version)
+            if incident_changes:
+                self._load_incidents([tuple(row)[:6] for row in incident_changes])
+                self.incidents_version = max(row[6] for row in incident_changes)
+            changes = fetch_validation_changes(conn, self.high_water)
+            for monitor_id, decision, _, seq in changes:
+                self._apply(str(monitor_id).strip(), decision)
+            if changes:
+                self.high_water = changes[-1][3]
+
+
+class SlaAggregateStore(_ValidationFollower):
+    """
+    Per-customer downtime aggregates kept up to date as validations are submitted.
+
+    Each upsert adjusts the affected customer's count and sum in O(1), and min/max through
+    heaps with lazy deletion, so a TP->FP flip or a deleted validation never triggers a
+    full recompute. The summary table is only rebuilt when something actually changed.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._customers = set()
+        self._aggregates = {}
+        self._summary = None
+
+    def _load(self, rows):
+        for monitor_id, name, duration, _, _, _ in rows:
+            self._incidents[monitor_id] = (name, duration)
+            self._customers.add(name)
+        self._summary = None
+
+    def _add(self, monitor_id):
+        name, duration = self._incidents[monitor_id]
+        self._aggregates.setdefault(name, _RunningAggregate()).add(duration)
+        self._summary = None
+
+    def _remove(self, monitor_id):
+        name, duration = self._incidents[monitor_id]
+        aggregate = self._aggregates[name]
+        aggregate.remove(duration)
+        if aggregate.incidents == 0:
+            del self._aggregates[name]
+        self._summary = None
+
+    def _reset(self):
+        self._aggregates.clear()
+        self._summary = None
+
+    def _clear(self):
+        self._customers.clear()
+        self._reset()
+
+    def summary(self):
+        """Returns the same (summary_df, no_downtime_customers) pair as ``compute_sla_metrics``."""
+        with self._lock:
+            if self._summary is None:
+                summary = _summary_frame({
+                    name: (aggregate.count, aggregate.total, aggregate.minimum, aggregate.maximum)
+                    for name, aggregate in self._aggregates.items()
+                })
+                self._summary = (summary, self._customers - set(self._aggregates))
+            summary, no_downtime_customers = self._summary
+            return summary.copy(), set(no_downtime_customers)
+
+
+def hour_number(timestamps):
+    """Converts naive IST timestamps (scalar or array-like) to whole hours since 1970-01-01 00:00 IST."""
+    return np.asarray(pd.to_datetime(timestamps), dtype='datetime64[h]').astype('int64')
+
+
+def hour_timestamp(hour):
+    """Inverse of ``hour_number`` for a single hour."""
+    return pd.Timestamp(np.datetime64(int(hour), 'h'))
+
+
+def trend_resolution(start, end):
+    """Picks 'hour', 'day' or 'week' so a trend over [start, end) has a readable number of periods."""
+    days = (pd.Timestamp(end) - pd.Timestamp(start)) / pd.Timedelta(days=1)
+    if days <= TREND_HOURLY_MAX_DAYS:
+        return 'hour'
+    if days <= TREND_DAILY_MAX_DAYS:
+        return 'day'
+    return 'week'
+
+
+def lttb(x, y, threshold):
+    """
+    Largest-Triangle-Three-Buckets downsampling; returns the indices of the points to keep.
+
+    The first and last points are always kept. The points in between are split into
+    ``threshold - 2`` equal buckets and from each the point forming the largest triangle
+    with the previous pick and the next bucket's average is kept, which preserves peaks
+    and dips that plain striding would skip.
+    """
+    x = np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+    length = len(x)
+    if threshold >= length or threshold < 3:
+        return np.arange(length)
+
+    edges = np.linspace(1, length - 1, threshold - 1).astype('int64')
+    picked = np.empty(threshold, dtype='int64')
+    picked[0], picked[-1] = 0, length - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        lo, hi = edges[bucket], edges[bucket + 1]
+        next_hi = edges[bucket + 2] if bucket + 2 < len(edges) else length
+        next_x = x[hi:next_hi].mean() if next_hi > hi else x[-1]
+        next_y = y[hi:next_hi].mean() if next_hi > hi else y[-1]
+        areas = np.abs((x[previous] - next_x) * (y[lo:hi] - y[previous])
+                       - (x[previous] - x[lo:hi]) * (next_y - y[previous]))
+        previous = lo + int(areas.argmax())
+        picked[bucket + 1] = previous
+    return picked
+
+
+class RollupStore(_ValidationFollower):
+    """
+    Hourly and daily (customer, owner) buckets of TP downtime: count, sum, min and max.
+
+    Built once per loaded dataset and kept current as validations change. A date-range
+    query merges whole-day buckets for the days fully inside the range and hourly buckets
+    only at its ragged ends, so its cost depends on the number of buckets in range, not on
+    the number of incidents. Buckets are wall-clock IST hours and days, exactly as recorded
+    in 'Datetime IST'; range bounds are naive IST timestamps.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._customers = set()
+        self._owners = set()
+        self._hourly = defaultdict(dict)  # hour number -> {(customer, owner): _RunningAggregate}
+        self._daily = defaultdict(dict)  # day number -> {(customer, owner): _RunningAggregate}
+        self._first_hour = self._last_hour = None  # Of any dated incident, TP or not
+
+    def _load(self, rows):
+        if not rows:
+            return
+        monitor_ids, names, durations, datetimes, owners, _ = zip(*rows)
+        hours = hour_number(pd.Series(datetimes, dtype=object).fillna(pd.NaT))
+        for monitor_id, name, duration, stamp, hour, owner in zip(monitor_ids, names, durations, datetimes,
+                                                                 hours.tolist(), owners):
+            self._customers.add(name)
+            if stamp is None:
+                continue  # Undated incidents can't fall in any date range
+            self._incidents[monitor_id] = (name, owner, hour, duration)
+            self._owners.add(owner)
+            self._first_hour = hour if self._first_hour is None else min(self._first_hour, hour)
+            self._last_hour = hour if self._last_hour is None else max(self._last_hour, hour)
+
+    def _buckets(self, monitor_id):
+        name, owner, hour, duration = self._incidents[monitor_id]
+        return (name, owner), duration, (self._hourly[hour], self._daily[hour // 24])
+
+    def _add(self, monitor_id):
+        key, duration, bucket_sets = self._buckets(monitor_id)
+        for buckets in bucket_sets:
+            aggregate = buckets.get(key)
+            if aggregate is None:
+                aggregate = buckets[key] = _RunningAggregate(sketched=True)
+            aggregate.add(duration)
+
+    def _remove(self, monitor_id):
+        key, duration, bucket_sets = self._buckets(monitor_id)
+        for buckets in bucket_sets:
+            buckets[key].remove(duration)
+            if buckets[key].incidents == 0:
+                del buckets[key]
+
+    def _reset(self):
+        self._hourly.clear()
+        self._daily.clear()
+
+    def _clear(self):
+        self._customers.clear()
+        self._owners.clear()
+        self._first_hour = self._last_hour = None
+        self._reset()
+
+    @property
+    def customers(self):
+        return set(self._customers)
+
+    @property
+    def owners(self):
+        return set(self._owners)
+
+    def bounds(self):
+        """Returns the first and last IST hour with TP downtime as naive Timestamps, or (None, None)."""
+        with self._lock:
+            hours = [hour for hour, buckets in self._hourly.items() if buckets]
+        if not hours:
+            return None, None
+        return hour_timestamp(min(hours)), hour_timestamp(max(hours))
+
+    def _keys(self, start, end):
+        """Yields (bucket index, key) pairs that exactly cover the whole hours in [start, end)."""
+        if start is None:
+            start_hour = min(self._hourly, default=0)
+        else:
+            start_hour = int(hour_number(start))
+            if pd.Timestamp(start) > hour_timestamp(start_hour):
+                start_hour += 1  # Buckets are whole hours; a partial first hour is left out
+        end_hour = int(hour_number(end)) if end is not None else max(self._hourly, default=-1) + 1
+
+        first_day = -(-start_hour // 24)  # First day starting at or after start_hour
+        end_day = end_hour // 24  # Days before this one end at or before end_hour
+        if first_day >= end_day:
+            for hour in range(start_hour, end_hour):
+                yield self._hourly, hour
+            return
+        for hour in range(start_hour, first_day * 24):
+            yield self._hourly, hour
+        for day in range(first_day, end_day):
+            yield self._daily, day
+        for hour in range(end_day * 24, end_hour):
+            yield self._hourly, hour
+
+    def query(self, start=None, end=None, owners=None, by='customer', sketches=False):
+        """
+        Merges the buckets in [start, end) into ``{group: [incidents, count, total, min, max]}``.
+
+        Groups are customers, or owners with ``by='owner'``. ``owners`` optionally restricts
+        the merge to incidents of those owners. With ``sketches`` each group also gets the
+        merged ``DurationSketch`` of its durations as a sixth value.
+        """
+        position = 0 if by == 'customer' else 1
+        merged = {}
+        with self._lock:
+            for index, key in self._keys(start, end):
+                buckets = index.get(key)
+                if not buckets:
+                    continue
+                for dimensions, aggregate in buckets.items():
+                    if owners is not None and dimensions[1] not in owners:
+                        continue
+                    minimum, maximum = aggregate.minimum, aggregate.maximum
+                    current = merged.get(dimensions[position])
+                    if current is None:
+                        current = merged[dimensions[position]] = [aggregate.incidents, aggregate.count,
+                                                                  aggregate.total, minimum, maximum]
+                        if sketches:
+                            current.append(DurationSketch())
+                            current[5].merge(aggregate.sketch)
+                        continue
+                    current[0] += aggregate.incidents
+                    current[1] += aggregate.count
+                    current[2] += aggregate.total
+                    if minimum is not None:
+                        current[3] = minimum if current[3] is None else min(current[3], minimum)
+                        current[4] = maximum if current[4] is None else max(current[4], maximum)
+                    if sketches:
+                        current[5].merge(aggregate.sketch)
+        return merged
+
+    def period_seconds(self, start=None, end=None):
+        """Length of [start, end) in seconds; open ends default to the first and last hour with any incident."""
+        if start is None and self._first_hour is None:
+            return 0.0
+        start = pd.Timestamp(start) if start is not None else hour_timestamp(self._first_hour)
+        if end is None:
+            last = self._last_hour if self._last_hour is not None else hour_number(start)
+            end = hour_timestamp(last) + pd.Timedelta(hours=1)
+        return max((pd.Timestamp(end) - start).total_seconds(), 0.0)
+
+    @staticmethod
+    def _percentile_columns(merged, qs=SLA_QUANTILES):
+        """Sketch percentiles per group, clamped to the group's exact min and max."""
+        rows = {}
+        for group, (_, count, _, minimum, maximum, sketch) in merged.items():
+            if not count:
+                rows[group] = [math.nan] * len(qs)
+                continue
+            rows[group] = [round(min(max(value, minimum), maximum), 1) for value in sketch.quantiles(qs)]
+        return pd.DataFrame.from_dict(rows, orient='index', columns=[f"P{q} Downtime (sec)" for q in qs])
+
+    def summary(self, start=None, end=None, owners=None, percentiles=False):
+        """
+        Returns (summary_df, no_downtime_customers, tp_incidents) for TP incidents in [start, end).
+
+        ``summary_df`` has the same columns as ``compute_sla_metrics``. As there, customers
+        count as having no downtime when they appear in the report but have no TP downtime
+        in the range. With ``percentiles`` it also has p50/p95/p99 downtime columns, merged
+        from the buckets' sketches, and 'Availability (%)': the share of the period (see
+        ``period_seconds``) without TP downtime.
+        """
+        merged = self.query(start, end, owners, sketches=percentiles)
+        summary = _summary_frame({name: values[1:5] for name, values in merged.items()})
+        if percentiles:
+            summary = summary.join(self._percentile_columns(merged), on='Customer')
+            period = self.period_seconds(start, end) or math.nan
+            downtime = summary['Total Downtime (sec)'].astype('float64')
+            summary['Availability (%)'] = (100 * (1 - downtime / period)).clip(0, 100).round(3)
+        incidents = sum(values[0] for values in merged.values())
+        return summary, self._customers - set(merged), incidents
+
+    def owner_summary(self, start=None, end=None, owners=None):
+        """Returns TP incidents, total downtime and p50/p95/p99 downtime per owner over [start, end)."""
+        merged = self.query(start, end, owners, by='owner', sketches=True)
+        summary = pd.DataFrame(
+            [(owner, values[0], values[2]) for owner, values in sorted(merged.items(), key=lambda item: str(item[0]))],
+            columns=['Owner', 'Incidents', 'Total Downtime (sec)'])
+        return summary.join(self._percentile_columns(merged), on='Owner')
+
+    def trend(self, start=None, end=None, owners=None, resolution=None, max_points=TREND_MAX_POINTS):
+        """
+        Returns (trend_df, resolution): TP downtime per period over [start, end).
+
+        ``trend_df`` has 'Period', 'Downtime (sec)' and 'Incidents' columns, with empty periods
+        filled with zeros. ``resolution`` ('hour', 'day' or 'week') is picked from the range
+        length unless given; day and week periods come straight from the daily buckets. Series
+        longer than ``max_points`` are reduced with ``lttb`` so the browser only gets a few
+        hundred points whatever the range.
+        """
+        first, last = self.bounds()
+        if first is None:
+            return pd.DataFrame(columns=['Period', 'Downtime (sec)', 'Incidents']), resolution or 'hour'
+        start = pd.Timestamp(start) if start is not None else first
+        end = pd.Timestamp(end) if end is not None else last + pd.Timedelta(hours=1)
+        resolution = resolution or trend_resolution(start, end)
+
+        # Periods touched by the range are shown whole
+        start_hour = int(hour_number(start))
+        end_hour = int(hour_number(end))
+        if end > hour_timestamp(end_hour):
+            end_hour += 1
+        if resolution == 'hour':
+            index, lo, hi = self._hourly, start_hour, end_hour
+        else:
+            index, lo, hi = self._daily, start_hour // 24, -(-end_hour // 24)
+        periods = max(hi - lo, 0)
+        downtime = np.zeros(periods, dtype='int64')
+        incidents = np.zeros(periods, dtype='int64')
+        with self._lock:
+            for key, buckets in index.items():
+                if not lo <= key < hi or not buckets:
+                    continue
+                for (_, owner), aggregate in buckets.items():
+                    if owners is None or owner in owners:
+                        downtime[key - lo] += aggregate.total
+                        incidents[key - lo] += aggregate.incidents
+
+        unit = 'h' if resolution == 'hour' else 'D'
+        stamps = np.arange(lo, hi).astype(f'datetime64[{unit}]').astype('datetime64[s]')
+        trend_df = pd.DataFrame({'Period': stamps, 'Downtime (sec)': downtime, 'Incidents': incidents})
+        if resolution == 'week':
+            # Weeks start on Monday, like pandas' 'W-SUN' periods
+            trend_df = (trend_df.groupby(trend_df['Period'].dt.to_period('W-SUN').dt.start_time)
+                        [['Downtime (sec)', 'Incidents']].sum().rename_axis('Period').reset_index())
+
+        if len(trend_df) > max_points:
+            keep = lttb(trend_df['Period'].to_numpy(dtype='datetime64[s]').astype('int64'),
+                        trend_df['Downtime (sec)'].to_numpy(), max_points)
+            trend_df = trend_df.iloc[keep].reset_index(drop=True)
+        return trend_df, resolution
+
+
+class WorkQueue(_ValidationFollower):
+    """
+    Index of the incidents with no validation yet, behind the validator's work-queue mode.
+
+    The incidents are held as columns (Monitor ID, customer, owner, time, duration) next to
+    a pending flag per incident, which a validation change flips in O(1), so the pending
+    count never needs a rescan. ``select`` turns owner/customer/date filters and a sort
+    order into an array of positions, kept until the incidents change or the validations
+    are reset; stepping to the next pending item then only skips entries that were
+    validated since, usually none.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._pending = set()
+        self._columns = None  # Rebuilt from _incidents on first use after a load
+        self._mask = None  # Pending flag per column position
+        self._selections = {}
+        self.generation = 0  # Bumped whenever earlier selections stop being valid
+
+    def _load_incidents(self, rows):
+        self._pending.difference_update(row[0] for row in rows)
+        super()._load_incidents(rows)
+
+    def _load(self, rows):
+        for monitor_id, name, duration, stamp, owner, decision in rows:
+            self._incidents[monitor_id] = (name, owner, stamp, duration)
+            if decision is None:
+                self._pending.add(monitor_id)
+        self._invalidate()
+
+    def _apply(self, monitor_id, decision):
+        super()._apply(monitor_id, decision)
+        if monitor_id not in self._incidents:
+            return
+        if decision is None:
+            self._pending.add(monitor_id)
+        else:
+            self._pending.discard(monitor_id)
+        if self._mask is not None:
+            self._mask[self._positions[monitor_id]] = decision is None
+
+    def _add(self, monitor_id):
+        pass  # Any decision counts as validated; handled in _apply
+
+    def _remove(self, monitor_id):
+        pass
+
+    def _reset(self):
+        self._pending = set(self._incidents)
+        self._invalidate()
+
+    def _clear(self):
+        self._pending.clear()
+        self._invalidate()
+
+    def _invalidate(self):
+        self._columns = self._mask = None
+        self._selections.clear()
+        self.generation += 1
+
+    def _ensure_columns(self):
+        if self._columns is not None:
+            return self._columns
+        ids = list(self._incidents)
+        names, owners, stamps, durations = zip(*self._incidents.values()) if ids else ((), (), (), ())
+        self._columns = {
+            'ids': np.array(ids, dtype=object),
+            'customer': np.array(names, dtype=object),
+            'owner': np.array(owners, dtype=object),
+            'datetime': pd.to_datetime(pd.Series(stamps, dtype=object), format=DATETIME_FORMAT).to_numpy(),
+            'duration': pd.to_numeric(pd.Series(durations, dtype=object)).to_numpy(dtype='float64'),
+        }
+        self._positions = {monitor_id: position for position, monitor_id in enumerate(ids)}
+        self._mask = np.fromiter((monitor_id in self._pending for monitor_id in ids), dtype=bool, count=len(ids))
+        return self._columns
+
+    @property
+    def pending_count(self):
+        return len(self._pending)
+
+    def values(self, column):
+        """Returns the sorted distinct customers (``'customer'``) or owners (``'owner'``) with pending incidents."""
+        with self._lock:
+            columns = self._ensure_columns()
+            return sorted({value for value in columns[column][self._mask] if value is not None}, key=str)
+
+    def select(self, owners=None, customers=None, start=None, end=None, sort='Oldest first'):
+        """
+        Returns the positions of the pending incidents matching the filters, in ``sort`` order.
+
+        ``start``/``end`` bound 'Datetime IST' to [start, end) as naive IST timestamps. Use the
+        result with ``count``, ``step`` and ``incident`` while ``generation`` is unchanged.
+        """
+        key = (tuple(sorted(owners or (), key=str)), tuple(sorted(customers or (), key=str)), start, end, sort)
+        with self._lock:
+            selection = self._selections.get(key)
+            if selection is not None:
+                return selection
+            columns = self._ensure_columns()
+            keep = self._mask.copy()
+            if owners:
+                keep &= pd.Series(columns['owner']).isin(list(owners)).to_numpy()
+            if customers:
+                keep &= pd.Series(columns['customer']).isin(list(customers)).to_numpy()
+            if start is not None:
+                keep &= columns['datetime'] >= pd.Timestamp(start).to_datetime64()
+            if end is not None:
+                keep &= columns['datetime'] < pd.Timestamp(end).to_datetime64()
+            positions = np.flatnonzero(keep)
+            column, descending = WORK_QUEUE_SORTS[sort]
+            order = pd.Series(columns[column][positions]).sort_values(ascending=not descending, kind='stable',
+                                                                       na_position='last').index.to_numpy()
+            selection = positions[order]
+            if len(self._selections) >= WORK_QUEUE_SELECTIONS:
+                del self._selections[next(iter(self._selections))]
+            self._selections[key] = selection
+            return selection
+
+    def count(self, selection):
+        """Returns how many incidents of ``selection`` are still pending."""
+        with self._lock:
+            return int(self._mask[selection].sum()) if self._mask is not None else 0
+
+    def step(self, selection, index=-1, direction=1):
+        """
+        Returns the index in ``selection`` of the next (``direction=1``) or previous (``-1``)
+        pending incident after ``index``, or None when there is none.
+        """
+        with self._lock:
+            if self._mask is None:
+                return None
+            if direction > 0:
+                for offset in range(index + 1, len(selection), WORK_QUEUE_SCAN_CHUNK):
+                    hits = np.flatnonzero(self._mask[selection[offset:offset + WORK_QUEUE_SCAN_CHUNK]])
+                    if hits.size:
+                        return offset + int(hits[0])
+            else:
+                for offset in range(min(index, len(selection)), 0, -WORK_QUEUE_SCAN_CHUNK):
+                    lo = max(offset - WORK_QUEUE_SCAN_CHUNK, 0)
+                    hits = np.flatnonzero(self._mask[selection[lo:offset]])
+                    if hits.size:
+                        return lo + int(hits[-1])
+            return None
+
+    def is_pending(self, selection, index):
+        with self._lock:
+            return self._mask is not None and bool(self._mask[selection[index]])
+
+    def incident(self, selection, index):
+        """Returns the incident at ``index`` of ``selection`` as a dict with the upload's column names."""
+        with self._lock:
+            columns = self._ensure_columns()
+            position = selection[index]
+            duration = columns['duration'][position]
+            return {
+                'Monitor ID': columns['ids'][position],
+                'Name': columns['customer'][position],
+                'Owner': columns['owner'][position],
+                'Duration': None if np.isnan(duration) else int(duration),
+                'Datetime IST': pd.Timestamp(columns['datetime'][position]),
+            }
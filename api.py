@@ -0,0 +1,277 @@
+"""
+Read-only JSON metrics API over the app's database, for tools that need the SLA numbers.
+
+Endpoints (``from`` and ``to`` are optional IST days, ``to`` inclusive):
+    GET /summary?from=2025-04-01&to=2025-04-30[&merge_overlaps=1]   per-customer downtime
+    GET /counts?from=2025-04-01&to=2025-04-30                        TP/FP, owner and validator counts
+
+Both answer for the most recently changed dataset, or for the one named by ``dataset``
+(the fingerprint of a set of uploads, or ``folder:<path>`` for a watched folder).
+
+Start it with ``python -m dashboard serve --db incidents.db``.
+"""
+import hashlib
+import json
+import queue
+import sqlite3
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from contextlib import contextmanager
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from reports import compute_sla_metrics
+from storage import BUSY_TIMEOUT_SEC, DATETIME_FORMAT, READER_POOL_SIZE
+
+API_HOST = "127.0.0.1"
+API_PORT = 8600
+API_CACHE_ENTRIES = 256  # Response bodies kept in memory, by ETag
+DECISIONS = ('TP', 'FP')
+TRUE_VALUES = ('1', 'true', 'yes')
+
+# Everything a response depends on, for the requested or the latest dataset; each lookup is an index probe.
+VERSION_QUERY = """
+    SELECT (SELECT value FROM meta WHERE key = 'database_id'), d.dataset, d.version, d.epoch,
+           (SELECT value FROM meta WHERE key = 'validations_epoch'),
+           (SELECT MAX(seq) FROM validations)
+    FROM datasets d
+    WHERE d.dataset = COALESCE(?, (SELECT dataset FROM datasets ORDER BY version DESC LIMIT 1))
+"""
+
+
+def _validated_incidents(conn, dataset, start=None, end=None):
+    """Returns the validated incidents of ``dataset`` in [start, end) with their decision and reviewer."""
+    clauses, params = ["i.dataset = ?"], [dataset]
+    if start is not None:
+        clauses.append("i.datetime_ist >= ?")
+        params.append(start.strftime(DATETIME_FORMAT))
+    if end is not None:
+        clauses.append("i.datetime_ist < ?")
+        params.append(end.strftime(DATETIME_FORMAT))
+    where = f"WHERE {' AND '.join(clauses)}"
+    rows = conn.execute(f"""
+        SELECT i.name, i.duration, i.datetime_ist, i.monitor_id, i.owner, v.decision, v.reviewer
+        FROM validations v
+        JOIN incidents i ON i.monitor_id = v.monitor_id
+        {where}
+    """, params).fetchall()
+    df = pd.DataFrame([tuple(row) for row in rows],
+                      columns=['Name', 'Duration', 'Datetime IST', 'Monitor ID', 'Owner', 'decision', 'reviewer'])
+    df['Datetime IST'] = pd.to_datetime(df['Datetime IST'], format=DATETIME_FORMAT)
+    return df
+
+
+def summary_metrics(conn, dataset, start=None, end=None, merge_overlaps=False):
+    """
+    The Reporting page's SLA summary for a period: downtime from the TP incidents in the
+    period, and every stored customer without any as a no-downtime customer.
+    """
+    validated = _validated_incidents(conn, dataset, start, end)
+    customers = pd.DataFrame([tuple(row) for row in conn.execute(
+        "SELECT DISTINCT name FROM incidents WHERE dataset = ? AND name IS NOT NULL", (dataset,))], columns=['Name'])
+    summary_df, no_downtime_customers = compute_sla_metrics(validated[validated['decision'] == 'TP'], customers,
+                                                            merge_overlaps)
+    return {'customers': summary_df.to_dict('records'),
+            'no_downtime_customers': sorted(no_downtime_customers, key=str)}
+
+
+def count_metrics(conn, dataset, start=None, end=None):
+    """The Reporting page's charts for a period: TP/FP decisions, TP incidents per owner and per validator."""
+    validated = _validated_incidents(conn, dataset, start, end)
+    decisions = validated['decision'].value_counts()
+    tp = validated[validated['decision'] == 'TP']
+    return {'decisions': {decision: int(decisions.get(decision, 0)) for decision in DECISIONS},
+            'owners': tp['Owner'].astype(str).value_counts().to_dict(),
+            'validators': tp['reviewer'].astype(str).value_counts().to_dict()}
+
+
+ENDPOINTS = {  # path -> (metrics function, accepts merge_overlaps)
+    '/summary': (summary_metrics, True),
+    '/counts': (count_metrics, False),
+}
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _day_text(day):
+    return day.strftime('%Y-%m-%d') if day is not None else None
+
+
+def _json_bytes(payload):
+    return json.dumps(payload, default=_json_default, separators=(',', ':')).encode('utf-8')
+
+
+def _period_params(path, query):
+    """Parses ``from``, ``to`` and ``merge_overlaps`` into keyword arguments; raises ValueError on bad input."""
+    def day(name):
+        values = query.get(name)
+        if not values or not values[-1].strip():
+            return None
+        try:
+            return pd.Timestamp(values[-1].strip()).normalize()
+        except ValueError:
+            raise ValueError(f"'{name}' must be a date (YYYY-MM-DD), got {values[-1]!r}") from None
+
+    start, last_day = day('from'), day('to')
+    if start is not None and last_day is not None and last_day < start:
+        raise ValueError("'to' is before 'from'")
+    params = {'start': start, 'end': last_day + pd.Timedelta(days=1) if last_day is not None else None}
+    if ENDPOINTS[path][1]:
+        params['merge_overlaps'] = query.get('merge_overlaps', [''])[-1].strip().lower() in TRUE_VALUES
+    return params
+
+
+def _etag_matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    tags = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+    return '*' in tags or etag in tags
+
+
+class MetricsService:
+    """
+    Answers metrics requests from an app database, without running the Streamlit script.
+
+    Each request first reads the data version (database id, the dataset's version and epoch,
+    the validations epoch and change sequence) inside a read transaction. The ETag is a hash of that
+    version, the endpoint and its parameters, so a poll that sends it back in If-None-Match
+    gets 304 Not Modified without any incident being read. Other bodies are computed in
+    the same snapshot as their ETag and kept in a small LRU cache by ETag; concurrent
+    requests for one ETag share a single computation.
+    """
+
+    def __init__(self, db_path, readers=READER_POOL_SIZE, cache_entries=API_CACHE_ENTRIES):
+        self.db_path = db_path
+        self.cache_entries = cache_entries
+        self._readers = queue.LifoQueue()
+        for _ in range(readers):
+            self._readers.put(sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, timeout=BUSY_TIMEOUT_SEC,
+                                              isolation_level=None, check_same_thread=False))
+        self._lock = threading.Lock()
+        self._bodies = OrderedDict()  # ETag -> Future of the JSON body
+
+    @contextmanager
+    def _snapshot(self):
+        """Borrows a read-only connection and holds one read transaction on it."""
+        conn = self._readers.get()
+        try:
+            conn.execute("BEGIN")
+            try:
+                yield conn
+            finally:
+                conn.execute("ROLLBACK")
+        finally:
+            self._readers.put(conn)
+
+    def _claim(self, etag):
+        """Returns (future, compute): the body's future, and whether this caller must compute it."""
+        with self._lock:
+            future = self._bodies.get(etag)
+            if future is not None:
+                self._bodies.move_to_end(etag)
+                return future, False
+            future = self._bodies[etag] = Future()
+            while len(self._bodies) > self.cache_entries:
+                self._bodies.popitem(last=False)
+            return future, True
+
+    def _discard(self, etag, future):
+        with self._lock:
+            if self._bodies.get(etag) is future:
+                del self._bodies[etag]
+
+    @staticmethod
+    def _error(status, message):
+        return status, {'Content-Type': 'application/json'}, _json_bytes({'error': message})
+
+    def respond(self, path, query, if_none_match=None):
+        """Returns (status, headers, body) for a GET of ``path`` with the ``parse_qs`` ``query``."""
+        path = path.rstrip('/')
+        if path not in ENDPOINTS:
+            return self._error(HTTPStatus.NOT_FOUND, f"Unknown endpoint; use one of {', '.join(ENDPOINTS)}")
+        try:
+            params = _period_params(path, query)
+        except ValueError as e:
+            return self._error(HTTPStatus.BAD_REQUEST, str(e))
+        requested = query.get('dataset', [''])[-1].strip() or None
+
+        try:
+            with self._snapshot() as conn:
+                version = conn.execute(VERSION_QUERY, (requested,)).fetchone()
+                if version is None:
+                    message = f"No dataset {requested!r}" if requested else "No incident data has been loaded yet"
+                    return self._error(HTTPStatus.NOT_FOUND, message)
+                version = tuple(version)
+                etag = '"' + hashlib.sha256(repr((version, path, params)).encode('utf-8')).hexdigest()[:32] + '"'
+                headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+                if _etag_matches(if_none_match, etag):
+                    return HTTPStatus.NOT_MODIFIED, headers, b''
+                future, compute = self._claim(etag)
+                if compute:
+                    metrics, _ = ENDPOINTS[path]
+                    try:
+                        last_day = params['end'] - pd.Timedelta(days=1) if params['end'] is not None else None
+                        period = {'dataset': version[1], 'from': _day_text(params['start']),
+                                  'to': _day_text(last_day)}
+                        future.set_result(_json_bytes({**period, **metrics(conn, version[1], **params)}))
+                    except Exception as e:
+                        self._discard(etag, future)
+                        future.set_exception(e)
+            # Requests that found the body being computed wait here, without holding a connection.
+            body = future.result()
+        except sqlite3.OperationalError as e:
+            return self._error(HTTPStatus.SERVICE_UNAVAILABLE, f"The database is not ready: {e}")
+        return HTTPStatus.OK, {**headers, 'Content-Type': 'application/json'}, body
+
+    def close(self):
+        for _ in range(self._readers.qsize()):
+            self._readers.get().close()
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    server_version = "SLAMetrics/1.0"
+    protocol_version = "HTTP/1.1"  # Keep-alive, so pollers skip a TCP handshake per request
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        try:
+            status, headers, body = self.server.service.respond(url.path, parse_qs(url.query),
+                                                                self.headers.get('If-None-Match'))
+        except Exception as e:
+            status, headers, body = MetricsService._error(HTTPStatus.INTERNAL_SERVER_ERROR, str(e))
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        if status != HTTPStatus.NOT_MODIFIED:
+            self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if status != HTTPStatus.NOT_MODIFIED:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+class MetricsServer(ThreadingHTTPServer):
+    """HTTP server for a ``MetricsService``; one thread per connection. ``port=0`` picks a free port."""
+
+    daemon_threads = True
+
+    def __init__(self, db_path, host=API_HOST, port=API_PORT, quiet=False):
+        self.service = MetricsService(db_path)
+        self.quiet = quiet
+        super().__init__((host, port), MetricsHandler)
+
+    def server_close(self):
+        super().server_close()
+        self.service.close()
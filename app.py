@@ -1,267 +1,286 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
-import sqlite3
+import uuid
 from datetime import datetime
-from fpdf import FPDF
-import io
-import os
+
+from ingest import (INCIDENT_TZ, IncidentFileError, IngestCache, coalesce_incidents, content_digest, dataset_digest,
+                    load_incident_files, read_incident_folder)
+from charts import get_chart_renderer
+from aggregates import SKETCH_RELATIVE_ACCURACY, WORK_QUEUE_SORTS, RollupStore, SlaAggregateStore, WorkQueue
+from profiling import (PROFILE_LOG_PATH, ProfileHistory, profiling_default, record_miss, stage, start_profiling,
+                       timed_job)
+from results import RESULT_CACHE_PATH, ResultCache
+from reports import (CHART_TOP_N, MERGED_DOWNTIME_COLUMN, OTHERS_LABEL, ReportJobManager, add_merged_downtime,
+                     generate_pdf_report, merged_downtime, top_n, top_n_counts)
+from storage import (Database, ValidationCache, dataset_version, delete_all_validations, fetch_incidents,
+                     fetch_ingested_files, fetch_validated_tp, get_meta, sync_incidents, upsert_validations)
+from watch import WATCH_POLL_SEC, FolderWatcher
 
 # --- Configuration ---
 DB_FILE_PATH = "incidents.db"
-RAW_DATA_SHEET_NAME = 'Incidents - Raw Data '  # Note the trailing space as in the original script
-
-# --- Page Configuration (Must be the first Streamlit command) ---
-st.set_page_config(
-    page_title="SLA Incident Dashboard",
-    page_icon="📊",
-    layout="wide"
-)
+BULK_GRID_ROWS = 1000  # Rows shown in the bulk validation grid
+TABLE_PAGE_ROWS = 50  # Rows styled and sent to the browser per table page
+DOWNTIME_CRITICAL_SEC = 900  # More than 15 minutes
+DOWNTIME_WARNING_SEC = 600  # More than 10 minutes
+BAR_COLORS = ('red', 'orange', 'lightskyblue')  # critical, warning, otherwise
+OTHERS_COLOR = 'lightgray'
+ROW_STYLES = ('background-color: #ffcccc', 'background-color: #ffe5cc', 'background-color: #cceeff')
 
 
 # --- Database Setup ---
 @st.cache_resource
-def get_db_connection():
-    """Establishes and returns a cached database connection."""
-    conn = sqlite3.connect(DB_FILE_PATH, check_same_thread=False)
-    # Use row_factory to access columns by name
-    conn.row_factory = sqlite3.Row
-    return conn
-
-
-def init_db():
-    """Initializes the database table if it doesn't exist."""
-    conn = get_db_connection()
-    c = conn.cursor()
-    # The 'reviewer' column will now store the 'validator's' name.
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS validations (
-            id INTEGER PRIMARY KEY,
-            monitor_id TEXT UNIQUE,
-            decision TEXT,
-            reviewer TEXT,
-            timestamp TEXT
-        )
-    ''')
-    conn.commit()
+def get_database():
+    """Opens the shared database (WAL, read pool, queued writer) and creates the tables if needed."""
+    return Database(DB_FILE_PATH)
 
 
 # --- Data Loading ---
-@st.cache_data
-def load_incident_data(uploaded_file):
-    """Loads and caches the raw incident data."""
+@st.cache_resource
+def get_ingest_cache():
+    """Returns the process-wide on-disk ingest cache."""
+    return IngestCache()
+
+
+@st.cache_data(max_entries=4)
+@record_miss("load_incident_data")
+def load_incident_data(data_hash, _files):
+    """
+    Loads and caches the merged incident data of one or more reports.
+
+    ``_files`` is a list of (name, bytes); it is identified by ``data_hash`` instead of being
+    hashed by Streamlit. Returns (df, ingested files, skipped duplicate names).
+    """
     try:
-        df = pd.read_excel(uploaded_file, sheet_name=RAW_DATA_SHEET_NAME)
-        # Standardize datetime column, handling different formats
-        if 'Datetime IST' in df.columns:
-            df['Datetime IST'] = pd.to_datetime(df['Datetime IST'], format='mixed', dayfirst=True)
-
-        # Ensure Monitor ID is a string and stripped of whitespace for consistency
-        if 'Monitor ID' in df.columns:
-            df['Monitor ID'] = df['Monitor ID'].astype(str).str.strip()
-
-        # Ensure Owner is a string and stripped of whitespace
-        if 'Owner' in df.columns:
-            df['Owner'] = df['Owner'].astype(str).str.strip()
-
-        # Ensure required columns exist, now including 'Owner'
-        required_cols = ['Name', 'Duration', 'Datetime IST', 'Monitor ID', 'Owner']
-        if not all(col in df.columns for col in required_cols):
-            st.error(f"Excel file must contain the following columns: {', '.join(required_cols)}")
-            return pd.DataFrame()
-        return df
+        return load_incident_files(_files, cache=get_ingest_cache())
+    except IncidentFileError as e:
+        st.error(str(e))
+        return pd.DataFrame(), [], []
     except Exception as e:
-        st.error(f"An error occurred while reading the Excel file: {e}")
-        return None
+        st.error(f"An error occurred while reading the Excel files: {e}")
+        return None, [], []
 
 
-@st.cache_data
-def get_all_validations():
-    """Fetches all existing validations from the database."""
-    conn = get_db_connection()
-    c = conn.cursor()
-    c.execute("SELECT monitor_id, decision, reviewer FROM validations")
-    # 'reviewer' column holds the name of the person who validated the incident
-    return {str(row['monitor_id']).strip(): {'decision': row['decision'], 'reviewer': row['reviewer']} for row in
-            c.fetchall()}
+@st.cache_resource
+def get_folder_watcher(folder):
+    """Returns the watcher for a folder of exports, shared by every session."""
+    return FolderWatcher(get_database(), folder, cache=get_ingest_cache())
+
+
+@st.cache_data(max_entries=2)
+@record_miss("load_stored_incidents")
+def load_stored_incidents(data_hash, incidents_version):
+    """Reads the incidents table; cached per incidents version, so it is re-read only after a change."""
+    with get_database().reader() as conn:
+        return fetch_incidents(conn, data_hash)
+
+
+@st.cache_data(max_entries=2)
+@record_miss("load_outages")
+def load_outages(data_hash, incidents_version, _incidents_df):
+    """Groups each customer's overlapping incidents into outages; returns (outage ids, outages)."""
+    return coalesce_incidents(_incidents_df)
+
+
+@st.fragment(run_every=WATCH_POLL_SEC)
+def watch_folder_panel(watcher):
+    """Polls the watched folder in the background and reruns the app when new rows arrived."""
+    try:
+        result = watcher.poll()
+    except (OSError, IncidentFileError) as e:
+        st.error(f"Could not ingest from the folder: {e}")
+        return
+    if result is not None:
+        st.session_state.last_folder_ingest = result
+        st.rerun(scope="app")
+    last = st.session_state.get("last_folder_ingest")
+    if last:
+        st.caption(f"Last change: {', '.join(last['files'])}: {last['inserted']:,} new and "
+                   f"{last['updated']:,} changed incidents (version {last['version']}).")
+    st.caption(f"Checking for new exports every {WATCH_POLL_SEC} s.")
+
+
+def profiling_panel(record):
+    """Shows this rerun's stage timings and the session's rerun latency percentiles in the sidebar."""
+    history = st.session_state.setdefault("profile_history", ProfileHistory())
+    history.add(record)
+    with st.sidebar.expander(f"Profiling: {record['rerun_ms']:,.0f} ms"):
+        timings = pd.DataFrame(
+            [(name, ms, record['cache'].get(name, "")) for name, ms in record['stages'].items()],
+            columns=["Stage", "ms", "Cache"]
+        )
+        st.dataframe(timings, hide_index=True, use_container_width=True)
+        rerun_percentiles = history.rerun_percentiles()
+        st.caption(f"Last {len(history.records)} reruns: p50 {rerun_percentiles[50]:,.0f} ms, "
+                   f"p95 {rerun_percentiles[95]:,.0f} ms. Logged to {PROFILE_LOG_PATH}.")
+
+
+@st.cache_resource(max_entries=2)
+@record_miss("get_sla_aggregates")
+def get_sla_aggregates(data_hash):
+    """Returns the incrementally maintained SLA aggregates for the loaded incident data."""
+    with get_database().reader() as conn:
+        return SlaAggregateStore.from_db(conn, data_hash)
+
+
+@st.cache_resource(max_entries=2)
+@record_miss("get_rollups")
+def get_rollups(data_hash):
+    """Returns the hourly/daily downtime rollups for the loaded incident data."""
+    with get_database().reader() as conn:
+        return RollupStore.from_db(conn, data_hash)
 
 
-# --- Core Logic ---
-def compute_sla_metrics(tp_incidents_df, all_incidents_df):
+# --- Shared Results ---
+@st.cache_resource
+def get_result_cache():
+    """Returns the on-disk result cache, shared by every session and by replicas pointed at the same file."""
+    return ResultCache(RESULT_CACHE_PATH)
+
+
+def shared_result(kind, data_version, compute, *params):
     """
-    Computes SLA metrics from True Positive incidents and a full list of customers.
+    Returns ``compute()`` for this data version and ``params``. It is computed once per process;
+    other replicas reuse the stored result, unless they miss before it is stored.
     """
-    if tp_incidents_df.empty:
-        summary = pd.DataFrame(columns=['Customer', 'Total Downtime (sec)', 'Avg Downtime (sec)', 'Min Downtime (sec)',
-                                        'Max Downtime (sec)'])
-    else:
-        summary = tp_incidents_df.groupby('Name')['Duration'].agg(['sum', 'mean', 'min', 'max']).reset_index()
-        summary.columns = ['Customer', 'Total Downtime (sec)', 'Avg Downtime (sec)', 'Min Downtime (sec)',
-                           'Max Downtime (sec)']
-        summary['Avg Downtime (sec)'] = summary['Avg Downtime (sec)'].round(2)
+    return get_result_cache().get_or_compute((kind, data_version) + params, record_miss(kind)(compute))
 
-    # Correctly identify customers with no downtime for the given period
-    all_customers = set(all_incidents_df['Name'].unique())
-    downtime_customers = set(summary['Customer'])
-    no_downtime_customers = all_customers - downtime_customers
 
-    return summary, no_downtime_customers
+def refreshed(view):
+    """Catches an in-memory view (SLA aggregates, rollups) up with the database and returns it."""
+    with get_database().reader() as conn:
+        view.refresh(conn)
+    return view
 
 
-# --- Report Generation ---
-def generate_pdf_report(summary_df, no_downtime_customers, validations, validated_tp_df):
-    """Generates a PDF report with charts and tables, then returns it as bytes."""
-    pdf = FPDF()
-    pdf.add_page()
-    pdf.set_font("Arial", 'B', size=16)
-    pdf.cell(0, 10, txt="SLA Incident Report", ln=True, align='C')
+class SharedRollups:
+    """
+    The dashboard's rollup queries, answered through the shared result cache.
 
-    # --- Add Charts to PDF ---
-    # This functionality requires the 'kaleido' library: pip install kaleido
-    try:
-        import plotly.express as px
+    The rollups are only built, or caught up, on a miss, so a process whose queries were
+    all answered by another session or replica never builds them at all.
+    """
 
-        # Chart 1: Customer Impact Ratio
-        num_no_downtime = len(no_downtime_customers)
-        num_tp_downtime = validated_tp_df['Name'].nunique()
-        if num_no_downtime > 0 or num_tp_downtime > 0:
-            pdf.ln(10)
-            pdf.set_font("Arial", 'B', size=12)
-            pdf.cell(0, 10, "Customer Impact Ratio", ln=True)
-            impact_data = pd.DataFrame({
-                'Category': ['Customers with No Downtime', 'Customers with TP Downtime'],
-                'Count': [num_no_downtime, num_tp_downtime]
-            })
-            fig_impact = px.pie(impact_data, values='Count', names='Category',
-                                color_discrete_map={'Customers with No Downtime': 'green',
-                                                    'Customers with TP Downtime': 'red'},
-                                template='plotly_white')
-            impact_path = "temp_impact_chart.png"
-            fig_impact.write_image(impact_path, width=600, height=400)
-            pdf.image(impact_path, w=170)
-            os.remove(impact_path)
-
-        # Chart 2: TP vs FP Ratio
-        total_tp = len([val for val in validations.values() if val['decision'] == 'TP'])
-        total_fp = len([val for val in validations.values() if val['decision'] == 'FP'])
-        if total_tp > 0 or total_fp > 0:
-            pdf.ln(5)
-            pdf.set_font("Arial", 'B', size=12)
-            pdf.cell(0, 10, "TP vs. FP Ratio", ln=True)
-            pie_data = pd.DataFrame({'Decision': ['True Positives', 'False Positives'], 'Count': [total_tp, total_fp]})
-            fig_pie = px.pie(pie_data, values='Count', names='Decision',
-                             color_discrete_map={'True Positives': 'red', 'False Positives': 'green'},
-                             template='plotly_white')
-            pie_path = "temp_pie_chart.png"
-            fig_pie.write_image(pie_path, width=600, height=400)
-            pdf.image(pie_path, w=170)
-            os.remove(pie_path)
-
-        # Chart 3: Incident Ownership
-        if not validated_tp_df.empty:
-            pdf.add_page()  # Add a new page for more charts
-            pdf.ln(5)
-            pdf.set_font("Arial", 'B', size=12)
-            pdf.cell(0, 10, "Incident Ownership (True Positives)", ln=True)
-            owner_counts = validated_tp_df['Owner'].value_counts().reset_index()
-            owner_counts.columns = ['Owner', 'Incidents Owned']
-            fig_owner = px.bar(owner_counts, x='Owner', y='Incidents Owned', text_auto=True,
-                               color_discrete_sequence=px.colors.qualitative.Pastel,
-                               template='plotly_white')
-            owner_path = "temp_owner_chart.png"
-            fig_owner.write_image(owner_path, width=800, height=400)
-            pdf.image(owner_path, w=170)
-            os.remove(owner_path)
-
-        # Chart 4: Validator Workload
-        tp_validators = [val['reviewer'] for val in validations.values() if val['decision'] == 'TP']
-        if tp_validators:
-            pdf.ln(5)
-            pdf.set_font("Arial", 'B', size=12)
-            pdf.cell(0, 10, "Validation Workload", ln=True)
-            validator_counts = pd.Series(tp_validators).value_counts().reset_index()
-            validator_counts.columns = ['Validator', 'Incidents Validated']
-            fig_validator = px.bar(validator_counts, x='Validator', y='Incidents Validated', text_auto=True,
-                                   color_discrete_sequence=px.colors.qualitative.Vivid,
-                                   template='plotly_white')
-            validator_path = "temp_validator_chart.png"
-            fig_validator.write_image(validator_path, width=800, height=400)
-            pdf.image(validator_path, w=170)
-            os.remove(validator_path)
-
-    except ImportError:
-        pdf.ln(10)
-        pdf.set_font("Arial", 'I', size=10)
-        pdf.cell(0, 10, txt="(Chart generation failed. Please ensure 'plotly' and 'kaleido' are installed.)", ln=True)
-    except Exception as e:
-        pdf.ln(10)
-        pdf.set_font("Arial", 'I', size=10)
-        pdf.cell(0, 10, txt=f"(An error occurred during chart generation: {e})", ln=True)
-
-    # --- Add Tables to PDF ---
-    pdf.add_page()
-    pdf.set_font("Arial", 'B', size=16)
-    pdf.cell(0, 10, "Detailed Report Data", ln=True, align='C')
-    pdf.ln(10)
-
-    # Downtime Summary Table
-    if not summary_df.empty:
-        pdf.set_font("Arial", 'B', size=12)
-        pdf.cell(0, 10, "Downtime Summary by Customer", ln=True)
-        pdf.set_font("Arial", 'B', size=10)
-        col_widths = {'Customer': 70, 'Total Downtime (sec)': 40, 'Avg Downtime (sec)': 40, 'Min Downtime (sec)': 20,
-                      'Max Downtime (sec)': 20}
-        for col_name in summary_df.columns:
-            pdf.cell(col_widths.get(col_name, 40), 10, txt=col_name, border=1, align='C')
-        pdf.ln()
-        pdf.set_font("Arial", size=10)
-        for _, row in summary_df.iterrows():
-            for col_name in summary_df.columns:
-                pdf.cell(col_widths.get(col_name, 40), 10, txt=str(row[col_name]), border=1)
-            pdf.ln()
-    else:
-        pdf.set_font("Arial", size=12)
-        pdf.cell(0, 10, "No downtime incidents recorded for this period.", ln=True)
+    def __init__(self, data_hash, data_version):
+        self.data_hash = data_hash
+        self.data_version = data_version
 
-    pdf.ln(10)
+    def _rollups(self):
+        return refreshed(get_rollups(self.data_hash))
 
-    # No Downtime Section
-    pdf.set_font("Arial", 'B', size=12)
-    pdf.cell(0, 10, "Customers with No Downtime Incidents", ln=True)
-    pdf.set_font("Arial", size=10)
-    if no_downtime_customers:
-        pdf.multi_cell(0, 5, txt=', '.join(sorted(list(no_downtime_customers))))
-    else:
-        pdf.cell(0, 10, "All customers experienced at least one downtime incident.", ln=True)
+    def _query(self, method, *args, **kwargs):
+        # Owner filters are order-insensitive: sorted, equal filters share one entry
+        args = tuple(tuple(sorted(arg, key=str)) if isinstance(arg, (list, set)) else arg for arg in args)
+        return shared_result(f"rollups.{method}", self.data_version,
+                             lambda: getattr(self._rollups(), method)(*args, **kwargs),
+                             args, tuple(sorted(kwargs.items())))
 
-    return pdf.output(dest='S').encode('latin-1')
+    @property
+    def owners(self):
+        return shared_result("rollups.owners", self.data_version, lambda: self._rollups().owners)
 
+    def bounds(self):
+        return self._query('bounds')
 
-# --- Streamlit Pages ---
-def page_validator(incident_data, validations):
-    """UI for the Incident Validation page."""
-    st.header("Incident Validation")
-    st.write("Review each incident, mark it as TP/FP, and record your name as the validator.")
+    def summary(self, start=None, end=None, owners=None, percentiles=False):
+        return self._query('summary', start, end, owners, percentiles=percentiles)
 
-    if 'current_incident_idx' not in st.session_state:
-        st.session_state.current_incident_idx = 0
+    def owner_summary(self, start=None, end=None, owners=None):
+        return self._query('owner_summary', start, end, owners)
 
-    total_incidents = len(incident_data)
-    if total_incidents == 0:
-        st.warning("No incidents to validate.")
-        return
+    def trend(self, start=None, end=None, owners=None):
+        return self._query('trend', start, end, owners)
 
-    idx = st.session_state.current_incident_idx
-    row = incident_data.iloc[idx]
-    monitor_id = str(row['Monitor ID']).strip()
 
-    st.progress((idx + 1) / total_incidents)
+def read_validated_tp(db, data_hash):
+    with db.reader() as conn:
+        return fetch_validated_tp(conn, data_hash)
+
+
+def build_shared_pdf(results, key, *args, **kwargs):
+    """Builds the PDF report and also stores it in ``results``, from where other sessions and replicas serve it."""
+    pdf_bytes = generate_pdf_report(*args, **kwargs)
+    results.put(key, pdf_bytes)
+    return pdf_bytes
+
+
+@st.cache_resource(max_entries=2)
+@record_miss("get_work_queue")
+def get_work_queue(data_hash):
+    """Returns the index of unvalidated incidents for the loaded incident data."""
+    with get_database().reader() as conn:
+        return WorkQueue.from_db(conn, data_hash)
+
+
+@st.cache_resource
+def get_report_jobs():
+    """Returns the process-wide background report job manager."""
+    return ReportJobManager()
+
+
+@st.cache_resource
+def get_validation_cache():
+    """Returns the process-wide, delta-refreshed validations cache."""
+    return ValidationCache()
+
+
+def get_all_validations():
+    """Returns all existing validations, fetching only the rows changed since the last call."""
+    with get_database().reader() as conn:
+        return get_validation_cache().refresh(conn)
 
+
+# --- Tables ---
+def downtime_levels(seconds, choices):
+    """Picks ``choices[0]`` above the critical cutoff, ``choices[1]`` above the warning one, else ``choices[2]``."""
+    seconds = np.asarray(seconds, dtype='float64')
+    return np.select([seconds > DOWNTIME_CRITICAL_SEC, seconds > DOWNTIME_WARNING_SEC], choices[:2], choices[2])
+
+
+def style_downtime_rows(df):
+    """Colors each row of a summary table page by its total downtime."""
+    styles = downtime_levels(df['Total Downtime (sec)'], ROW_STYLES)
+    return df.style.apply(lambda frame: np.repeat(styles[:, None], frame.shape[1], axis=1), axis=None)
+
+
+def paged_table(df, key, search_column=None, style=None, page_rows=TABLE_PAGE_ROWS):
+    """
+    Shows ``df`` one page at a time, with search, sort and page controls.
+
+    Searching (in ``search_column``) and sorting run vectorized over the whole frame, but only
+    the visible page is styled (``style`` turns a page into a Styler) and sent to the browser.
+    """
+    col1, col2, col3, col4 = st.columns([3, 3, 1, 1])
+    query = col1.text_input("Search", key=f"{key}_search", placeholder=f"{search_column} contains...",
+                            disabled=search_column is None)
+    sort_column = col2.selectbox("Sort by", list(df.columns), key=f"{key}_sort")
+    descending = col3.toggle("Descending", key=f"{key}_desc")
+
+    if query and search_column:
+        df = df[df[search_column].astype(str).str.contains(query, case=False, regex=False, na=False)]
+    df = df.sort_values(sort_column, ascending=not descending, kind='stable', na_position='last')
+
+    pages = max(1, -(-len(df) // page_rows))
+    # A different page count (e.g. after a search) starts again from the first page
+    page = col4.number_input("Page", min_value=1, max_value=pages, value=1, key=f"{key}_page_{pages}")
+
+    page_df = df.iloc[(page - 1) * page_rows:page * page_rows]
+    st.dataframe(style(page_df) if style is not None and not page_df.empty else page_df,
+                 use_container_width=True, hide_index=True)
+    if len(df) > page_rows:
+        st.caption(f"Rows {(page - 1) * page_rows + 1:,}-{(page - 1) * page_rows + len(page_df):,} of {len(df):,}.")
+
+
+# --- Streamlit Pages ---
+def validation_card(row, validations):
+    """Shows one incident with the TP/FP form; returns True once a validation was saved."""
+    monitor_id = str(row['Monitor ID']).strip()
     with st.container(border=True):
         col1, col2, col3, col4 = st.columns(4)
         col1.metric("Customer", row['Name'])
         col2.metric("Incident Owner", row['Owner'])
         col3.metric("Duration (sec)", row['Duration'])
-        col4.metric("Date", row['Datetime IST'].strftime('%Y-%m-%d %H:%M'))
+        col4.metric("Date", row['Datetime IST'].strftime('%Y-%m-%d %H:%M') if pd.notna(row['Datetime IST']) else "-")
 
         existing_decision = validations.get(monitor_id, {}).get('decision', 'Unmarked')
         decision_index = ['Unmarked', 'TP', 'FP'].index(existing_decision)
@@ -282,67 +301,242 @@ def page_validator(incident_data, validations):
 
         if st.button("Submit Validation", key=f"submit_{monitor_id}", type="primary"):
             if decision != 'Unmarked' and validator_name:
-                conn = get_db_connection()
-                c = conn.cursor()
-                c.execute("""
-                    INSERT INTO validations (monitor_id, decision, reviewer, timestamp)
-                    VALUES (?, ?, ?, ?)
-                    ON CONFLICT(monitor_id) DO UPDATE SET
-                    decision=excluded.decision,
-                    reviewer=excluded.reviewer,
-                    timestamp=excluded.timestamp
-                """, (monitor_id, decision, validator_name, datetime.now().isoformat()))
-                conn.commit()
+                get_database().write(upsert_validations,
+                                     [(monitor_id, decision, validator_name, datetime.now().isoformat())])
                 st.success(f"Validation for {monitor_id} saved.")
                 st.session_state.validator_name = validator_name
-                get_all_validations.clear()
-            else:
-                st.warning("Please select a decision (TP/FP) and enter a validator name.")
+                return True
+            st.warning("Please select a decision (TP/FP) and enter a validator name.")
+    return False
+
+
+def work_queue_view(work_queue, validations):
+    """Steps through the unvalidated incidents matching the filters, straight from the work-queue index."""
+    col1, col2, col3, col4 = st.columns(4)
+    owners = col1.multiselect("Owner", work_queue.values('owner'), key="queue_owners")
+    customers = col2.multiselect("Customer", work_queue.values('customer'), key="queue_customers")
+    picked = col3.date_input("Date range (IST)", value=(), key="queue_range")
+    sort = col4.selectbox("Order", list(WORK_QUEUE_SORTS), key="queue_sort")
+    start, end = None, None
+    if len(picked) == 2:
+        start, end = pd.Timestamp(picked[0]), pd.Timestamp(picked[1]) + pd.Timedelta(days=1)
+
+    selection = work_queue.select(owners, customers, start, end, sort)
+    # The cursor is an index into the selection; a new filter or a reloaded index starts over.
+    queue_key = (tuple(owners), tuple(customers), start, end, sort, work_queue.generation)
+    if st.session_state.get('queue_key') != queue_key:
+        st.session_state.queue_key = queue_key
+        st.session_state.queue_cursor = work_queue.step(selection)
+    cursor = st.session_state.queue_cursor
+    if cursor is not None and not work_queue.is_pending(selection, cursor):
+        # Validated meanwhile (e.g. by someone else): skip ahead, or back at the end of the queue
+        cursor = work_queue.step(selection, cursor)
+        if cursor is None:
+            cursor = work_queue.step(selection, st.session_state.queue_cursor, direction=-1)
+        st.session_state.queue_cursor = cursor
+
+    remaining = work_queue.count(selection)
+    st.caption(f"{remaining:,} unvalidated incidents match the filters ({work_queue.pending_count:,} in total).")
+    if cursor is None or remaining == 0:
+        st.success("No unvalidated incidents match the filters.")
+        return
+
+    if validation_card(work_queue.incident(selection, cursor), validations):
+        # The validated incident drops out of the queue; move on to the next one.
+        next_index = work_queue.step(selection, cursor)
+        st.session_state.queue_cursor = next_index if next_index is not None else cursor
+        st.rerun()
+
+    previous_index = work_queue.step(selection, cursor, direction=-1)
+    next_index = work_queue.step(selection, cursor)
+    col_nav1, _, col_nav3 = st.columns([1, 2, 1])
+    if col_nav1.button("⬅️ Previous", use_container_width=True, disabled=previous_index is None):
+        st.session_state.queue_cursor = previous_index
+        st.rerun()
+    if col_nav3.button("Next ➡️", use_container_width=True, disabled=next_index is None):
+        st.session_state.queue_cursor = next_index
+        st.rerun()
+
+
+def page_validator(incident_data, validations, work_queue):
+    """UI for the Incident Validation page."""
+    st.header("Incident Validation")
+    st.write("Review each incident, mark it as TP/FP, and record your name as the validator.")
+
+    mode = st.radio("Show", ("Unvalidated incidents", "All incidents in file order"), horizontal=True,
+                    key="validator_mode")
+    if mode == "Unvalidated incidents":
+        work_queue_view(work_queue, validations)
+        return
+
+    if 'current_incident_idx' not in st.session_state:
+        st.session_state.current_incident_idx = 0
+
+    total_incidents = len(incident_data)
+    if total_incidents == 0:
+        st.warning("No incidents to validate.")
+        return
+
+    idx = min(st.session_state.current_incident_idx, total_incidents - 1)
+    st.progress((idx + 1) / total_incidents)
+    validation_card(incident_data.iloc[idx], validations)
 
     col_nav1, _, col_nav3 = st.columns([1, 2, 1])
     if col_nav1.button("⬅️ Previous", use_container_width=True, disabled=(idx == 0)):
-        st.session_state.current_incident_idx -= 1
+        st.session_state.current_incident_idx = idx - 1
         st.rerun()
     if col_nav3.button("Next ➡️", use_container_width=True, disabled=(idx >= total_incidents - 1)):
-        st.session_state.current_incident_idx += 1
+        st.session_state.current_incident_idx = idx + 1
         st.rerun()
 
 
-def page_dashboard(all_incidents_df, validated_tp_df):
+def page_bulk_validator(incident_data, validations, outage_ids=None, outages=None):
+    """UI for the Bulk Validation page."""
+    st.header("Bulk Validation")
+    st.write("Filter the unvalidated incidents, select rows (or every matching incident) and mark them all at once.")
+
+    pending_df = incident_data[~incident_data['Monitor ID'].isin(list(validations))]
+    if pending_df.empty:
+        st.success("Every incident has been validated.")
+        return
+
+    # --- Rule-based selection filters ---
+    col1, col2, col3 = st.columns(3)
+    owners = col1.multiselect("Owner", sorted(pending_df['Owner'].dropna().astype(str).unique()))
+    customers = col2.multiselect("Customer", sorted(pending_df['Name'].dropna().astype(str).unique()))
+    max_duration = col3.number_input("Duration less than (sec, 0 = any)", min_value=0, value=0, step=30)
+
+    filtered_df = pending_df
+    if owners:
+        filtered_df = filtered_df[filtered_df['Owner'].astype(str).isin(owners)]
+    if customers:
+        filtered_df = filtered_df[filtered_df['Name'].astype(str).isin(customers)]
+    if max_duration:
+        filtered_df = filtered_df[filtered_df['Duration'] < max_duration]
+
+    if outage_ids is None:
+        st.caption(f"{len(filtered_df):,} of {len(pending_df):,} unvalidated incidents match the filters.")
+        select_all = st.checkbox(f"Select all {len(filtered_df):,} matching incidents")
+        grid_source, unit = filtered_df, "incidents"
+        grid_columns = ['Monitor ID', 'Name', 'Owner', 'Duration', 'Datetime IST']
+    else:
+        # Overlapping incidents of a customer are one outage, listed and validated as one row.
+        pending_outages = outage_ids.loc[pending_df.index]
+        grid_source = outages[outages['Outage ID'].isin(pending_outages.loc[filtered_df.index].unique())]
+        grid_columns, unit = list(outages.columns), "outages"
+        st.caption(f"{len(filtered_df):,} of {len(pending_df):,} unvalidated incidents match the filters, "
+                   f"in {len(grid_source):,} outages.")
+        select_all = st.checkbox(f"Select all {len(grid_source):,} matching outages")
+
+    # Only the first rows are sent to the browser; "select all" still applies to every match.
+    grid_df = grid_source.head(BULK_GRID_ROWS)[grid_columns].copy()
+    grid_df.insert(0, 'Select', select_all)
+    edited_df = st.data_editor(
+        grid_df,
+        column_config={'Select': st.column_config.CheckboxColumn("Select", default=False)},
+        disabled=grid_columns,
+        hide_index=True,
+        use_container_width=True,
+        key=f"bulk_grid_{unit}_{select_all}"
+    )
+    if len(grid_source) > BULK_GRID_ROWS:
+        st.caption(f"Showing the first {BULK_GRID_ROWS:,} matching {unit}.")
+
+    selected = grid_source if select_all else edited_df.loc[edited_df['Select']]
+    if outage_ids is None:
+        selected_ids = selected['Monitor ID'].tolist()
+    else:
+        # Every unvalidated incident of a selected outage is marked, including any outside the filters
+        selected_ids = pending_df.loc[pending_outages.isin(selected['Outage ID']).to_numpy(), 'Monitor ID'].tolist()
+
+    with st.container(border=True):
+        decision = st.radio("Mark selected as:", ('TP', 'FP'), horizontal=True, key="bulk_decision")
+        validator_name = st.text_input("Validator Name", value=st.session_state.get('validator_name', ''),
+                                       key="bulk_validator")
+        if st.button(f"Submit {len(selected_ids):,} Validations", type="primary", disabled=not selected_ids):
+            if validator_name:
+                timestamp = datetime.now().isoformat()
+                get_database().write(upsert_validations,
+                                     [(monitor_id, decision, validator_name, timestamp) for monitor_id in selected_ids])
+                st.session_state.validator_name = validator_name
+                st.rerun()
+            else:
+                st.warning("Please enter a validator name.")
+
+
+def page_dashboard(rollups, chart_bars=CHART_TOP_N):
     """UI for the SLA Dashboard page."""
     st.header("SLA Dashboard")
 
     st.sidebar.header("Filters")
     timeframe = st.sidebar.selectbox(
         "Select Timeframe",
-        ["All Time", "Last 7 Days", "Last 30 Days", "Last 90 Days"],
+        ["All Time", "Last 7 Days", "Last 30 Days", "Last 90 Days", "Custom Range"],
         key="dashboard_timeframe"
     )
 
-    filtered_df = validated_tp_df.copy()
-    if timeframe != "All Time":
+    # Incident times are naive IST wall-clock values, so "today" is taken in IST as well.
+    now = pd.Timestamp.now(tz=INCIDENT_TZ).tz_localize(None)
+    start, end = None, None
+    if timeframe == "Custom Range":
+        first, last = rollups.bounds()
+        default_range = (first.date(), last.date()) if first is not None else (now.date(), now.date())
+        picked = st.sidebar.date_input("Date range (IST)", value=default_range, key="dashboard_range")
+        if len(picked) == 2:
+            start, end = pd.Timestamp(picked[0]), pd.Timestamp(picked[1]) + pd.Timedelta(days=1)
+    elif timeframe != "All Time":
         days = int(timeframe.split(" ")[1])
-        start_date = pd.Timestamp.now(tz='UTC').floor('D') - pd.DateOffset(days=days)
-        filtered_df['Datetime IST'] = pd.to_datetime(filtered_df['Datetime IST'])
-        if filtered_df['Datetime IST'].dt.tz is None:
-            filtered_df['Datetime IST'] = filtered_df['Datetime IST'].dt.tz_localize('UTC')
-        filtered_df = filtered_df[filtered_df['Datetime IST'] >= start_date]
-
-    summary_df, no_downtime_customers_for_period = compute_sla_metrics(filtered_df, all_incidents_df)
-
-    total_downtime = summary_df['Total Downtime (sec)'].sum()
-    avg_downtime = summary_df['Avg Downtime (sec)'].mean()
-    num_incidents = len(filtered_df)
-    num_customers_affected = summary_df['Customer'].nunique()
+        start = now.floor('D') - pd.Timedelta(days=days)
+        # The period runs up to now (rounded up to the hour, so cached queries change hourly), not to the
+        # last incident, so availability counts the quiet hours since then.
+        end = now.floor('h') + pd.Timedelta(hours=1)
+
+    owners = st.sidebar.multiselect("Owner", sorted(rollups.owners, key=str), key="dashboard_owners") or None
+    compare = st.sidebar.checkbox("Compare with previous period", disabled=start is None,
+                                  key="dashboard_compare")
+
+    with stage("rollup_query"):
+        summary_df, no_downtime_customers_for_period, num_incidents = rollups.summary(start, end, owners,
+                                                                                      percentiles=True)
+
+        total_downtime = summary_df['Total Downtime (sec)'].sum()
+        avg_downtime = summary_df['Avg Downtime (sec)'].mean()
+        num_customers_affected = summary_df['Customer'].nunique()
+
+        deltas = [None] * 4
+        if compare and start is not None:
+            # The comparison period is the same length, immediately before the selected one.
+            previous_df, _, previous_incidents = rollups.summary(start - (end - start), start, owners)
+            previous_avg = previous_df['Avg Downtime (sec)'].mean()
+            avg_change = (0 if pd.isna(avg_downtime) else avg_downtime) - (0 if pd.isna(previous_avg) else previous_avg)
+            deltas = [
+                f"{num_incidents - previous_incidents:+,.0f}",
+                f"{total_downtime - previous_df['Total Downtime (sec)'].sum():+,.0f}",
+                f"{avg_change:+,.2f}",
+                f"{num_customers_affected - previous_df['Customer'].nunique():+,.0f}",
+            ]
 
     kpi1, kpi2, kpi3, kpi4 = st.columns(4)
-    kpi1.metric("Total Incidents (TP)", f"{num_incidents:,.0f}")
-    kpi2.metric("Total Downtime (sec)", f"{total_downtime:,.0f}")
-    kpi3.metric("Avg. Downtime (sec)", f"{avg_downtime:,.2f}" if not pd.isna(avg_downtime) else "0")
-    kpi4.metric("Customers Affected", f"{num_customers_affected:,.0f}")
+    kpi1.metric("Total Incidents (TP)", f"{num_incidents:,.0f}", deltas[0], delta_color="inverse")
+    kpi2.metric("Total Downtime (sec)", f"{total_downtime:,.0f}", deltas[1], delta_color="inverse")
+    kpi3.metric("Avg. Downtime (sec)", f"{avg_downtime:,.2f}" if not pd.isna(avg_downtime) else "0", deltas[2],
+                delta_color="inverse")
+    kpi4.metric("Customers Affected", f"{num_customers_affected:,.0f}", deltas[3], delta_color="inverse")
 
     st.divider()
 
+    with stage("trend_chart"):
+        trend_df, resolution = rollups.trend(start, end, owners)
+        st.subheader(f"Downtime Trend Over Time ({resolution.title()}s)")
+        if trend_df['Downtime (sec)'].any():
+            import plotly.express as px
+
+            trend_fig = px.line(trend_df, x='Period', y='Downtime (sec)', hover_data=['Incidents'])
+            trend_fig.update_layout(xaxis_title=f"{resolution.title()} (IST)", margin=dict(t=10))
+            st.plotly_chart(trend_fig, use_container_width=True)
+        else:
+            st.info("No True Positive downtime to plot in the selected timeframe.")
+
     col1, col2 = st.columns([3, 2])
 
     with col1:
@@ -350,19 +544,16 @@ def page_dashboard(all_incidents_df, validated_tp_df):
         if not summary_df.empty:
             import plotly.express as px
 
-            # Define color based on downtime
-            def get_color(seconds):
-                if seconds > 900:  # More than 15 minutes
-                    return 'red'
-                elif seconds > 600:  # More than 10 minutes
-                    return 'orange'
-                else:  # 10 minutes or less
-                    return 'lightskyblue'
-
-            summary_df['Color'] = summary_df['Total Downtime (sec)'].apply(get_color)
+            # Only the largest customers get a bar of their own; the rest are summed into "Others".
+            chart_df = top_n(summary_df.set_index('Customer')['Total Downtime (sec)'], chart_bars).reset_index()
+            chart_df.columns = ['Customer', 'Total Downtime (sec)']
+            # Color bars by downtime: red above 15 minutes, orange above 10
+            chart_df['Color'] = downtime_levels(chart_df['Total Downtime (sec)'], BAR_COLORS)
+            if len(summary_df) > chart_bars:  # The last bar is the rolled-up rest
+                chart_df.loc[chart_df.index[-1], 'Color'] = OTHERS_COLOR
 
             fig = px.bar(
-                summary_df.sort_values('Total Downtime (sec)', ascending=False),
+                chart_df,
                 x='Customer',
                 y='Total Downtime (sec)',
                 title='Total Downtime per Customer (sec)',
@@ -376,35 +567,28 @@ def page_dashboard(all_incidents_df, validated_tp_df):
     with col2:
         st.subheader("SLA Summary Table")
 
-        # Define styling function for the summary table
-        def style_downtime_table(row):
-            style = ''
-            seconds = row['Total Downtime (sec)']
-            if seconds > 900:  # More than 15 minutes
-                style = 'background-color: #ffcccc'  # Light Red
-            elif seconds > 600:  # More than 10 minutes
-                style = 'background-color: #ffe5cc'  # Light Orange
-            else:  # 10 minutes or less
-                style = 'background-color: #cceeff'  # Light Blue
-            return [style] * len(row)
-
-        if not summary_df.empty:
-            # Apply the style to the DataFrame for display
-            st.dataframe(summary_df.drop(columns=['Color']).style.apply(style_downtime_table, axis=1),
-                         use_container_width=True)
-        else:
-            # Display an empty dataframe if there's no data
-            st.dataframe(summary_df, use_container_width=True)
+        paged_table(summary_df, "dashboard_summary", search_column='Customer', style=style_downtime_rows)
+        st.caption(f"Percentiles are estimated to within {SKETCH_RELATIVE_ACCURACY:.0%}. Availability is the share of "
+                   "the timeframe (for All Time, from the first to the last incident) without TP downtime.")
 
         st.subheader(f"Customers with No Downtime ({timeframe})")
         if no_downtime_customers_for_period:
-            st.dataframe(pd.DataFrame(sorted(list(no_downtime_customers_for_period)), columns=["Customer"]),
-                         use_container_width=True)
+            paged_table(pd.DataFrame({'Customer': list(no_downtime_customers_for_period)}), "dashboard_no_downtime",
+                        search_column='Customer')
         else:
             st.info("All customers had at least one downtime incident in this period.")
 
+        st.subheader("Downtime by Owner")
+        with stage("owner_percentiles"):
+            owner_df = rollups.owner_summary(start, end, owners)
+        if not owner_df.empty:
+            paged_table(owner_df, "dashboard_owners", search_column='Owner')
+        else:
+            st.info("No True Positive incidents in the selected timeframe.")
+
 
-def page_reporting(summary_df, no_downtime_customers, validations, validated_tp_df):
+def page_reporting(summary_df, no_downtime_customers, validations, validated_tp_df, data_version,
+                   chart_bars=CHART_TOP_N):
     """UI for the Reporting page."""
     st.header("Generate Reports")
     st.write("This page provides a summary of all validated incidents and allows you to download reports.")
@@ -420,91 +604,96 @@ def page_reporting(summary_df, no_downtime_customers, validations, validated_tp_
     col1.metric("Total True Positives (TP)", f"{total_tp:,}")
     col2.metric("Total False Positives (FP)", f"{total_fp:,}")
     col3.metric("Average Downtime per TP (sec)", f"{avg_downtime:,.2f}")
+    if MERGED_DOWNTIME_COLUMN in summary_df.columns:
+        st.caption(f"Total downtime: {summary_df['Total Downtime (sec)'].sum():,.0f} sec summed over incidents, "
+                   f"{summary_df[MERGED_DOWNTIME_COLUMN].sum():,.0f} sec with each customer's overlapping "
+                   f"incidents counted once.")
 
     st.divider()
 
-    # --- Customer Impact Ratio Chart ---
-    st.subheader("Customer Impact Ratio")
-    num_no_downtime = len(no_downtime_customers)
-    num_tp_downtime = validated_tp_df['Name'].nunique()
-
-    if num_no_downtime > 0 or num_tp_downtime > 0:
-        import plotly.express as px
-        impact_data = pd.DataFrame({
-            'Category': ['Customers with No Downtime', 'Customers with TP Downtime'],
-            'Count': [num_no_downtime, num_tp_downtime]
-        })
-        fig_impact = px.pie(impact_data, values='Count', names='Category', title='Customer Downtime Impact Ratio',
-                            color_discrete_map={'Customers with No Downtime': 'green',
-                                                'Customers with TP Downtime': 'red'})
-        st.plotly_chart(fig_impact, use_container_width=True)
-    else:
-        st.info("No data available to display customer impact ratio.")
+    with stage("report_charts"):
+        # --- Customer Impact Ratio Chart ---
+        st.subheader("Customer Impact Ratio")
+        num_no_downtime = len(no_downtime_customers)
+        num_tp_downtime = validated_tp_df['Name'].nunique()
 
-    st.divider()
+        if num_no_downtime > 0 or num_tp_downtime > 0:
+            import plotly.express as px
+            impact_data = pd.DataFrame({
+                'Category': ['Customers with No Downtime', 'Customers with TP Downtime'],
+                'Count': [num_no_downtime, num_tp_downtime]
+            })
+            fig_impact = px.pie(impact_data, values='Count', names='Category', title='Customer Downtime Impact Ratio',
+                                color_discrete_map={'Customers with No Downtime': 'green',
+                                                    'Customers with TP Downtime': 'red'})
+            st.plotly_chart(fig_impact, use_container_width=True)
+        else:
+            st.info("No data available to display customer impact ratio.")
 
-    # --- TP vs FP Ratio Chart ---
-    st.subheader("TP vs. FP Ratio")
-    if total_tp > 0 or total_fp > 0:
-        import plotly.express as px
-        pie_data = pd.DataFrame({
-            'Decision': ['True Positives', 'False Positives'],
-            'Count': [total_tp, total_fp]
-        })
-        fig_pie = px.pie(pie_data, values='Count', names='Decision', title='TP vs. FP Ratio',
-                         color_discrete_map={'True Positives': 'red', 'False Positives': 'green'})
-        st.plotly_chart(fig_pie, use_container_width=True)
-    else:
-        st.info("No validation data available to display a chart. Please validate incidents first.")
+        st.divider()
 
-    st.divider()
+        # --- TP vs FP Ratio Chart ---
+        st.subheader("TP vs. FP Ratio")
+        if total_tp > 0 or total_fp > 0:
+            import plotly.express as px
+            pie_data = pd.DataFrame({
+                'Decision': ['True Positives', 'False Positives'],
+                'Count': [total_tp, total_fp]
+            })
+            fig_pie = px.pie(pie_data, values='Count', names='Decision', title='TP vs. FP Ratio',
+                             color_discrete_map={'True Positives': 'red', 'False Positives': 'green'})
+            st.plotly_chart(fig_pie, use_container_width=True)
+        else:
+            st.info("No validation data available to display a chart. Please validate incidents first.")
 
-    # --- Incident Ownership Chart (from Excel) ---
-    st.subheader("Incident Ownership")
-    if not validated_tp_df.empty:
-        owner_counts = validated_tp_df['Owner'].value_counts().reset_index()
-        owner_counts.columns = ['Owner', 'Incidents Owned']
-
-        import plotly.express as px
-        fig_owner = px.bar(
-            owner_counts,
-            x='Owner',
-            y='Incidents Owned',
-            title='True Positive Incidents per Owner',
-            text_auto=True,
-            color='Owner'
-        )
-        fig_owner.update_layout(showlegend=False)
-        st.plotly_chart(fig_owner, use_container_width=True)
-    else:
-        st.info("No True Positive incidents to analyze for ownership.")
+        st.divider()
 
-    st.divider()
+        # --- Incident Ownership Chart (from Excel) ---
+        st.subheader("Incident Ownership")
+        if not validated_tp_df.empty:
+            owner_counts = top_n_counts(validated_tp_df['Owner'].astype(str), chart_bars).reset_index()
+            owner_counts.columns = ['Owner', 'Incidents Owned']
 
-    # --- Validator Workload Chart ---
-    st.subheader("Validation Workload")
-    tp_validators = [
-        val['reviewer'] for val in validations.values() if val['decision'] == 'TP'
-    ]
-    if tp_validators:
-        validator_counts = pd.Series(tp_validators).value_counts().reset_index()
-        validator_counts.columns = ['Validator', 'Incidents Validated']
-
-        import plotly.express as px
-        fig_validator = px.bar(
-            validator_counts,
-            x='Validator',
-            y='Incidents Validated',
-            title='Incidents Validated per Person',
-            text_auto=True,
-            color='Validator'
-        )
-        fig_validator.update_layout(showlegend=False)
-        st.plotly_chart(fig_validator, use_container_width=True)
-    else:
-        st.info("No True Positive incidents have been validated yet.")
+            import plotly.express as px
+            fig_owner = px.bar(
+                owner_counts,
+                x='Owner',
+                y='Incidents Owned',
+                title='True Positive Incidents per Owner',
+                text_auto=True,
+                color='Owner'
+            )
+            fig_owner.update_layout(showlegend=False)
+            st.plotly_chart(fig_owner, use_container_width=True)
+        else:
+            st.info("No True Positive incidents to analyze for ownership.")
 
-    st.divider()
+        st.divider()
+
+        # --- Validator Workload Chart ---
+        st.subheader("Validation Workload")
+        tp_validators = [
+            val['reviewer'] for val in validations.values() if val['decision'] == 'TP'
+        ]
+        if tp_validators:
+            validator_counts = top_n_counts(tp_validators, chart_bars).reset_index()
+            validator_counts.columns = ['Validator', 'Incidents Validated']
+
+            import plotly.express as px
+            fig_validator = px.bar(
+                validator_counts,
+                x='Validator',
+                y='Incidents Validated',
+                title='Incidents Validated per Person',
+                text_auto=True,
+                color='Validator'
+            )
+            fig_validator.update_layout(showlegend=False)
+            st.plotly_chart(fig_validator, use_container_width=True)
+        else:
+            st.info("No True Positive incidents have been validated yet.")
+
+        st.divider()
 
     # --- Download Section ---
     st.subheader("Download Full Reports")
@@ -520,14 +709,41 @@ def page_reporting(summary_df, no_downtime_customers, validations, validated_tp_
                 use_container_width=True
             )
         with col2:
-            pdf_bytes = generate_pdf_report(summary_df, no_downtime_customers, validations, validated_tp_df)
-            st.download_button(
-                label="📄 Download PDF Report",
-                data=pdf_bytes,
-                file_name=f"sla_report_{datetime.now().strftime('%Y%m%d')}.pdf",
-                mime="application/pdf",
-                use_container_width=True
-            )
+            # The PDF is only built when asked for, on a worker, and cached per data version.
+            report_jobs = get_report_jobs()
+            report_key = ('pdf', data_version, chart_bars)
+
+            def pdf_report_panel():
+                job = report_jobs.get(report_key)
+                # A PDF built for this data version by another replica is served without a rebuild.
+                shared_pdf = get_result_cache().get(report_key) if job is None else None
+                if job is not None and job.status == job.DONE and not polling:
+                    shared_pdf = job.result
+                if shared_pdf is not None:
+                    st.download_button(
+                        label="📄 Download PDF Report",
+                        data=shared_pdf,
+                        file_name=f"sla_report_{datetime.now().strftime('%Y%m%d')}.pdf",
+                        mime="application/pdf",
+                        use_container_width=True
+                    )
+                elif job is None or job.status == job.FAILED:
+                    if job is not None:
+                        st.error(job.message)
+                    if st.button("📄 Prepare PDF Report", use_container_width=True):
+                        report_jobs.submit(report_key, timed_job("generate_pdf_report", build_shared_pdf),
+                                           get_result_cache(), report_key, summary_df, no_downtime_customers,
+                                           validations, validated_tp_df, top=chart_bars)
+                        st.rerun()
+                elif not job.finished:
+                    st.progress(job.progress, text=job.message)
+                else:
+                    st.rerun()  # Build finished: rerun once more so the panel stops polling
+
+            # Poll only this panel (not the whole page) while a build is in progress.
+            job = report_jobs.get(report_key)
+            polling = job is not None and not job.finished
+            st.fragment(pdf_report_panel, run_every=1.0 if polling else None)()
     else:
         st.warning("No data available to generate a report. Please validate incidents first.")
 
@@ -535,67 +751,178 @@ def page_reporting(summary_df, no_downtime_customers, validations, validated_tp_
 
     # --- Report Preview Section ---
     st.subheader("Report Data Preview")
-    st.dataframe(summary_df)
+    paged_table(summary_df, "report_summary", search_column='Customer', style=style_downtime_rows)
     st.subheader("Customers with No Downtime (All Time)")
-    st.write(", ".join(sorted(list(no_downtime_customers))))
+    paged_table(pd.DataFrame({'Customer': list(no_downtime_customers)}), "report_no_downtime",
+                search_column='Customer')
 
 
 # --- Main App Logic ---
 def main():
     """Main function to run the Streamlit app."""
+    # --- Page Configuration (Must be the first Streamlit command) ---
+    st.set_page_config(
+        page_title="SLA Incident Dashboard",
+        page_icon="📊",
+        layout="wide"
+    )
+
     st.title("📊 SLA Incident Automation and Dashboard")
 
-    init_db()
+    db = get_database()
 
     st.sidebar.title("Setup")
-    uploaded_file = st.sidebar.file_uploader("Upload Incident Report", type=['xlsx'])
+    uploaded_files = st.sidebar.file_uploader("Upload Incident Reports", type=['xlsx'], accept_multiple_files=True)
+    folder = st.sidebar.text_input("...or load every .xlsx in a folder", key="report_folder").strip()
 
     # --- Debugging Tool ---
     st.sidebar.divider()
     if st.sidebar.button("Clear All Validations"):
-        conn = get_db_connection()
-        c = conn.cursor()
-        c.execute("DELETE FROM validations")
-        conn.commit()
-        get_all_validations.clear()
+        db.write(delete_all_validations)
         st.sidebar.success("All validations have been cleared.")
         st.rerun()
+    profiling = st.sidebar.checkbox("Profile reruns", value=profiling_default(), key="profile_reruns")
+    profiler = start_profiling(profiling, st.session_state.setdefault("profile_session", uuid.uuid4().hex[:8]))
+
+    watching = st.sidebar.checkbox("Watch the folder for new exports", disabled=not folder, key="watch_folder")
+    merge_overlaps = st.sidebar.checkbox(
+        "Merge overlapping incidents", key="merge_overlaps",
+        help="Count a customer's incidents with overlapping time windows once in the reported downtime, "
+             "and validate them together as one outage on the Bulk Validation page."
+    )
 
-    if uploaded_file is None:
-        st.info("Please upload your incident report Excel file to begin.")
-        st.stop()
-
-    all_incidents_df = load_incident_data(uploaded_file)
-
-    if all_incidents_df is None or all_incidents_df.empty:
-        st.error("The uploaded file could not be processed. Please check the file format and column names.")
-        st.stop()
-
-    validations = get_all_validations()
-
-    tp_monitor_ids = [mid for mid, val in validations.items() if val['decision'] == 'TP']
-    validated_tp_df = all_incidents_df[all_incidents_df['Monitor ID'].isin(tp_monitor_ids)]
-
-    # Calculate global SLA metrics for the reporting page (always "All Time")
-    summary_df, no_downtime_customers = compute_sla_metrics(validated_tp_df, all_incidents_df)
+    if watching and folder:
+        # Watch mode: the folder's stored incidents are the source of truth and are patched as exports change.
+        watcher = get_folder_watcher(folder)
+        with st.sidebar:
+            watch_folder_panel(watcher)
+        data_hash = watcher.data_hash
+        with db.reader() as conn:
+            stored = dataset_version(conn, data_hash)
+        if stored is None:
+            st.info("Waiting for the folder to be ingested.")
+            st.stop()
+        incidents_version = stored[0]
+        with stage("load_stored_incidents", cached=True):
+            all_incidents_df = load_stored_incidents(data_hash, incidents_version)
+        skipped_files = []
+        if all_incidents_df.empty:
+            st.info("There are no incident reports in the watched folder yet.")
+            st.stop()
+    else:
+        files = [(uploaded_file.name, uploaded_file.getvalue()) for uploaded_file in uploaded_files or []]
+        if folder:
+            try:
+                files += read_incident_folder(folder)
+            except OSError as e:
+                st.sidebar.error(f"Could not read the folder: {e}")
+
+        if not files:
+            st.info("Please upload your incident report Excel files (or choose a folder) to begin.")
+            st.stop()
+
+        # Identical files under different names count once; the fingerprints identify the dataset.
+        data_hash = dataset_digest(list(dict.fromkeys(content_digest(data) for _, data in files)))
+        with stage("load_incident_data", cached=True):
+            all_incidents_df, ingested_files, skipped_files = load_incident_data(data_hash, files)
+
+        if all_incidents_df is None or all_incidents_df.empty:
+            st.error("The uploaded files could not be processed. Please check the file format and column names.")
+            st.stop()
+
+        # Store the uploads as a dataset of their own; a no-op once they are stored.
+        with stage("sync_incidents"):
+            sync_incidents(db, all_incidents_df, data_hash, ingested_files)
+        with db.reader() as conn:
+            incidents_version = (dataset_version(conn, data_hash) or (0, None))[0]
+
+    cache_stats = get_ingest_cache().stats()
+    st.sidebar.caption(f"Ingest cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses, "
+                       f"{cache_stats['entries']} files ({cache_stats['bytes'] / 1024 ** 2:,.1f} MB)")
+    if cache_stats['failures']:
+        st.sidebar.warning(f"{cache_stats['failures']} report(s) could not be cached and will be parsed again "
+                           f"on every load. Last error: {cache_stats['last_error']}")
+    result_stats = get_result_cache().stats()
+    st.sidebar.caption(f"Result cache: {result_stats['hits']} hits / {result_stats['misses']} misses, "
+                       f"{result_stats['entries']} results ({result_stats['bytes'] / 1024 ** 2:,.1f} MB)")
+    chart_stats = get_chart_renderer().stats()
+    st.sidebar.caption(f"Chart images: {chart_stats['hits']} hits / {chart_stats['misses']} renders, "
+                       f"{chart_stats['entries']} cached ({chart_stats['bytes'] / 1024 ** 2:,.1f} MB)")
+
+    with db.reader() as conn:
+        loaded = fetch_ingested_files(conn, data_hash)
+    with st.sidebar.expander(f"Loaded reports ({len(loaded)})"):
+        st.caption("  \n".join(f"{name}: {rows:,} rows" for _, name, rows, *_ in loaded))
+        st.caption(f"{len(all_incidents_df):,} incidents after removing the ones a later report replaced.")
+        if skipped_files:
+            st.caption(f"Skipped as already loaded: {', '.join(skipped_files)}")
+
+    with stage("get_all_validations"):
+        validations = get_all_validations()
+    # Derived results are keyed by this version and shared through the result cache
+    with db.reader() as conn:
+        database_id = get_meta(conn, 'database_id')
+    data_version = (database_id, data_hash, incidents_version, get_validation_cache().version)
+
+    with st.sidebar.expander("Storage metrics"):
+        storage_metrics = db.metrics()
+        st.caption(f"Write queue depth: {storage_metrics['queue_depth']} "
+                   f"(max {storage_metrics['max_queue_depth']})  \n"
+                   f"Group commits: {storage_metrics['batches_committed']:,} "
+                   f"(avg {storage_metrics['avg_batch_size']:.1f} writes, max {storage_metrics['max_batch_size']})  \n"
+                   f"Lock wait: avg {storage_metrics['avg_lock_wait_sec'] * 1000:.1f} ms, "
+                   f"max {storage_metrics['max_lock_wait_sec'] * 1000:.1f} ms  \n"
+                   f"Failed writes: {storage_metrics['jobs_failed']:,}")
 
     pages = {
         "SLA Dashboard": page_dashboard,
         "Incident Validation": page_validator,
+        "Bulk Validation": page_bulk_validator,
         "Reporting": page_reporting,
     }
 
     st.sidebar.title("Navigation")
     selection = st.sidebar.radio("Go to", list(pages.keys()), key="page_selection")
+    chart_bars = st.sidebar.number_input("Bars per chart", min_value=5, max_value=200, value=CHART_TOP_N, step=5,
+                                         key="chart_top_n",
+                                         help="Smaller customers, owners and validators are combined into one "
+                                              f"'{OTHERS_LABEL}' bar.")
 
     page = pages[selection]
 
-    if selection == "Incident Validation":
-        page(all_incidents_df, validations)
-    elif selection == "SLA Dashboard":
-        page(all_incidents_df, validated_tp_df)
-    elif selection == "Reporting":
-        page(summary_df, no_downtime_customers, validations, validated_tp_df)
+    with stage(f"page: {selection}"):
+        if selection == "Incident Validation":
+            with stage("get_work_queue", cached=True):
+                work_queue = get_work_queue(data_hash)
+            with db.reader() as conn:
+                work_queue.refresh(conn)
+            page(all_incidents_df, validations, work_queue)
+        elif selection == "Bulk Validation":
+            if merge_overlaps:
+                with stage("load_outages", cached=True):
+                    outage_ids, outages = load_outages(data_hash, incidents_version, all_incidents_df)
+                page(all_incidents_df, validations, outage_ids, outages)
+            else:
+                page(all_incidents_df, validations)
+        elif selection == "SLA Dashboard":
+            page(SharedRollups(data_hash, data_version), chart_bars)
+        elif selection == "Reporting":
+            # Global SLA metrics (always "All Time"), maintained as validations are submitted
+            with stage("sla_summary", cached=True):
+                summary_df, no_downtime_customers = shared_result(
+                    "sla_summary", data_version, lambda: refreshed(get_sla_aggregates(data_hash)).summary())
+            with stage("validated_tp", cached=True):
+                validated_tp_df = shared_result("validated_tp", data_version, lambda: read_validated_tp(db, data_hash))
+            if merge_overlaps:
+                with stage("merged_downtime", cached=True):
+                    merged = shared_result("merged_downtime", data_version,
+                                           lambda: merged_downtime(validated_tp_df))
+                summary_df = add_merged_downtime(summary_df, merged)
+                data_version += ('merged',)  # The PDF of the merged summary is cached separately
+            page(summary_df, no_downtime_customers, validations, validated_tp_df, data_version, chart_bars)
+
+    if profiling:
+        profiling_panel(profiler.finish(page=selection, incidents=len(all_incidents_df)))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,428 @@
+"""
+Benchmarks and load tests that run without the Streamlit UI.
+
+Usage:
+    python bench.py validators [--validators 30] [--decisions 100] [--mode queued|direct]
+    python bench.py pdf-table [--customers 1000 5000 10000 20000]
+    python bench.py generate --rows 1000000 [--customers 500] [--owners 20] [--out incidents.xlsx]
+    python bench.py pipeline [--rows 1000 10000 100000] [--save-baseline FILE | --baseline FILE]
+"""
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+
+from storage import Database, ValidationCache, init_schema, upsert_validations
+
+
+def _percentile(values, q):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q / 100 * (len(values) - 1))))]
+
+
+# --- Concurrent validator load test ---
+def run_validator_load(validators=30, decisions=100, mode='queued', db_path=None):
+    """
+    Simulates ``validators`` people each submitting ``decisions`` validations at once.
+
+    ``queued`` goes through the shared Database (WAL, reader pool, group-committing writer)
+    and refreshes a ValidationCache between submits like a Streamlit rerun would. ``direct``
+    is the old approach, one connection per validator committing every row itself, kept as
+    a baseline. Returns latency percentiles, throughput and the error count.
+    """
+    cleanup = db_path is None
+    if db_path is None:
+        fd, db_path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+
+    db = Database(db_path) if mode == 'queued' else None
+    if db is None:
+        conn = sqlite3.connect(db_path)
+        init_schema(conn)
+        conn.close()
+    cache = ValidationCache()
+
+    latencies, errors = [], []
+    lock = threading.Lock()
+    start_gate = threading.Barrier(validators)
+
+    def validator(worker):
+        conn = None if db else sqlite3.connect(db_path, timeout=0.5)
+        start_gate.wait()
+        for i in range(decisions):
+            row = (f"M{worker}-{i}", 'TP' if i % 3 else 'FP', f"validator{worker}", datetime.now().isoformat())
+            started = time.perf_counter()
+            try:
+                if db:
+                    db.write(upsert_validations, [row])
+                    with db.reader() as reader:
+                        cache.refresh(reader)
+                else:
+                    with conn:
+                        upsert_validations(conn, [row])
+            except sqlite3.Error as e:
+                with lock:
+                    errors.append(str(e))
+                continue
+            with lock:
+                latencies.append(time.perf_counter() - started)
+        if conn is not None:
+            conn.close()
+
+    threads = [threading.Thread(target=validator, args=(worker,)) for worker in range(validators)]
+    wall_start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - wall_start
+
+    result = {
+        'mode': mode,
+        'validators': validators,
+        'submits': len(latencies),
+        'errors': len(errors),
+        'wall_sec': wall,
+        'submits_per_sec': len(latencies) / wall if wall else 0.0,
+        'p50_ms': _percentile(latencies, 50) * 1000,
+        'p95_ms': _percentile(latencies, 95) * 1000,
+        'max_ms': max(latencies, default=0.0) * 1000,
+        'mean_ms': statistics.fmean(latencies) * 1000 if latencies else 0.0,
+    }
+    if db:
+        result['storage'] = db.metrics()
+        db.close()
+    if cleanup:
+        for suffix in ("", "-wal", "-shm"):
+            try:
+                os.remove(db_path + suffix)
+            except OSError:
+                pass
+    return result
+
+
+def _print_validator_load(result):
+    print(f"{result['mode']}: {result['validators']} validators, {result['submits']:,} submits, "
+          f"{result['errors']:,} errors in {result['wall_sec']:.2f}s ({result['submits_per_sec']:,.0f}/s)")
+    print(f"  latency p50 {result['p50_ms']:.1f} ms, p95 {result['p95_ms']:.1f} ms, max {result['max_ms']:.1f} ms")
+    if 'storage' in result:
+        metrics = result['storage']
+        print(f"  group commits {metrics['batches_committed']:,}, avg batch {metrics['avg_batch_size']:.1f}, "
+              f"max queue depth {metrics['max_queue_depth']}, "
+              f"avg lock wait {metrics['avg_lock_wait_sec'] * 1000:.2f} ms")
+
+
+# --- PDF summary table ---
+def run_pdf_table(customers):
+    """Times writing a ``customers``-row downtime summary table into a PDF and serializing it."""
+    import numpy as np
+    import pandas as pd
+    from fpdf import FPDF
+
+    from reports import SUMMARY_COLUMNS, write_pdf_table
+
+    rng = np.random.default_rng(customers)
+    totals = rng.integers(60, 50_000, customers)
+    summary_df = pd.DataFrame({
+        SUMMARY_COLUMNS[0]: [f"Customer {i:06d}" for i in range(customers)],
+        SUMMARY_COLUMNS[1]: totals,
+        SUMMARY_COLUMNS[2]: (totals / rng.integers(1, 20, customers)).round(2),
+        SUMMARY_COLUMNS[3]: rng.integers(10, 60, customers),
+        SUMMARY_COLUMNS[4]: rng.integers(600, 5_000, customers),
+    })
+    col_widths = {'Customer': 70, 'Total Downtime (sec)': 40, 'Avg Downtime (sec)': 40, 'Min Downtime (sec)': 20,
+                  'Max Downtime (sec)': 20}
+
+    started = time.perf_counter()
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_font("helvetica", size=10)
+    write_pdf_table(pdf, summary_df, col_widths, font_family="helvetica")
+    rendered = time.perf_counter()
+    pdf_bytes = pdf.output()
+    finished = time.perf_counter()
+    return {
+        'customers': customers,
+        'pages': pdf.page,
+        'render_sec': rendered - started,
+        'output_sec': finished - rendered,
+        'total_sec': finished - started,
+        'ms_per_1k_rows': (finished - started) / customers * 1_000_000,
+        'bytes': len(pdf_bytes),
+    }
+
+
+# --- Full pipeline ---
+BENCH_DATA_DIR = ".bench_data"  # Generated workbooks are kept here and reused between runs
+PIPELINE_STAGES = ['load_incident_data', 'validations_tp_join', 'compute_sla_metrics', 'sla_aggregates',
+                   'rollup_build', 'dashboard_timeframes', 'generate_pdf_report']
+REGRESSION_TOLERANCE = 0.10
+STAGE_MIN_SEC = 0.5  # Fast stages are repeated until this much time was spent...
+STAGE_MAX_REPEAT = 5  # ...or this many runs
+
+
+def _measure(func, memory=True, max_repeat=STAGE_MAX_REPEAT):
+    """
+    Times ``func`` and, with ``memory``, runs it once more under tracemalloc for its peak.
+
+    Fast stages are repeated (up to ``max_repeat`` times, until ``STAGE_MIN_SEC`` has been
+    spent) and the best time is kept, so millisecond stages don't compare as noise. The
+    traced run is separate so its overhead doesn't inflate the timing. Returns (result of
+    the first run, seconds, peak MiB or None).
+    """
+    result, elapsed, spent = None, None, 0.0
+    for run in range(max_repeat):
+        started = time.perf_counter()
+        value = func()
+        took = time.perf_counter() - started
+        if run == 0:
+            result = value
+        elapsed = took if elapsed is None else min(elapsed, took)
+        spent += took
+        if spent >= STAGE_MIN_SEC:
+            break
+    peak = None
+    if memory:
+        tracemalloc.start()
+        try:
+            func()
+            peak = tracemalloc.get_traced_memory()[1] / 1024 ** 2
+        finally:
+            tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def synthetic_workbook(rows, customers, owners, data_dir=BENCH_DATA_DIR, seed=0):
+    """Returns the path of a generated workbook with these parameters, generating it on first use."""
+    from synthetic import generate_incident_xlsx
+
+    os.makedirs(data_dir, exist_ok=True)
+    path = os.path.join(data_dir, f"incidents_{rows}_{customers}c_{owners}o_s{seed}.xlsx")
+    if not os.path.exists(path):
+        tmp_path = path + ".tmp"
+        generate_incident_xlsx(tmp_path, rows, customers=customers, owners=owners, seed=seed)
+        os.replace(tmp_path, path)
+    return path
+
+
+def run_pipeline(rows, customers=200, owners=10, validated_share=0.6, tp_share=0.7, memory=True, pdf=True,
+                 data_dir=BENCH_DATA_DIR):
+    """
+    Times each stage of the app's data path on a synthetic report of ``rows`` incidents.
+
+    The stages are the report parse (no ingest cache), the validations fetch with the TP
+    join, ``compute_sla_metrics``, the incremental SLA aggregates, building the dashboard
+    rollups, answering the dashboard's timeframes from them, and ``generate_pdf_report``.
+    ``validated_share`` of the incidents get a validation, ``tp_share`` of those TP.
+    Returns {stage: {'sec': seconds, 'peak_mb': MiB or None}}.
+    """
+    import numpy as np
+    import pandas as pd
+
+    from aggregates import RollupStore, SlaAggregateStore
+    from charts import ChartRenderer
+    from ingest import load_incident_files
+    from reports import compute_sla_metrics, generate_pdf_report
+    from storage import fetch_validated_tp, sync_incidents
+
+    path = synthetic_workbook(rows, customers, owners, data_dir)
+    with open(path, 'rb') as f:
+        files = [(os.path.basename(path), f.read())]
+    results = {}
+
+    def record(stage, func):
+        result, elapsed, peak = _measure(func, memory)
+        results[stage] = {'sec': elapsed, 'peak_mb': peak}
+        return result
+
+    df, ingested, _ = record('load_incident_data', lambda: load_incident_files(files, cache=None))
+
+    fd, db_path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    db = Database(db_path)
+    try:
+        dataset = ingested[0][0]
+        sync_incidents(db, df, dataset, ingested)
+        rng = np.random.default_rng(rows)
+        monitor_ids = df['Monitor ID'].to_numpy()
+        chosen = monitor_ids[rng.random(len(monitor_ids)) < validated_share]
+        decisions = np.where(rng.random(len(chosen)) < tp_share, 'TP', 'FP')
+        stamp = datetime.now().isoformat()
+        db.write(upsert_validations, [(monitor_id, str(decision), f"validator{i % 5}", stamp)
+                                      for i, (monitor_id, decision) in enumerate(zip(chosen, decisions))])
+
+        def validations_tp_join():
+            with db.reader() as conn:
+                return ValidationCache().refresh(conn), fetch_validated_tp(conn, dataset)
+
+        validations, tp_df = record('validations_tp_join', validations_tp_join)
+        summary_df, no_downtime_customers = record('compute_sla_metrics', lambda: compute_sla_metrics(tp_df, df))
+
+        def sla_aggregates():
+            with db.reader() as conn:
+                return SlaAggregateStore.from_db(conn, dataset).summary()
+
+        record('sla_aggregates', sla_aggregates)
+
+        def rollup_build():
+            with db.reader() as conn:
+                return RollupStore.from_db(conn, dataset)
+
+        rollups = record('rollup_build', rollup_build)
+        end = df['Datetime IST'].max().floor('D') + pd.Timedelta(days=1)
+
+        def dashboard_timeframes():
+            # "All Time", "Last 7/30/90 Days" and the trend panel, as the dashboard asks for them
+            for days in (None, 7, 30, 90):
+                start = end - pd.Timedelta(days=days) if days else None
+                rollups.summary(start, end if days else None)
+                rollups.trend(start, end if days else None)
+
+        record('dashboard_timeframes', dashboard_timeframes)
+
+        if pdf:
+            # A fresh renderer per run, so the timing includes rendering rather than cache hits
+            record('generate_pdf_report', lambda: generate_pdf_report(
+                summary_df, no_downtime_customers, validations, tp_df, renderer=ChartRenderer()))
+    finally:
+        db.close()
+        for suffix in ("", "-wal", "-shm"):
+            try:
+                os.remove(db_path + suffix)
+            except OSError:
+                pass
+    return results
+
+
+def _environment():
+    import numpy
+    import pandas
+
+    return {'python': platform.python_version(), 'platform': platform.platform(), 'cpus': os.cpu_count(),
+            'pandas': pandas.__version__, 'numpy': numpy.__version__,
+            'recorded_at': datetime.now().isoformat(timespec='seconds')}
+
+
+def compare_to_baseline(results, baseline, tolerance=REGRESSION_TOLERANCE):
+    """
+    Returns (table, regressions) comparing ``results`` with a stored baseline.
+
+    Both map row counts to {stage: {'sec', 'peak_mb'}}. Each table row is (rows, stage, sec,
+    baseline sec, change, verdict); a stage more than ``tolerance`` slower is a regression.
+    """
+    table, regressions = [], []
+    for size, stages in results.items():
+        for stage, current in stages.items():
+            before = baseline.get(str(size), {}).get(stage)
+            if before is None or not before['sec']:
+                table.append((size, stage, current['sec'], None, None, "new"))
+                continue
+            change = current['sec'] / before['sec'] - 1
+            verdict = "slower" if change > tolerance else "faster" if change < -tolerance else "same"
+            if verdict == "slower":
+                regressions.append((size, stage, change))
+            table.append((size, stage, current['sec'], before['sec'], change, verdict))
+    return table, regressions
+
+
+def _print_pipeline(size, results):
+    print(f"{size:,} rows")
+    for stage in PIPELINE_STAGES:
+        if stage in results:
+            peak = results[stage]['peak_mb']
+            peak_text = f"{peak:>9,.1f} MiB peak" if peak is not None else ""
+            print(f"  {stage:<22} {results[stage]['sec']:>9.3f} s {peak_text}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    load = commands.add_parser('validators', help="Concurrent validator load test against SQLite")
+    load.add_argument('--validators', type=int, nargs='+', default=[20, 30, 50])
+    load.add_argument('--decisions', type=int, default=100, help="Submits per validator")
+    load.add_argument('--mode', choices=['queued', 'direct', 'both'], default='both')
+    load.add_argument('--db', help="Database file to use (default: a temporary file)")
+
+    table = commands.add_parser('pdf-table', help="PDF summary table render time by customer count")
+    table.add_argument('--customers', type=int, nargs='+', default=[1_000, 2_500, 5_000, 10_000, 20_000])
+
+    generate = commands.add_parser('generate', help="Write a synthetic incident report (.xlsx)")
+    generate.add_argument('--rows', type=int, required=True)
+    generate.add_argument('--customers', type=int, default=200, help="Distinct customer names")
+    generate.add_argument('--owners', type=int, default=10, help="Distinct owners")
+    generate.add_argument('--days', type=int, default=90, help="Days the incidents are spread over")
+    generate.add_argument('--seed', type=int, default=0)
+    generate.add_argument('--out', help="Output path (default: incidents_<rows>.xlsx)")
+
+    pipeline = commands.add_parser('pipeline', help="Time and peak memory per stage of the full data path")
+    pipeline.add_argument('--rows', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+    pipeline.add_argument('--customers', type=int, default=200)
+    pipeline.add_argument('--owners', type=int, default=10)
+    pipeline.add_argument('--no-memory', action='store_true', help="Skip the tracemalloc run of each stage")
+    pipeline.add_argument('--no-pdf', action='store_true', help="Skip generate_pdf_report")
+    pipeline.add_argument('--save-baseline', metavar='FILE', help="Store the results as the new baseline")
+    pipeline.add_argument('--baseline', metavar='FILE', help="Compare the results with a stored baseline")
+    pipeline.add_argument('--tolerance', type=float, default=REGRESSION_TOLERANCE,
+                          help="Slowdown counted as a regression (0.10 = 10%%)")
+    pipeline.add_argument('--fail-on-regression', action='store_true', help="Exit with status 1 on a regression")
+
+    args = parser.parse_args(argv)
+    if args.command == 'validators':
+        modes = ['queued', 'direct'] if args.mode == 'both' else [args.mode]
+        for validators in args.validators:
+            for mode in modes:
+                _print_validator_load(run_validator_load(validators, args.decisions, mode, args.db))
+    elif args.command == 'pdf-table':
+        # Linear scaling shows up as a flat "ms per 1k rows" column.
+        print(f"{'customers':>10} {'pages':>6} {'render s':>9} {'output s':>9} {'ms/1k rows':>11} {'size KB':>8}")
+        for customers in args.customers:
+            result = run_pdf_table(customers)
+            print(f"{result['customers']:>10,} {result['pages']:>6,} {result['render_sec']:>9.2f} "
+                  f"{result['output_sec']:>9.2f} {result['ms_per_1k_rows']:>11.1f} {result['bytes'] / 1024:>8,.0f}")
+    elif args.command == 'generate':
+        from synthetic import generate_incident_xlsx
+
+        out = args.out or f"incidents_{args.rows}.xlsx"
+        started = time.perf_counter()
+        generate_incident_xlsx(out, args.rows, customers=args.customers, owners=args.owners, days=args.days,
+                               seed=args.seed)
+        print(f"Wrote {args.rows:,} incidents to {out} in {time.perf_counter() - started:.1f}s "
+              f"({os.path.getsize(out) / 1024 ** 2:,.1f} MB)")
+    elif args.command == 'pipeline':
+        results = {}
+        for size in args.rows:
+            results[size] = run_pipeline(size, args.customers, args.owners, memory=not args.no_memory,
+                                         pdf=not args.no_pdf)
+            _print_pipeline(size, results[size])
+        if args.baseline:
+            with open(args.baseline, encoding='utf-8') as f:
+                baseline = json.load(f)
+            table, regressions = compare_to_baseline(results, baseline['results'], args.tolerance)
+            print(f"\nCompared with {args.baseline} (recorded {baseline['environment']['recorded_at']})")
+            for size, stage, current, before, change, verdict in table:
+                before_text = f"{before:>9.3f} s" if before is not None else f"{'-':>11}"
+                change_text = f"{change:>+8.1%}" if change is not None else f"{'':>8}"
+                print(f"  {size:>9,} {stage:<22} {current:>9.3f} s {before_text} {change_text}  {verdict}")
+            if regressions and args.fail_on_regression:
+                sys.exit(1)
+        if args.save_baseline:
+            with open(args.save_baseline, 'w', encoding='utf-8') as f:
+                json.dump({'environment': _environment(), 'rows': args.rows, 'customers': args.customers,
+                           'owners': args.owners, 'results': {str(size): stages for size, stages in results.items()}},
+                          f, indent=2)
+            print(f"Baseline saved to {args.save_baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Static chart rendering for reports: in-memory, parallel and cached."""
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+RENDER_WORKERS = 4
+RENDER_CACHE_MAX_BYTES = 64 * 1024 ** 2  # 64 MiB of rendered images
+
+
+class ChartRenderer:
+    """
+    Renders Plotly figures to image bytes without touching the filesystem.
+
+    Output is cached in memory, keyed by a hash of the figure's JSON and the requested
+    size, so an unchanged chart is only rendered once. Independent figures are rendered
+    on a thread pool, and ``warm_up`` starts the kaleido renderer ahead of the first export
+    so no report pays its start-up cost.
+    """
+
+    def __init__(self, workers=RENDER_WORKERS, max_bytes=RENDER_CACHE_MAX_BYTES):
+        self.workers = workers
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+        self._cache_bytes = 0
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="chart-render")
+        self._warm = False
+
+    @staticmethod
+    def cache_key(fig, width, height, fmt):
+        payload = f"{fig.to_json()}|{width}|{height}|{fmt}".encode('utf-8')
+        return hashlib.sha256(payload).hexdigest()
+
+    def warm_up(self):
+        """Starts the renderer process (kaleido) once and keeps it running between exports."""
+        with self._lock:
+            if self._warm:
+                return
+            self._warm = True
+        try:
+            import kaleido
+            # kaleido >= 1.0 launches a browser per call unless a persistent server is running;
+            # one tab per worker lets the pool render figures side by side.
+            start_server = getattr(kaleido, 'start_sync_server', None)
+            if start_server is not None:
+                # Constructing a Kaleido locates Chrome and raises if it is missing; the server
+                # thread would otherwise die in the background and leave renders waiting on it.
+                kaleido.Kaleido(n=1)
+                start_server(n=self.workers, silence_warnings=True)
+        except Exception:
+            # Rendering still works, it just pays the start-up cost on the first export.
+            pass
+
+    def render(self, fig, width, height, fmt='png'):
+        """Returns the figure rendered as image bytes, from the cache when possible."""
+        key = self.cache_key(fig, width, height, fmt)
+        with self._lock:
+            image = self._cache.get(key)
+            if image is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return image
+            self.misses += 1
+
+        self.warm_up()
+        image = fig.to_image(format=fmt, width=width, height=height)
+
+        with self._lock:
+            if key not in self._cache:
+                self._cache[key] = image
+                self._cache_bytes += len(image)
+                while self._cache_bytes > self.max_bytes and len(self._cache) > 1:
+                    _, evicted = self._cache.popitem(last=False)
+                    self._cache_bytes -= len(evicted)
+        return image
+
+    def render_many(self, jobs):
+        """Renders ``(fig, width, height)`` jobs in parallel and returns the images in order."""
+        futures = [self._pool.submit(self.render, fig, width, height) for fig, width, height in jobs]
+        return [future.result() for future in futures]
+
+    def stats(self):
+        """Returns hit/render counters and the size of the image cache."""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._cache),
+                    'bytes': self._cache_bytes}
+
+
+_renderer = None
+_renderer_lock = threading.Lock()
+
+
+def get_chart_renderer():
+    """Returns the process-wide chart renderer."""
+    global _renderer
+    with _renderer_lock:
+        if _renderer is None:
+            _renderer = ChartRenderer()
+        return _renderer
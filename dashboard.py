@@ -0,0 +1,246 @@
+"""
+Headless entry point: builds SLA reports without the Streamlit UI.
+
+Usage:
+    python -m dashboard report --input april.xlsx [may.xlsx | reports/ ...] [--from 2025-04-01] [--to 2025-04-30]
+                               [--format pdf,csv] [--db incidents.db] [--output-dir .] [--per-customer]
+                               [--top-n 20] [--merge-overlaps]
+    python -m dashboard serve [--db incidents.db] [--host 127.0.0.1] [--port 8600]
+
+Decisions come from the validations stored by the app in ``--db``; only incidents
+validated as True Positives count as downtime. Dates are IST and ``--to`` is inclusive.
+``serve`` answers the same SLA numbers as JSON over HTTP (see api.py).
+Heavy libraries are imported only once a command runs, so the CLI starts quickly and
+never imports Streamlit.
+"""
+import argparse
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+DB_FILE_PATH = "incidents.db"
+REPORT_FORMATS = ('pdf', 'csv')
+
+
+def _read_inputs(paths):
+    """Returns (name, bytes) for the given files, expanding folders to the .xlsx files in them."""
+    from ingest import read_incident_folder
+
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files += read_incident_folder(path)
+        else:
+            with open(path, 'rb') as f:
+                files.append((os.path.basename(path), f.read()))
+    return files
+
+
+def load_validations(db_path):
+    """Returns {monitor_id: {'decision', 'reviewer'}} from the app's database, read-only."""
+    import sqlite3
+
+    from storage import fetch_validation_changes
+
+    if not os.path.exists(db_path):
+        return {}
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        return {str(monitor_id).strip(): {'decision': decision, 'reviewer': reviewer}
+                for monitor_id, decision, reviewer, _ in fetch_validation_changes(conn)}
+    except sqlite3.OperationalError:
+        return {}  # Created by an older version, or not an app database
+    finally:
+        conn.close()
+
+
+def _parse_day(value, option):
+    """Returns ``value`` as a day, None if not given; exits with a usage message if it isn't a date."""
+    import pandas as pd
+
+    if not value:
+        return None
+    try:
+        return pd.Timestamp(value).normalize()
+    except ValueError:
+        raise SystemExit(f"{option} must be a date (YYYY-MM-DD), got {value!r}") from None
+
+
+def _period_label(start, last_day):
+    if start is None and last_day is None:
+        return "All Time"
+    first = start.strftime('%Y-%m-%d') if start is not None else "start"
+    last = last_day.strftime('%Y-%m-%d') if last_day is not None else "latest"
+    return f"{first} to {last} (IST)"
+
+
+def _file_stem(text):
+    return re.sub(r'[^A-Za-z0-9._-]+', '_', str(text)).strip('_') or 'customer'
+
+
+def build_report_data(incidents_df, validations, start=None, end=None, customer=None, merge_overlaps=False):
+    """
+    Returns (summary_df, no_downtime_customers, validations, validated_tp_df) for a period.
+
+    Mirrors the Reporting page: customers are everyone in the input, downtime is the TP
+    incidents in [start, end). ``validations`` is narrowed to incidents in the period, and
+    ``customer`` restricts everything to one customer. ``merge_overlaps`` adds the merged
+    downtime column.
+    """
+    from reports import compute_sla_metrics
+
+    in_period = incidents_df
+    if customer is not None:
+        incidents_df = incidents_df[incidents_df['Name'] == customer]
+        in_period = incidents_df
+    if start is not None:
+        in_period = in_period[in_period['Datetime IST'] >= start]
+    if end is not None:
+        in_period = in_period[in_period['Datetime IST'] < end]
+    period_ids = set(in_period['Monitor ID'])
+    period_validations = {monitor_id: validation for monitor_id, validation in validations.items()
+                          if monitor_id in period_ids}
+    tp_ids = {monitor_id for monitor_id, validation in period_validations.items() if validation['decision'] == 'TP'}
+    validated_tp_df = in_period[in_period['Monitor ID'].isin(tp_ids)]
+    summary_df, no_downtime_customers = compute_sla_metrics(validated_tp_df, incidents_df, merge_overlaps)
+    return summary_df, no_downtime_customers, period_validations, validated_tp_df
+
+
+def write_report(report_data, formats, output_dir, stem, title, subtitle, top=None):
+    """Writes the report in each format; returns the paths written. ``top=0`` puts every bar in the PDF charts."""
+    from reports import CHART_TOP_N, generate_pdf_report
+
+    summary_df, no_downtime_customers, validations, validated_tp_df = report_data
+    paths = []
+    if 'csv' in formats:
+        path = os.path.join(output_dir, f"{stem}.csv")
+        summary_df.to_csv(path, index=False)
+        paths.append(path)
+    if 'pdf' in formats:
+        path = os.path.join(output_dir, f"{stem}.pdf")
+        generate_pdf_report(summary_df, no_downtime_customers, validations, validated_tp_df, output=path,
+                            title=title, subtitle=subtitle, top=CHART_TOP_N if top is None else top or None)
+        paths.append(path)
+    return paths
+
+
+def _customer_report(customer, incidents_df, validations, start, end, formats, output_dir, suffix, subtitle,
+                     top=None, merge_overlaps=False):
+    """Process pool entry point: one customer's report."""
+    report_data = build_report_data(incidents_df, validations, start, end, customer=customer,
+                                    merge_overlaps=merge_overlaps)
+    return write_report(report_data, formats, output_dir, f"sla_report_{_file_stem(customer)}_{suffix}",
+                        f"SLA Incident Report: {customer}", subtitle, top)
+
+
+def run_report(args):
+    import pandas as pd
+
+    from ingest import INGEST_CACHE_DIR, IncidentFileError, IngestCache, load_incident_files
+
+    formats = {fmt.strip().lower() for fmt in args.format.split(',') if fmt.strip()}
+    unknown = formats - set(REPORT_FORMATS)
+    if unknown or not formats:
+        raise SystemExit(f"Unknown report format: {', '.join(sorted(unknown)) or args.format!r} "
+                         f"(choose from {', '.join(REPORT_FORMATS)})")
+    start = _parse_day(args.date_from, '--from')
+    last_day = _parse_day(args.date_to, '--to')
+    if start is not None and last_day is not None and last_day < start:
+        raise SystemExit("--to must not be before --from")
+    end = last_day + pd.Timedelta(days=1) if last_day is not None else None
+
+    files = _read_inputs(args.input)
+    if not files:
+        raise SystemExit("No .xlsx incident reports found in the given inputs.")
+    cache = None if args.no_cache else IngestCache(INGEST_CACHE_DIR)
+    try:
+        incidents_df, ingested, skipped = load_incident_files(files, cache=cache)
+    except IncidentFileError as e:
+        raise SystemExit(str(e))
+    if cache is not None and cache.failures:
+        print(f"Warning: {cache.failures} file(s) could not be cached ({cache.last_error})", file=sys.stderr)
+    print(f"Loaded {len(incidents_df):,} incidents from {len(ingested)} file(s)"
+          + (f", skipped duplicates: {', '.join(skipped)}" if skipped else ""), file=sys.stderr)
+
+    validations = load_validations(args.db)
+    os.makedirs(args.output_dir, exist_ok=True)
+    subtitle = _period_label(start, last_day)
+    suffix = "_".join(day.strftime('%Y%m%d') for day in (start, last_day) if day is not None) or "all_time"
+
+    if not args.per_customer:
+        report_data = build_report_data(incidents_df, validations, start, end, merge_overlaps=args.merge_overlaps)
+        paths = write_report(report_data, formats, args.output_dir, f"sla_report_{suffix}",
+                             "SLA Incident Report", subtitle, args.top_n)
+    else:
+        named = incidents_df[incidents_df['Name'].notna()]
+        named = named.assign(Name=named['Name'].astype(str))
+        paths = []
+        # Each customer's PDF is built in its own process; only that customer's rows and
+        # validations are sent to it.
+        with ProcessPoolExecutor(max_workers=args.workers, mp_context=get_context('spawn')) as pool:
+            futures = []
+            for customer, customer_df in named.groupby('Name'):
+                customer_validations = {monitor_id: validations[monitor_id] for monitor_id in customer_df['Monitor ID']
+                                        if monitor_id in validations}
+                futures.append(pool.submit(_customer_report, customer, customer_df, customer_validations, start, end,
+                                           formats, args.output_dir, suffix, subtitle, args.top_n,
+                                           args.merge_overlaps))
+            for future in futures:
+                paths += future.result()
+    for path in paths:
+        print(path)
+
+
+def run_serve(args):
+    from api import MetricsServer
+
+    if not os.path.exists(args.db):
+        raise SystemExit(f"No database at {args.db}; start the app and load incident reports first.")
+    server = MetricsServer(args.db, args.host, args.port, quiet=args.quiet)
+    print(f"Serving SLA metrics from {args.db} on http://{args.host}:{server.server_address[1]}/", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m dashboard", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    report = commands.add_parser('report', help="Write SLA reports (PDF and/or CSV) for a period")
+    report.add_argument('--input', nargs='+', required=True, help="Incident report .xlsx files or folders")
+    report.add_argument('--from', dest='date_from', help="First day to include (YYYY-MM-DD, IST)")
+    report.add_argument('--to', dest='date_to', help="Last day to include (YYYY-MM-DD, IST)")
+    report.add_argument('--format', default=",".join(REPORT_FORMATS), help="Comma-separated: pdf, csv")
+    report.add_argument('--db', default=DB_FILE_PATH, help="App database holding the validations")
+    report.add_argument('--output-dir', default=".", help="Where to write the reports")
+    report.add_argument('--per-customer', action='store_true', help="Write one report per customer")
+    report.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="Processes for --per-customer reports")
+    report.add_argument('--top-n', type=int,
+                        help="Bars per chart in the PDF, the rest shown as 'Others' (default 20, 0 for no limit)")
+    report.add_argument('--merge-overlaps', action='store_true',
+                        help="Also report downtime with each customer's overlapping incidents counted once")
+    report.add_argument('--no-cache', action='store_true', help="Don't use the on-disk ingest cache")
+
+    serve = commands.add_parser('serve', help="Serve the SLA summary and counts as a JSON API")
+    serve.add_argument('--db', default=DB_FILE_PATH, help="App database to serve")
+    serve.add_argument('--host', default="127.0.0.1", help="Interface to listen on")
+    serve.add_argument('--port', type=int, default=8600, help="Port to listen on (0 picks a free one)")
+    serve.add_argument('--quiet', action='store_true', help="Don't log each request")
+
+    args = parser.parse_args(argv)
+    if args.command == 'report':
+        run_report(args)
+    elif args.command == 'serve':
+        run_serve(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,519 @@
+"""Incident report ingestion: Excel parsing and the on-disk ingest cache."""
+import hashlib
+import io
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+from pandas.io.parsers import TextParser
+
+try:
+    import pyarrow.feather as feather
+except ImportError:  # The ingest cache is optional; parsing works without it.
+    feather = None
+
+# --- Configuration ---
+RAW_DATA_SHEET_NAME = 'Incidents - Raw Data '  # Note the trailing space as in the original script
+REQUIRED_COLUMNS = ['Name', 'Duration', 'Datetime IST', 'Monitor ID', 'Owner']
+BLANK_MONITOR_IDS = ('', 'nan')  # A blank cell, as normalized to text
+INCIDENT_TZ = 'Asia/Kolkata'  # 'Datetime IST' holds naive wall-clock times in this zone
+STREAMING_INGEST_MIN_BYTES = 20 * 1024 ** 2  # Uploads above 20 MiB use the streaming reader
+STREAMING_CHUNK_ROWS = 50_000
+INGEST_CACHE_DIR = ".ingest_cache"
+INGEST_CACHE_MAX_BYTES = 2 * 1024 ** 3  # 2 GiB
+INGEST_WORKERS = min(8, os.cpu_count() or 1)
+OUTAGE_COLUMNS = ['Outage ID', 'Name', 'Start', 'End', 'Incidents', 'Raw Downtime (sec)', 'Merged Downtime (sec)']
+
+
+class IncidentFileError(ValueError):
+    """Raised when an incident report does not have the expected layout."""
+
+
+def content_digest(data):
+    """Returns the SHA-256 hex digest of an uploaded file's bytes."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def dataset_digest(fingerprints):
+    """Identifies a set of reports by their ordered fingerprints; a single report keeps its own digest."""
+    if len(fingerprints) == 1:
+        return fingerprints[0]
+    return content_digest("\n".join(fingerprints).encode('ascii'))
+
+
+def read_incident_folder(folder):
+    """Returns (file name, bytes) for every .xlsx report in ``folder``, in name order."""
+    files = []
+    for name in sorted(os.listdir(folder)):
+        # '~$' files are the lock files Excel leaves next to open workbooks
+        if name.lower().endswith('.xlsx') and not name.startswith('~$'):
+            with open(os.path.join(folder, name), 'rb') as f:
+                files.append((name, f.read()))
+    return files
+
+
+# --- Parsing ---
+def _parse_datetimes(values):
+    """Parses 'Datetime IST' cells, handling different formats."""
+    return pd.to_datetime(values, format='mixed', dayfirst=True)
+
+
+def _as_text(values):
+    """
+    Cell values as stripped strings, the way the original script stored Monitor ID and Owner:
+    a blank cell becomes 'nan' and a number column with blanks reads as floats ('123.0').
+    Categoricals stay categorical.
+    """
+    text = values.astype(str).str.strip()
+    return text.astype('category') if isinstance(values.dtype, pd.CategoricalDtype) else text
+
+
+def normalize_incidents(df):
+    """
+    Normalizes the raw incident columns in place and checks the required columns exist.
+
+    Both readers finish here, so a report gets the same Monitor IDs whichever one parsed it.
+    """
+    # Standardize datetime column, handling different formats
+    if 'Datetime IST' in df.columns:
+        df['Datetime IST'] = _parse_datetimes(df['Datetime IST'])
+
+    # Ensure Monitor ID is a string and stripped of whitespace for consistency
+    if 'Monitor ID' in df.columns:
+        df['Monitor ID'] = _as_text(df['Monitor ID'])
+
+    # Ensure Owner is a string and stripped of whitespace
+    if 'Owner' in df.columns:
+        df['Owner'] = _as_text(df['Owner'])
+
+    missing = [col for col in REQUIRED_COLUMNS if col not in df.columns]
+    if missing:
+        raise IncidentFileError(f"Excel file must contain the following columns: {', '.join(REQUIRED_COLUMNS)}")
+    return df
+
+
+def parse_incident_excel(source):
+    """Reads the raw data sheet from a path or file-like object and normalizes it."""
+    try:
+        df = pd.read_excel(source, sheet_name=RAW_DATA_SHEET_NAME)
+    except ValueError as e:
+        # pandas reports a missing sheet as a plain ValueError naming it
+        if RAW_DATA_SHEET_NAME not in str(e):
+            raise
+        raise IncidentFileError(f"Excel file must contain a sheet named '{RAW_DATA_SHEET_NAME}'") from e
+    return normalize_incidents(df)
+
+
+def _categorical(values):
+    """Builds a categorical with object-dtype categories so chunks can always be unioned."""
+    values = pd.Series(values, dtype=object)
+    return pd.Categorical(values, categories=pd.Index(values.dropna().unique(), dtype=object))
+
+
+def _cell_value(value, error_codes):
+    """Converts a read-only openpyxl cell value the way ``read_excel`` does before parsing the sheet."""
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str) and value in error_codes:
+        return np.nan
+    return value
+
+
+def _compact_chunk(rows):
+    """
+    Parses a chunk of projected rows with ``read_excel``'s own type inference (blank and 'NA'
+    cells are missing, number columns numeric) into compact columns. Monitor ID is left as
+    parsed, since whether it reads as int or float depends on the whole column.
+    """
+    df = TextParser(rows, names=REQUIRED_COLUMNS, header=None, skip_blank_lines=False).read()
+    return {
+        'Name': _categorical(df['Name']),
+        'Duration': pd.to_numeric(df['Duration'], errors='coerce').to_numpy(),
+        'Datetime IST': _parse_datetimes(df['Datetime IST']).to_numpy(),
+        'Monitor ID': df['Monitor ID'].to_numpy(),
+        'Owner': _categorical(_as_text(df['Owner'])),
+    }
+
+
+def _join_parsed(parts):
+    """
+    Joins a column parsed chunk by chunk into what parsing it whole gives. Number chunks widen
+    to float64 if any chunk had blanks; once a chunk holds text, every cell keeps its own
+    value, so the whole numbers of a float chunk turn back into the ints they were read as.
+    """
+    if all(part.dtype.kind in 'iuf' for part in parts):
+        return np.concatenate(parts)
+    joined = []
+    for part in parts:
+        values = part.astype(object)
+        if part.dtype.kind == 'f':
+            whole = ~np.isnan(part) & (part == np.round(part))
+            values[whole] = part[whole].astype('int64')
+        joined.append(values)
+    return np.concatenate(joined)
+
+
+def _narrow_duration(values):
+    """Downcasts whole-second durations to the smallest integer dtype that holds them."""
+    durations = pd.Series(values)
+    if durations.isna().any() or not (durations == durations.round()).all():
+        return durations.astype('float64')
+    return pd.to_numeric(durations.astype('int64'), downcast='integer')
+
+
+def read_incidents_streaming(source, chunk_rows=STREAMING_CHUNK_ROWS):
+    """
+    Reads only the required columns of the raw data sheet in fixed-size chunks.
+
+    The workbook is opened in openpyxl's read-only mode and the header row is validated
+    before any data row is touched, so a malformed file fails immediately. Name and Owner
+    come back as categoricals, Duration as the narrowest integer dtype that fits and the
+    timestamp as datetime64, which keeps peak memory far below a full ``read_excel``.
+    """
+    from openpyxl import load_workbook
+    from openpyxl.cell.cell import ERROR_CODES
+
+    workbook = load_workbook(source, read_only=True, data_only=True)
+    try:
+        if RAW_DATA_SHEET_NAME not in workbook.sheetnames:
+            raise IncidentFileError(f"Excel file must contain a sheet named '{RAW_DATA_SHEET_NAME}'")
+        rows = workbook[RAW_DATA_SHEET_NAME].iter_rows(values_only=True)
+
+        header = next(rows, None) or ()
+        positions = {}
+        for position, column in enumerate(header):
+            if column in REQUIRED_COLUMNS and column not in positions:
+                positions[column] = position
+        if len(positions) < len(REQUIRED_COLUMNS):
+            raise IncidentFileError(f"Excel file must contain the following columns: {', '.join(REQUIRED_COLUMNS)}")
+        projection = [positions[column] for column in REQUIRED_COLUMNS]
+
+        chunks, buffer, blank = [], [], []
+        for row in rows:
+            values = [_cell_value(row[i] if i < len(row) else None, ERROR_CODES) for i in projection]
+            if all(value is None for value in row):
+                # Empty rows are kept unless only empty rows follow, as read_excel does
+                blank.append(values)
+                continue
+            buffer.extend(blank)
+            blank = []
+            buffer.append(values)
+            if len(buffer) >= chunk_rows:
+                chunks.append(_compact_chunk(buffer))
+                buffer = []
+        if buffer:
+            chunks.append(_compact_chunk(buffer))
+    finally:
+        workbook.close()
+
+    if not chunks:
+        return pd.DataFrame({
+            'Name': _categorical([]),
+            'Duration': pd.Series([], dtype='int64'),
+            'Datetime IST': pd.Series([], dtype='datetime64[ns]'),
+            'Monitor ID': pd.Series([], dtype=object),
+            'Owner': _categorical([]),
+        })
+
+    return normalize_incidents(pd.DataFrame({
+        'Name': union_categoricals([chunk['Name'] for chunk in chunks]),
+        'Duration': _narrow_duration(np.concatenate([chunk['Duration'] for chunk in chunks])),
+        'Datetime IST': np.concatenate([chunk['Datetime IST'] for chunk in chunks]),
+        'Monitor ID': _join_parsed([chunk['Monitor ID'] for chunk in chunks]),
+        'Owner': union_categoricals([chunk['Owner'] for chunk in chunks]),
+    }))
+
+
+def _required_columns(df):
+    """
+    Projects a parsed report to ``REQUIRED_COLUMNS``, the only ones ever read, and turns
+    mixed-type text columns into strings so the frame can be stored as Arrow.
+    """
+    df = df[REQUIRED_COLUMNS].reset_index(drop=True)
+    for column in df.columns:
+        values = df[column]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            if pd.api.types.infer_dtype(values.cat.categories, skipna=True).startswith('mixed'):
+                values = values.astype(object)
+                df[column] = values.where(values.isna(), values.astype(str)).astype('category')
+        elif values.dtype == object and pd.api.types.infer_dtype(values, skipna=True).startswith('mixed'):
+            df[column] = values.where(values.isna(), values.astype(str))
+    return df
+
+
+def _parse_report(data, streaming):
+    """
+    Process pool entry point: parses one report's bytes. The frame is the same whether it
+    is parsed here or read back from the ingest cache.
+    """
+    df = read_incidents_streaming(io.BytesIO(data)) if streaming else parse_incident_excel(io.BytesIO(data))
+    return _required_columns(df)
+
+
+def merge_incidents(frames):
+    """
+    Concatenates report frames; a row is dropped only when a later report has the same Monitor ID.
+
+    Every row of a single report is kept, repeated IDs included, and rows without a Monitor ID
+    (read as 'nan') are never matched across reports.
+    """
+    if len(frames) == 1:
+        return frames[0]
+    kept, later = [], set()
+    for df in reversed(frames):
+        ids = df['Monitor ID']
+        kept.append(df[~ids.isin(later)])
+        later.update(ids[~ids.isin(BLANK_MONITOR_IDS)])
+    return pd.concat(kept[::-1], ignore_index=True)
+
+
+def load_incident_files(files, cache=None, streaming=None, workers=INGEST_WORKERS):
+    """
+    Loads several reports into one incident frame; returns (df, ingested, skipped).
+
+    ``files`` is a list of (name, bytes). Each file is fingerprinted by content hash and a
+    file whose fingerprint was already seen in the list is skipped, as is the parse of any
+    file found in ``cache``. The remaining files are parsed side by side on a process pool,
+    so a batch takes about as long as its slowest file. A row is replaced by a later
+    file's row with the same Monitor ID (see ``merge_incidents``). ``ingested`` lists
+    (fingerprint, name, rows) for the files used and ``skipped`` the names of duplicates.
+    A file with the wrong layout raises ``IncidentFileError`` naming it.
+    """
+    unique, skipped, seen = [], [], set()
+    for name, data in files:
+        fingerprint = content_digest(data)
+        if fingerprint in seen:
+            skipped.append(name)
+            continue
+        seen.add(fingerprint)
+        use_streaming = len(data) >= STREAMING_INGEST_MIN_BYTES if streaming is None else streaming
+        unique.append((name, data, fingerprint, use_streaming))
+
+    frames = {}
+    pending = []
+    for name, data, fingerprint, use_streaming in unique:
+        key = fingerprint + ("-streaming" if use_streaming else "")
+        df = cache.get(key) if cache is not None else None
+        if df is None:
+            pending.append((name, data, fingerprint, use_streaming))
+        else:
+            frames[fingerprint] = df
+
+    def parsed(name, result):
+        try:
+            return result()
+        except IncidentFileError as e:
+            raise IncidentFileError(f"{name}: {e}") from e
+
+    if len(pending) > 1 and workers > 1:
+        # 'spawn' keeps the workers clear of the locks held by the app's own threads.
+        with ProcessPoolExecutor(max_workers=min(workers, len(pending)), mp_context=get_context('spawn')) as pool:
+            futures = [pool.submit(_parse_report, data, use_streaming) for _, data, _, use_streaming in pending]
+            for (name, _, fingerprint, _), future in zip(pending, futures):
+                frames[fingerprint] = parsed(name, future.result)
+    else:
+        for name, data, fingerprint, use_streaming in pending:
+            frames[fingerprint] = parsed(name, lambda: _parse_report(data, use_streaming))
+    if cache is not None:
+        for _, _, fingerprint, use_streaming in pending:
+            cache.put(fingerprint + ("-streaming" if use_streaming else ""), frames[fingerprint])
+
+    if not unique:
+        return pd.DataFrame(columns=REQUIRED_COLUMNS), [], skipped
+    ingested = [(fingerprint, name, len(frames[fingerprint])) for name, _, fingerprint, _ in unique]
+    return merge_incidents([frames[fingerprint] for _, _, fingerprint, _ in unique]), ingested, skipped
+
+
+# --- Overlap Coalescing ---
+def coalesce_intervals(keys, starts, ends):
+    """
+    Merges overlapping [start, end) intervals that share a key with a NumPy sort-and-sweep.
+
+    ``keys`` are non-negative integer codes, ``starts``/``ends`` int64 seconds. Returns the
+    group number of each interval; groups are numbered in (key, start) order, and intervals
+    that only touch end to start stay apart.
+    """
+    if len(starts) == 0:
+        return np.empty(0, dtype='int64')
+    order = np.lexsort((starts, keys))
+    keys, starts, ends = keys[order], starts[order], ends[order]
+    # Offsetting each key into a range of its own lets a single running maximum track how far
+    # the current key's merged interval reaches, without a per-key loop.
+    origin = starts.min()
+    span = int(max(ends.max(), starts.max()) - origin) + 1
+    offset = keys.astype('int64') * span - origin
+    reach = np.maximum.accumulate(ends + offset)
+    new_group = np.empty(len(starts), dtype=bool)
+    new_group[0] = True
+    new_group[1:] = starts[1:] + offset[1:] >= reach[:-1]
+    groups = np.empty(len(starts), dtype='int64')
+    groups[order] = np.cumsum(new_group) - 1
+    return groups
+
+
+def coalesce_incidents(df):
+    """
+    Merges each customer's incidents whose [Datetime IST, + Duration) windows overlap into outages.
+
+    Returns (outage_ids, outages): the outage number of every row, as a Series aligned with
+    ``df``, and one row per outage (``OUTAGE_COLUMNS``) with its customer, start, end, incident
+    count, summed ('raw') downtime and merged downtime, in which overlapping seconds count
+    once. Incidents without a time or a duration are outages of their own.
+    """
+    codes, _ = pd.factorize(df['Name'])
+    starts = pd.to_datetime(df['Datetime IST']).to_numpy(dtype='datetime64[s]')
+    durations = pd.to_numeric(df['Duration'], errors='coerce').to_numpy(dtype='float64')
+    valid = ~np.isnat(starts) & ~np.isnan(durations)
+
+    start_sec = starts[valid].astype('int64')
+    end_sec = start_sec + np.maximum(durations[valid], 0).astype('int64')
+    ids = np.empty(len(df), dtype='int64')
+    ids[valid] = coalesce_intervals(codes[valid] + 1, start_sec, end_sec)  # Missing names (-1) share key 0
+    merged = int(ids[valid].max()) + 1 if valid.any() else 0
+    ids[~valid] = merged + np.arange(int((~valid).sum()))
+
+    windows = pd.DataFrame({
+        'Outage ID': ids,
+        'Name': df['Name'].to_numpy(dtype=object),
+        'Start': starts,
+        'End': starts + np.where(valid, np.maximum(durations, 0), 0).astype('timedelta64[s]'),
+        'Duration': durations,
+    })
+    outages = windows.groupby('Outage ID', sort=True).agg(
+        Name=('Name', 'first'), Start=('Start', 'min'), End=('End', 'max'), Incidents=('Name', 'size'),
+        Raw=('Duration', 'sum'))
+    span = (outages['End'] - outages['Start']).dt.total_seconds()
+    outages['Merged'] = span.where(outages['Start'].notna(), outages['Raw'])
+    outages = outages.reset_index()
+    outages.columns = OUTAGE_COLUMNS
+    return pd.Series(ids, index=df.index, name='Outage ID'), outages
+
+
+# --- Ingest Cache ---
+class IngestCache:
+    """
+    Size-bounded on-disk cache of normalized incident frames, keyed by file content hash.
+
+    Frames are stored as uncompressed Arrow IPC (Feather v2) files so reloads are
+    memory-mapped instead of re-parsed. Parsed reports only have ``REQUIRED_COLUMNS``, with
+    mixed-type text columns as strings, so Arrow can store every one. Once the
+    directory grows past ``max_bytes`` the least recently used entries (by file
+    modification time) are evicted. Frames that still can't be written are counted in
+    ``failures``, with the reason in ``last_error``, and reported by ``stats``.
+    """
+
+    SUFFIX = ".arrow"
+
+    def __init__(self, cache_dir=INGEST_CACHE_DIR, max_bytes=INGEST_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.failures = 0
+        self.last_error = None
+        self._lock = threading.Lock()
+        if self.enabled:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    @property
+    def enabled(self):
+        """The cache needs pyarrow; without it every lookup is a miss and nothing is stored."""
+        return feather is not None
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + self.SUFFIX)
+
+    def get(self, key):
+        """Returns the cached frame for ``key``, or None on a miss."""
+        path = self._path(key)
+        if not self.enabled or not os.path.exists(path):
+            with self._lock:
+                self.misses += 1
+            return None
+        try:
+            table = feather.read_table(path, memory_map=True)
+            df = table.to_pandas()
+        except Exception:
+            # A truncated or unreadable entry is treated as a miss and dropped.
+            self._remove(path)
+            with self._lock:
+                self.misses += 1
+            return None
+        # Touch the entry so eviction treats it as recently used.
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+        return df
+
+    def put(self, key, df):
+        """Stores ``df`` under ``key``. Returns False if the frame could not be cached."""
+        if not self.enabled:
+            return False
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            feather.write_feather(df, tmp_path, compression='uncompressed')
+            # Atomic rename so concurrent readers never see a partially written file.
+            os.replace(tmp_path, path)
+        except Exception as e:
+            self._remove(tmp_path)
+            with self._lock:
+                self.failures += 1
+                self.last_error = f"{key[:12]}: {type(e).__name__}: {e}"
+            return False
+        self._evict(keep=path)
+        return True
+
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(self.SUFFIX):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _evict(self, keep=None):
+        """Removes least recently used entries until the cache fits in ``max_bytes``."""
+        with self._lock:
+            entries = sorted(self._entries())
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                if path == keep:
+                    continue
+                self._remove(path)
+                total -= size
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def stats(self):
+        """Returns hit/miss counters and the current size of the cache."""
+        entries = self._entries() if self.enabled else []
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'entries': len(entries),
+            'bytes': sum(size for _, size, _ in entries),
+            'failures': self.failures,
+            'last_error': self.last_error,
+        }
@@ -0,0 +1,190 @@
+"""
+Opt-in timing of the app's hot paths on every rerun.
+
+Usage:
+    python profiling.py [profile.jsonl]   # p50/p95 per stage from the timing log
+"""
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+
+PROFILE_LOG_PATH = "profile.jsonl"
+PROFILE_ENV_VAR = "DASHBOARD_PROFILE"  # Set to 1 to profile every session by default
+PROFILE_HISTORY = 50  # Reruns kept per session for the sidebar percentiles
+
+_current = threading.local()  # Each Streamlit session runs its script on its own thread
+_log_lock = threading.Lock()
+
+
+def profiling_default():
+    return os.environ.get(PROFILE_ENV_VAR, "").strip().lower() in ("1", "true", "yes")
+
+
+class RerunProfiler:
+    """
+    Collects stage timings for one script run and appends them to a JSON-lines log.
+
+    Stages are timed with ``stage(name)``. For ``st.cache_data`` / ``st.cache_resource``
+    functions decorated with ``record_miss``, a stage also records whether the call was a
+    cache hit or a miss, since the function body only runs on a miss.
+    """
+
+    def __init__(self, session_id, log_path=PROFILE_LOG_PATH):
+        self.session_id = session_id
+        self.log_path = log_path
+        self.started = time.perf_counter()
+        self.stages = []  # (name, milliseconds, 'hit' / 'miss' / None)
+        self._misses = set()
+
+    @contextmanager
+    def stage(self, name, cached=False):
+        self._misses.discard(name)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            cache = ('miss' if name in self._misses else 'hit') if cached else None
+            self.stages.append((name, elapsed, cache))
+
+    def finish(self, **fields):
+        """Appends this run as one JSON line and returns the record."""
+        record = {
+            'ts': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'session': self.session_id,
+            **fields,
+            'rerun_ms': round((time.perf_counter() - self.started) * 1000, 2),
+            'stages': {name: round(ms, 2) for name, ms, _ in self.stages},
+            'cache': {name: cache for name, _, cache in self.stages if cache},
+        }
+        line = json.dumps(record)
+        with _log_lock:
+            with open(self.log_path, 'a', encoding='utf-8') as f:
+                f.write(line + "\n")
+        return record
+
+
+class _NullProfiler:
+    """Stands in when profiling is off so the instrumented code needs no branches."""
+
+    @contextmanager
+    def stage(self, name, cached=False):
+        yield
+
+
+_NULL_PROFILER = _NullProfiler()
+
+
+def start_profiling(enabled, session_id=None, log_path=PROFILE_LOG_PATH):
+    """Starts profiling the current script run, or turns it off, and returns the profiler."""
+    _current.profiler = RerunProfiler(session_id or uuid.uuid4().hex[:8], log_path) if enabled else None
+    return current_profiler()
+
+
+def current_profiler():
+    return getattr(_current, 'profiler', None) or _NULL_PROFILER
+
+
+def stage(name, cached=False):
+    """Times a stage of the current run; a no-op unless profiling is on."""
+    return current_profiler().stage(name, cached)
+
+
+def record_miss(name):
+    """Decorator for the function wrapped by a Streamlit cache: its body only runs on a cache miss."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            profiler = getattr(_current, 'profiler', None)
+            if profiler is not None:
+                profiler._misses.add(name)
+            return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def timed_job(name, func, log_path=PROFILE_LOG_PATH):
+    """
+    Wraps a background job (e.g. a PDF build) to log its run time as a JSON line when profiled.
+
+    Jobs run outside the script thread, so they are logged as records of their own.
+    """
+    profiler = getattr(_current, 'profiler', None)
+    if profiler is None:
+        return func
+    session_id = profiler.session_id
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            record = {'ts': time.strftime('%Y-%m-%dT%H:%M:%S'), 'session': session_id, 'job': name,
+                      'job_ms': round((time.perf_counter() - started) * 1000, 2)}
+            with _log_lock:
+                with open(log_path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(record) + "\n")
+    return wrapper
+
+
+def percentiles(values, qs=(50, 95)):
+    """Interpolated percentiles of ``values``; empty input gives zeros."""
+    if not values:
+        return {q: 0.0 for q in qs}
+    if len(values) == 1:
+        return {q: values[0] for q in qs}
+    cuts = statistics.quantiles(values, n=100, method='inclusive')
+    return {q: cuts[q - 1] for q in qs}
+
+
+class ProfileHistory:
+    """The last few profiled runs of a session, for the sidebar panel."""
+
+    def __init__(self, size=PROFILE_HISTORY):
+        self.records = deque(maxlen=size)
+
+    def add(self, record):
+        self.records.append(record)
+
+    def rerun_percentiles(self):
+        return percentiles([record['rerun_ms'] for record in self.records])
+
+
+def summarize_log(path=PROFILE_LOG_PATH):
+    """
+    Returns {stage: (runs, p50 ms, p95 ms)} over a timing log.
+
+    The whole rerun is reported as 'rerun' and background jobs as 'job: <name>'.
+    """
+    timings = {}
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if 'job' in record:
+                timings.setdefault(f"job: {record['job']}", []).append(record['job_ms'])
+                continue
+            timings.setdefault('rerun', []).append(record['rerun_ms'])
+            for name, ms in record.get('stages', {}).items():
+                timings.setdefault(name, []).append(ms)
+    summary = {}
+    for name, values in timings.items():
+        result = percentiles(values)
+        summary[name] = (len(values), result[50], result[95])
+    return summary
+
+
+if __name__ == "__main__":
+    log_path = sys.argv[1] if len(sys.argv) > 1 else PROFILE_LOG_PATH
+    print(f"{'stage':<28} {'runs':>6} {'p50 ms':>9} {'p95 ms':>9}")
+    for name, (runs, p50, p95) in sorted(summarize_log(log_path).items(), key=lambda item: -item[1][2]):
+        print(f"{name:<28} {runs:>6,} {p50:>9.1f} {p95:>9.1f}")
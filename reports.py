@@ -0,0 +1,405 @@
+"""Report generation: SLA metrics, the PDF report and its table writer, and background report jobs."""
+import io
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+from fpdf import FPDF
+
+from charts import get_chart_renderer
+from ingest import coalesce_incidents
+
+REPORT_WORKERS = 2
+REPORT_CACHE_ENTRIES = 8
+TABLE_ROW_HEIGHT = 7
+TABLE_HEADER_HEIGHT = 10
+TABLE_CELL_PADDING = 1.5
+PT_TO_MM = 25.4 / 72
+CHART_TOP_N = 20  # Bars per category chart; smaller categories are folded into one bar
+OTHERS_LABEL = "Others"
+SUMMARY_COLUMNS = ['Customer', 'Total Downtime (sec)', 'Avg Downtime (sec)', 'Min Downtime (sec)',
+                   'Max Downtime (sec)']
+MERGED_DOWNTIME_COLUMN = 'Merged Downtime (sec)'
+
+
+# --- SLA Metrics ---
+def compute_sla_metrics(tp_incidents_df, all_incidents_df, merge_overlaps=False):
+    """
+    Computes SLA metrics from True Positive incidents and a full list of customers.
+
+    With ``merge_overlaps`` the summary also has a 'Merged Downtime (sec)' column, in which
+    a customer's overlapping incidents count once (see ``merged_downtime``).
+    """
+    if tp_incidents_df.empty:
+        summary = pd.DataFrame(columns=SUMMARY_COLUMNS)
+    else:
+        # observed=True keeps categorical customer names (streaming ingest) from producing empty groups
+        summary = tp_incidents_df.groupby('Name', observed=True)['Duration'].agg(
+            ['sum', 'mean', 'min', 'max']).reset_index()
+        summary.columns = SUMMARY_COLUMNS
+        summary['Customer'] = summary['Customer'].astype(object)
+        summary['Avg Downtime (sec)'] = summary['Avg Downtime (sec)'].round(2)
+
+    if merge_overlaps:
+        summary = add_merged_downtime(summary, merged_downtime(tp_incidents_df))
+
+    # Correctly identify customers with no downtime for the given period
+    all_customers = set(all_incidents_df['Name'].unique())
+    downtime_customers = set(summary['Customer'])
+    no_downtime_customers = all_customers - downtime_customers
+
+    return summary, no_downtime_customers
+
+
+def merged_downtime(tp_incidents_df):
+    """Returns each customer's TP downtime with overlapping incidents merged, as a Series by customer."""
+    if tp_incidents_df.empty:
+        return pd.Series(dtype='float64')
+    _, outages = coalesce_incidents(tp_incidents_df)
+    return outages.groupby(outages['Name'].astype(object))['Merged Downtime (sec)'].sum()
+
+
+def add_merged_downtime(summary_df, merged):
+    """Returns ``summary_df`` with the ``merged`` downtime per customer as a column next to the total."""
+    summary_df = summary_df.copy()
+    summary_df.insert(2, MERGED_DOWNTIME_COLUMN, summary_df['Customer'].map(merged).fillna(0).round().astype('int64'))
+    return summary_df
+
+
+# --- PDF Tables ---
+def _format_cells(pdf, df, widths):
+    """
+    Formats every column to display strings at once and trims text that won't fit its column.
+
+    Conversion is column-wise (``astype(str)``). Only cells with more characters than
+    would fit if every one were as wide as 'W' are measured individually.
+    """
+    columns = []
+    widest = pdf.get_string_width('W')
+    for col_name, width in zip(df.columns, widths):
+        text = df[col_name].astype(str)
+        room = width - 2 * TABLE_CELL_PADDING
+        for index in text.index[text.str.len() > int(room / widest)]:
+            value = text.at[index]
+            if pdf.get_string_width(value) > room:
+                while value and pdf.get_string_width(value + '...') > room:
+                    value = value[:-1]
+                text.at[index] = value + '...'
+        columns.append(text.tolist())
+    return list(zip(*columns))
+
+
+def write_pdf_table(pdf, df, col_widths, font_family="Arial", font_size=10, progress=None):
+    """
+    Writes ``df`` as a bordered table starting at the current position.
+
+    Rows are placed with ``pdf.text`` and one rule per row instead of a ``pdf.cell`` per
+    value, and the column separators are drawn once per page, so render time grows
+    linearly with the row count. The header row is repeated at the top of every page.
+    ``col_widths`` maps column names to widths (default 40). ``progress(rows_written,
+    total_rows)`` is called after each page.
+    """
+    widths = [col_widths.get(col_name, 40) for col_name in df.columns]
+    rows = _format_cells(pdf, df, widths) if not df.empty else []
+    left = pdf.l_margin
+    edges = [left]
+    for width in widths:
+        edges.append(edges[-1] + width)
+    bottom = pdf.h - pdf.b_margin
+    baseline = (TABLE_ROW_HEIGHT + font_size * PT_TO_MM * 0.7) / 2  # Centre the capital height in the row
+
+    def write_header():
+        pdf.set_font(font_family, 'B', size=font_size)
+        pdf.set_x(left)
+        for col_name, width in zip(df.columns, widths):
+            pdf.cell(width, TABLE_HEADER_HEIGHT, txt=str(col_name), border=1, align='C')
+        pdf.ln()
+        pdf.set_font(font_family, size=font_size)
+        return pdf.get_y()
+
+    def close_page(top, y):
+        for x in edges:
+            pdf.line(x, top, x, y)
+
+    auto_page_break, break_margin = pdf.auto_page_break, pdf.b_margin
+    pdf.set_auto_page_break(False)
+    try:
+        if pdf.get_y() + TABLE_HEADER_HEIGHT + TABLE_ROW_HEIGHT > bottom:
+            pdf.add_page()
+        top = y = write_header()
+        for written, row in enumerate(rows):
+            if y + TABLE_ROW_HEIGHT > bottom:
+                close_page(top, y)
+                pdf.add_page()
+                top = y = write_header()
+                if progress:
+                    progress(written, len(rows))
+            for x, value in zip(edges, row):
+                pdf.text(x + TABLE_CELL_PADDING, y + baseline, value)
+            y += TABLE_ROW_HEIGHT
+            pdf.line(left, y, edges[-1], y)
+        close_page(top, y)
+        pdf.set_xy(left, y)
+    finally:
+        pdf.set_auto_page_break(auto_page_break, break_margin)
+    if progress:
+        progress(len(rows), len(rows))
+
+
+# --- Chart Data ---
+def top_n(values, n=CHART_TOP_N, others=OTHERS_LABEL):
+    """
+    Keeps the ``n`` largest entries of ``values`` (a Series indexed by category), largest first,
+    and sums the rest into one entry appended last.
+
+    The rolled-up entry is labelled ``others`` with the number of entries it holds, e.g.
+    "Others (1,234 more)", made unique against the kept entries so a real category can never
+    share its bar. Uses a partial selection (``nlargest``) rather than sorting every category,
+    so charts over thousands of customers stay a few bars wide in the browser and in the PDF.
+    """
+    if n is None or len(values) <= n:
+        return values.sort_values(ascending=False, kind='stable')
+    top = values.nlargest(n)
+    label = f"{others} ({len(values) - n:,} more)"
+    while label in top.index:
+        label += '*'
+    result = pd.concat([top, pd.Series([values.sum() - top.sum()], index=[label])])
+    result.index.name, result.name = values.index.name, values.name
+    return result
+
+
+def top_n_counts(values, n=CHART_TOP_N, others=OTHERS_LABEL):
+    """Counts the distinct entries of ``values`` and keeps the ``n`` most frequent, as ``top_n`` does."""
+    return top_n(pd.Series(values).value_counts(sort=False), n, others)
+
+
+# --- PDF Report ---
+def generate_pdf_report(summary_df, no_downtime_customers, validations, validated_tp_df, renderer=None,
+                        progress=None, output=None, title="SLA Incident Report", subtitle=None, top=CHART_TOP_N):
+    """
+    Generates a PDF report with charts and tables, then returns it as bytes.
+
+    The owner and validator charts show the ``top`` largest bars plus one "Others" bar.
+
+    ``progress(fraction, message)`` is called as each stage starts, for background jobs.
+    If ``output`` (a path or binary file) is given the PDF is written there instead and
+    nothing is returned, which avoids holding a second copy of a large report in memory.
+    ``subtitle`` (e.g. the reporting period) is printed under the title.
+    """
+    progress = progress or (lambda fraction, message: None)
+    progress(0.05, "Building charts")
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_font("Arial", 'B', size=16)
+    pdf.cell(0, 10, txt=title, ln=True, align='C')
+    if subtitle:
+        pdf.set_font("Arial", size=11)
+        pdf.cell(0, 8, txt=subtitle, ln=True, align='C')
+
+    # --- Add Charts to PDF ---
+    # This functionality requires the 'kaleido' library: pip install kaleido
+    try:
+        import plotly.express as px
+
+        # Build every figure first, then render them together: the renderer works in memory,
+        # in parallel, and serves unchanged charts from its cache.
+        charts = []  # (title, figure, width, height, new_page)
+
+        # Chart 1: Customer Impact Ratio
+        num_no_downtime = len(no_downtime_customers)
+        num_tp_downtime = validated_tp_df['Name'].nunique()
+        if num_no_downtime > 0 or num_tp_downtime > 0:
+            impact_data = pd.DataFrame({
+                'Category': ['Customers with No Downtime', 'Customers with TP Downtime'],
+                'Count': [num_no_downtime, num_tp_downtime]
+            })
+            fig_impact = px.pie(impact_data, values='Count', names='Category',
+                                color_discrete_map={'Customers with No Downtime': 'green',
+                                                    'Customers with TP Downtime': 'red'},
+                                template='plotly_white')
+            charts.append(("Customer Impact Ratio", fig_impact, 600, 400, False))
+
+        # Chart 2: TP vs FP Ratio
+        total_tp = len([val for val in validations.values() if val['decision'] == 'TP'])
+        total_fp = len([val for val in validations.values() if val['decision'] == 'FP'])
+        if total_tp > 0 or total_fp > 0:
+            pie_data = pd.DataFrame({'Decision': ['True Positives', 'False Positives'], 'Count': [total_tp, total_fp]})
+            fig_pie = px.pie(pie_data, values='Count', names='Decision',
+                             color_discrete_map={'True Positives': 'red', 'False Positives': 'green'},
+                             template='plotly_white')
+            charts.append(("TP vs. FP Ratio", fig_pie, 600, 400, False))
+
+        # Chart 3: Incident Ownership
+        if not validated_tp_df.empty:
+            owner_counts = top_n_counts(validated_tp_df['Owner'].astype(str), top).reset_index()
+            owner_counts.columns = ['Owner', 'Incidents Owned']
+            fig_owner = px.bar(owner_counts, x='Owner', y='Incidents Owned', text_auto=True,
+                               color_discrete_sequence=px.colors.qualitative.Pastel,
+                               template='plotly_white')
+            charts.append(("Incident Ownership (True Positives)", fig_owner, 800, 400, True))  # New page for more charts
+
+        # Chart 4: Validator Workload
+        tp_validators = [val['reviewer'] for val in validations.values() if val['decision'] == 'TP']
+        if tp_validators:
+            validator_counts = top_n_counts(tp_validators, top).reset_index()
+            validator_counts.columns = ['Validator', 'Incidents Validated']
+            fig_validator = px.bar(validator_counts, x='Validator', y='Incidents Validated', text_auto=True,
+                                   color_discrete_sequence=px.colors.qualitative.Vivid,
+                                   template='plotly_white')
+            charts.append(("Validation Workload", fig_validator, 800, 400, False))
+
+        progress(0.2, "Rendering charts")
+        renderer = renderer or get_chart_renderer()
+        images = renderer.render_many([(fig, width, height) for _, fig, width, height, _ in charts])
+
+        for index, ((title, _, _, _, new_page), image) in enumerate(zip(charts, images)):
+            if new_page:
+                pdf.add_page()
+            pdf.ln(10 if index == 0 else 5)
+            pdf.set_font("Arial", 'B', size=12)
+            pdf.cell(0, 10, title, ln=True)
+            pdf.image(io.BytesIO(image), w=170)
+
+    except ImportError:
+        pdf.ln(10)
+        pdf.set_font("Arial", 'I', size=10)
+        pdf.cell(0, 10, txt="(Chart generation failed. Please ensure 'plotly' and 'kaleido' are installed.)", ln=True)
+    except Exception as e:
+        pdf.ln(10)
+        pdf.set_font("Arial", 'I', size=10)
+        pdf.cell(0, 10, txt=f"(An error occurred during chart generation: {e})", ln=True)
+
+    # --- Add Tables to PDF ---
+    progress(0.7, "Writing tables")
+    pdf.add_page()
+    pdf.set_font("Arial", 'B', size=16)
+    pdf.cell(0, 10, "Detailed Report Data", ln=True, align='C')
+    pdf.ln(10)
+
+    # Downtime Summary Table
+    if not summary_df.empty:
+        pdf.set_font("Arial", 'B', size=12)
+        pdf.cell(0, 10, "Downtime Summary by Customer", ln=True)
+        col_widths = {'Customer': 70, 'Total Downtime (sec)': 40, 'Avg Downtime (sec)': 40, 'Min Downtime (sec)': 20,
+                      'Max Downtime (sec)': 20}
+        if MERGED_DOWNTIME_COLUMN in summary_df.columns:
+            col_widths.update({'Customer': 50, 'Total Downtime (sec)': 35, MERGED_DOWNTIME_COLUMN: 35,
+                               'Avg Downtime (sec)': 30})
+        write_pdf_table(pdf, summary_df, col_widths,
+                        progress=lambda done, total: progress(0.7 + 0.2 * done / max(total, 1), "Writing tables"))
+    else:
+        pdf.set_font("Arial", size=12)
+        pdf.cell(0, 10, "No downtime incidents recorded for this period.", ln=True)
+
+    pdf.ln(10)
+
+    # No Downtime Section
+    pdf.set_font("Arial", 'B', size=12)
+    pdf.cell(0, 10, "Customers with No Downtime Incidents", ln=True)
+    pdf.set_font("Arial", size=10)
+    if no_downtime_customers:
+        pdf.multi_cell(0, 5, txt=', '.join(sorted(list(no_downtime_customers))))
+    else:
+        pdf.cell(0, 10, "All customers experienced at least one downtime incident.", ln=True)
+
+    progress(0.95, "Finalizing PDF")
+    if output is not None:
+        pdf.output(output)
+        return None
+    # PyFPDF returns a latin-1 str here, fpdf2 a bytearray.
+    pdf_bytes = pdf.output(dest='S')
+    return pdf_bytes.encode('latin-1') if isinstance(pdf_bytes, str) else bytes(pdf_bytes)
+
+
+# --- Background Jobs ---
+class ReportJob:
+    """One report build; its status, progress and result are read by the UI while it runs."""
+
+    QUEUED, RUNNING, DONE, FAILED = 'queued', 'running', 'done', 'failed'
+
+    def __init__(self, key):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.status = self.QUEUED
+        self.progress = 0.0
+        self.message = "Queued"
+        self.result = None
+        self.error = None
+        self.submitted_at = time.time()
+        self.finished_at = None
+
+    @property
+    def finished(self):
+        return self.status in (self.DONE, self.FAILED)
+
+    def update(self, progress, message):
+        """Progress callback handed to the report builder."""
+        self.progress = max(0.0, min(1.0, progress))
+        self.message = message
+
+
+class ReportJobManager:
+    """
+    Runs report builders on a small worker pool, one job per (report, data version) key.
+
+    Submitting a key that is already queued or running returns the existing job, and a
+    finished job stays cached until newer versions push it out, so repeat requests against
+    unchanged data are served without rebuilding anything. Failed jobs are not cached.
+    """
+
+    def __init__(self, workers=REPORT_WORKERS, max_entries=REPORT_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="report-job")
+
+    def get(self, key):
+        """Returns the job for ``key`` if one was submitted and hasn't been evicted."""
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None:
+                self._jobs.move_to_end(key)
+            return job
+
+    def submit(self, key, builder, *args, **kwargs):
+        """
+        Starts ``builder(*args, progress=job.update, **kwargs)`` unless a job for ``key`` exists.
+
+        The builder's return value becomes ``job.result``.
+        """
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and job.status != ReportJob.FAILED:
+                self._jobs.move_to_end(key)
+                return job
+            job = ReportJob(key)
+            self._jobs[key] = job
+            self._jobs.move_to_end(key)
+            self._evict()
+        self._pool.submit(self._run, job, builder, args, kwargs)
+        return job
+
+    def _run(self, job, builder, args, kwargs):
+        job.status = ReportJob.RUNNING
+        job.update(0.0, "Starting")
+        try:
+            job.result = builder(*args, progress=job.update, **kwargs)
+        except Exception as e:
+            job.error = e
+            job.status = ReportJob.FAILED
+            job.message = f"Report generation failed: {e}"
+        else:
+            job.status = ReportJob.DONE
+            job.update(1.0, "Ready")
+        job.finished_at = time.time()
+
+    def _evict(self):
+        # Only finished jobs are evicted; running ones finish and are dropped on a later submit.
+        for key in list(self._jobs):
+            if len(self._jobs) <= self.max_entries:
+                break
+            if self._jobs[key].finished:
+                del self._jobs[key]
@@ -0,0 +1,164 @@
+"""Disk-backed cache of derived results, shared by every session and every server process."""
+import hashlib
+import pickle
+import sqlite3
+import threading
+import time
+
+RESULT_CACHE_PATH = "results.db"
+RESULT_CACHE_MAX_BYTES = 512 * 1024 ** 2  # 512 MiB of pickled results
+RESULT_CACHE_TOUCH_SEC = 60  # Last-access times are rewritten at most this often
+RESULT_CACHE_LOCKS = 64  # Lock stripes that make concurrent misses on one key in a process compute it once
+BUSY_TIMEOUT_SEC = 5.0
+
+
+class ResultCache:
+    """
+    Size-bounded cache of pickled results in a SQLite file that several processes can share.
+
+    Entries are keyed by a hash of their parts, normally (kind, data version, parameters)
+    where the data version is (database id, incident data hash, incidents version, validations
+    version). A key therefore never goes stale: changed data gets new keys and the old
+    entries age out. Past ``max_bytes`` the least recently used entries are evicted. The
+    file runs in WAL mode so readers in other processes never block on a writer, and any
+    database error is treated as a miss. Reads never write: the access times of hits are
+    collected and written with the next ``put``, just before it evicts. Values are pickled:
+    point every replica at the same file next to the shared incidents database, and at no
+    file from elsewhere.
+    """
+
+    def __init__(self, path=RESULT_CACHE_PATH, max_bytes=RESULT_CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._touched = {}  # key -> last access time not yet written
+        self._key_locks = [threading.Lock() for _ in range(RESULT_CACHE_LOCKS)]
+        self._local = threading.local()  # One connection per thread
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript('''
+            CREATE TABLE IF NOT EXISTS results (
+                key TEXT PRIMARY KEY,
+                kind TEXT,
+                value BLOB,
+                size INTEGER,
+                accessed REAL
+            );
+            CREATE INDEX IF NOT EXISTS idx_results_accessed ON results (accessed);
+        ''')
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_SEC, isolation_level=None,
+                                   check_same_thread=False)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def key(parts):
+        """Hashes the key parts (anything with a stable ``repr``) into the stored key."""
+        return hashlib.sha256(repr(parts).encode('utf-8')).hexdigest()
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def _fetch(self, key):
+        try:
+            row = self._connection().execute("SELECT value, accessed FROM results WHERE key = ?",
+                                             (key,)).fetchone()
+            if row is None:
+                return None
+            value = pickle.loads(row[0])
+        except (sqlite3.Error, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            return None
+        now = time.time()
+        if now - row[1] > RESULT_CACHE_TOUCH_SEC:
+            with self._lock:
+                self._touched[key] = now
+        return value
+
+    def _write_touches(self, conn):
+        """Writes the collected access times; best effort, since they only order evictions."""
+        with self._lock:
+            touched, self._touched = self._touched, {}
+        try:
+            conn.executemany("UPDATE results SET accessed = ? WHERE key = ?",
+                             [(accessed, key) for key, accessed in touched.items()])
+        except sqlite3.Error:
+            pass
+
+    def get(self, parts):
+        """Returns the cached result for the key ``parts``, or None on a miss."""
+        value = self._fetch(self.key(parts))
+        self._count(value is not None)
+        return value
+
+    def put(self, parts, value):
+        """Stores ``value`` under the key ``parts``. Returns False if it could not be cached."""
+        try:
+            blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            return False
+        if len(blob) > self.max_bytes:
+            return False
+        kind = str(parts[0]) if isinstance(parts, tuple) and parts else None
+        try:
+            conn = self._connection()
+            conn.execute("INSERT OR REPLACE INTO results (key, kind, value, size, accessed) VALUES (?, ?, ?, ?, ?)",
+                         (self.key(parts), kind, sqlite3.Binary(blob), len(blob), time.time()))
+            self._write_touches(conn)
+            self._evict(conn)
+        except sqlite3.Error:
+            return False
+        return True
+
+    def get_or_compute(self, parts, compute):
+        """
+        Returns the cached result for ``parts``, computing and storing it with ``compute()`` on a miss.
+
+        Sessions of this process that miss on the same key at once wait for the first one
+        instead of computing the result again. Other processes are not waited for: one that
+        misses before the result is stored computes it too.
+        """
+        key = self.key(parts)
+        value = self._fetch(key)
+        if value is not None:
+            self._count(True)
+            return value
+        with self._key_locks[int(key[:8], 16) % RESULT_CACHE_LOCKS]:
+            value = self._fetch(key)  # Another session may have stored it meanwhile
+            self._count(value is not None)
+            if value is None:
+                value = compute()
+                self.put(parts, value)
+        return value
+
+    def _evict(self, conn):
+        """Removes least recently used entries until the cache fits in ``max_bytes``."""
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        doomed = []
+        for key, size in conn.execute("SELECT key, size FROM results ORDER BY accessed"):
+            if total <= self.max_bytes:
+                break
+            doomed.append((key,))
+            total -= size
+        conn.executemany("DELETE FROM results WHERE key = ?", doomed)
+
+    def stats(self):
+        """Returns hit/miss counters and the current size of the cache."""
+        try:
+            entries, size = self._connection().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+        except sqlite3.Error:
+            entries, size = 0, 0
+        return {'hits': self.hits, 'misses': self.misses, 'entries': entries, 'bytes': size}
@@ -0,0 +1,591 @@
+"""SQLite storage for incidents and validations."""
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+import pandas as pd
+
+READER_POOL_SIZE = 4
+BUSY_TIMEOUT_SEC = 10.0
+WRITE_BATCH_MAX = 256  # Most jobs coalesced into a single group commit
+WRITE_TIMEOUT_SEC = 120.0  # How long write() waits for its batch before raising TimeoutError
+DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'  # Sortable text, so range filters can use the datetime index
+DATASET_RETENTION_DAYS = 30  # Uploaded datasets not used for this long are dropped
+DATASET_TOUCH_SEC = 3600  # Reusing a dataset refreshes its used_at at most this often
+
+
+def init_schema(conn):
+    """Creates the tables and indexes if they don't exist."""
+    # The 'reviewer' column stores the 'validator's' name. 'seq' is a change sequence number,
+    # bumped on every write, that lets caches fetch only the rows changed since their last refresh.
+    # Incidents belong to a dataset: the fingerprint of a set of uploaded reports, or a watched
+    # folder. 'version' is the incidents version of the dataset's last change and 'epoch' the one
+    # it was last replaced at, so views know when rows may have been deleted. 'used_at' is when it
+    # was last loaded or reused, for pruning.
+    conn.executescript('''
+        CREATE TABLE IF NOT EXISTS validations (
+            id INTEGER PRIMARY KEY,
+            monitor_id TEXT UNIQUE,
+            decision TEXT,
+            reviewer TEXT,
+            timestamp TEXT,
+            seq INTEGER
+        );
+
+        CREATE TABLE IF NOT EXISTS incidents (
+            dataset TEXT NOT NULL,
+            monitor_id TEXT,
+            name TEXT,
+            duration INTEGER,
+            datetime_ist TEXT,
+            owner TEXT,
+            seq INTEGER DEFAULT 0,
+            PRIMARY KEY (dataset, monitor_id)
+        );
+
+        -- The reports each dataset was loaded from, by content fingerprint. 'mtime' and 'size'
+        -- are only recorded for files read from a watched folder.
+        CREATE TABLE IF NOT EXISTS ingested_files (
+            dataset TEXT NOT NULL,
+            fingerprint TEXT,
+            file_name TEXT,
+            row_count INTEGER,
+            ingested_at TEXT,
+            mtime REAL,
+            size INTEGER,
+            PRIMARY KEY (dataset, fingerprint)
+        );
+
+        CREATE TABLE IF NOT EXISTS datasets (
+            dataset TEXT PRIMARY KEY,
+            version INTEGER,
+            epoch INTEGER,
+            used_at TEXT
+        );
+
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        );
+    ''')
+    # Databases created before the change sequence existed get the column backfilled from the row id.
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(validations)")}
+    if 'seq' not in columns:
+        conn.execute("ALTER TABLE validations ADD COLUMN seq INTEGER")
+        conn.execute("UPDATE validations SET seq = id")
+    conn.executescript('''
+        CREATE INDEX IF NOT EXISTS idx_validations_decision ON validations (decision, monitor_id);
+        CREATE INDEX IF NOT EXISTS idx_validations_seq ON validations (seq);
+        CREATE INDEX IF NOT EXISTS idx_incidents_dataset_name ON incidents (dataset, name);
+        CREATE INDEX IF NOT EXISTS idx_incidents_dataset_datetime ON incidents (dataset, datetime_ist);
+        CREATE INDEX IF NOT EXISTS idx_incidents_dataset_seq ON incidents (dataset, seq);
+    ''')
+    # Identifies this database, so results cached for it are never served for a recreated one.
+    conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('database_id', ?)", (uuid.uuid4().hex,))
+    conn.commit()
+
+
+def get_meta(conn, key, default=None):
+    row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else default
+
+
+def set_meta(conn, key, value):
+    conn.execute("""
+        INSERT INTO meta (key, value) VALUES (?, ?)
+        ON CONFLICT(key) DO UPDATE SET value=excluded.value
+    """, (key, str(value)))
+
+
+# --- Connection Management ---
+class Database:
+    """
+    Shared SQLite access for every Streamlit session and thread.
+
+    The database runs in WAL mode so readers never block the writer. Reads borrow a
+    connection from a small read-only pool. All writes are queued to a single writer
+    thread, which drains the queue and commits everything it found in one transaction
+    (group commit). Each job runs inside its own savepoint, so a failing job doesn't
+    take the rest of the batch down with it; any other error fails just its batch and
+    the writer carries on. Write jobs are plain functions taking the writer connection;
+    they must not commit themselves.
+    """
+
+    def __init__(self, path, readers=READER_POOL_SIZE, busy_timeout=BUSY_TIMEOUT_SEC):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self._writer = self._open_writer()
+        init_schema(self._writer)
+
+        self._readers = queue.LifoQueue()
+        for _ in range(readers):
+            self._readers.put(self._connect(f"file:{path}?mode=ro", busy_timeout, uri=True))
+
+        self._queue = queue.Queue()
+        self._metrics_lock = threading.Lock()
+        self._metrics = {
+            'jobs_committed': 0,
+            'jobs_failed': 0,
+            'batches_committed': 0,
+            'max_batch_size': 0,
+            'max_queue_depth': 0,
+            'queue_wait_sec': 0.0,
+            'lock_wait_sec': 0.0,
+            'max_lock_wait_sec': 0.0,
+            'reader_wait_sec': 0.0,
+        }
+        self._thread = threading.Thread(target=self._writer_loop, name="sqlite-writer", daemon=True)
+        self._thread.start()
+
+    def _open_writer(self):
+        conn = self._connect(self.path, self.busy_timeout)
+        conn.execute("PRAGMA journal_mode=WAL")
+        # In WAL mode NORMAL only syncs at checkpoints; commits stay atomic and survive app crashes.
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @staticmethod
+    def _connect(target, busy_timeout, uri=False):
+        # isolation_level=None: transactions are managed explicitly, never opened implicitly.
+        conn = sqlite3.connect(target, timeout=busy_timeout, uri=uri, isolation_level=None,
+                               check_same_thread=False)
+        # Use row_factory to access columns by name
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    # --- Reads ---
+    @contextmanager
+    def reader(self):
+        """Borrows a read-only connection from the pool."""
+        started = time.perf_counter()
+        conn = self._readers.get()
+        self._add_metric('reader_wait_sec', time.perf_counter() - started)
+        try:
+            yield conn
+        finally:
+            self._readers.put(conn)
+
+    # --- Writes ---
+    def submit(self, job, *args):
+        """Queues ``job(conn, *args)`` for the writer thread and returns a Future for its result."""
+        future = Future()
+        self._queue.put((job, args, future, time.perf_counter()))
+        depth = self._queue.qsize()
+        with self._metrics_lock:
+            self._metrics['max_queue_depth'] = max(self._metrics['max_queue_depth'], depth)
+        return future
+
+    def write(self, job, *args, timeout=WRITE_TIMEOUT_SEC):
+        """
+        Runs a write job through the queue and waits until its batch has been committed.
+
+        Raises ``TimeoutError`` if that takes longer than ``timeout`` seconds; the job stays
+        queued and may still be committed.
+        """
+        return self.submit(job, *args).result(timeout)
+
+    def _writer_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            stopping = False
+            while len(batch) < WRITE_BATCH_MAX:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            try:
+                self._commit_batch(batch)
+            except Exception as e:
+                # Only this batch fails, even when a ROLLBACK does; the writer carries on.
+                self._abandon_batch(batch, e)
+            if stopping:
+                return
+
+    def _abandon_batch(self, batch, error):
+        """Fails the batch's unfinished jobs and leaves the writer connection outside any transaction."""
+        conn = self._writer
+        if conn is not None and conn.in_transaction:
+            try:
+                conn.execute("ROLLBACK")
+            except sqlite3.Error:
+                # A connection that can't roll back is dropped; the next batch opens a new one.
+                self._writer = None
+                conn.close()
+        failed = 0
+        for _, _, future, _ in batch:
+            if not future.done():
+                future.set_exception(error)
+                failed += 1
+        self._add_metric('jobs_failed', failed)
+
+    def _commit_batch(self, batch):
+        if self._writer is None:
+            self._writer = self._open_writer()
+        conn = self._writer
+        started = time.perf_counter()
+        queue_wait = sum(started - enqueued for _, _, _, enqueued in batch)
+        try:
+            # IMMEDIATE takes the write lock up front; the busy timeout covers other processes holding it.
+            conn.execute("BEGIN IMMEDIATE")
+        except sqlite3.Error as e:
+            for _, _, future, _ in batch:
+                future.set_exception(e)
+            self._add_metric('jobs_failed', len(batch))
+            return
+        lock_wait = time.perf_counter() - started
+
+        outcomes = []
+        for job, args, future, _ in batch:
+            conn.execute("SAVEPOINT job")
+            try:
+                result = job(conn, *args)
+            except Exception as e:
+                conn.execute("ROLLBACK TO job")
+                conn.execute("RELEASE job")
+                outcomes.append((future, e, False))
+            else:
+                conn.execute("RELEASE job")
+                outcomes.append((future, result, True))
+
+        try:
+            conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            conn.execute("ROLLBACK")
+            for _, _, future, _ in batch:
+                future.set_exception(e)
+            self._add_metric('jobs_failed', len(batch))
+            return
+
+        failed = 0
+        for future, value, ok in outcomes:
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+                failed += 1
+        with self._metrics_lock:
+            metrics = self._metrics
+            metrics['jobs_committed'] += len(batch) - failed
+            metrics['jobs_failed'] += failed
+            metrics['batches_committed'] += 1
+            metrics['max_batch_size'] = max(metrics['max_batch_size'], len(batch))
+            metrics['queue_wait_sec'] += queue_wait
+            metrics['lock_wait_sec'] += lock_wait
+            metrics['max_lock_wait_sec'] = max(metrics['max_lock_wait_sec'], lock_wait)
+
+    def _add_metric(self, name, value):
+        with self._metrics_lock:
+            self._metrics[name] += value
+
+    def metrics(self):
+        """Returns contention counters: queue depth, batch sizes and time spent waiting."""
+        with self._metrics_lock:
+            metrics = dict(self._metrics)
+        metrics['queue_depth'] = self._queue.qsize()
+        metrics['readers_available'] = self._readers.qsize()
+        batches = metrics['batches_committed']
+        metrics['avg_batch_size'] = metrics['jobs_committed'] / batches if batches else 0.0
+        metrics['avg_lock_wait_sec'] = metrics['lock_wait_sec'] / batches if batches else 0.0
+        return metrics
+
+    def close(self):
+        """Flushes queued writes, stops the writer thread and closes every connection."""
+        self._queue.put(None)
+        self._thread.join()
+        if self._writer is not None:
+            self._writer.close()
+        while not self._readers.empty():
+            self._readers.get_nowait().close()
+
+
+# --- Validations ---
+def upsert_validations(conn, rows):
+    """
+    Write job: inserts or updates (monitor_id, decision, reviewer, timestamp) rows.
+
+    All rows are written with one executemany, so a bulk decision costs a single
+    statement in the writer's group commit instead of one commit per incident.
+    """
+    conn.executemany("""
+        INSERT INTO validations (monitor_id, decision, reviewer, timestamp, seq)
+        VALUES (?, ?, ?, ?, (SELECT COALESCE(MAX(seq), 0) + 1 FROM validations))
+        ON CONFLICT(monitor_id) DO UPDATE SET
+        decision=excluded.decision,
+        reviewer=excluded.reviewer,
+        timestamp=excluded.timestamp,
+        seq=excluded.seq
+    """, rows)
+
+
+def delete_all_validations(conn):
+    """Write job: deletes every validation and bumps the epoch so caches reload from scratch."""
+    conn.execute("DELETE FROM validations")
+    set_meta(conn, 'validations_epoch', int(get_meta(conn, 'validations_epoch', 0)) + 1)
+
+
+def fetch_validation_changes(conn, since_seq=0):
+    """Returns (monitor_id, decision, reviewer, seq) rows written after ``since_seq``, oldest first."""
+    return conn.execute("""
+        SELECT monitor_id, decision, reviewer, seq FROM validations
+        WHERE seq > ?
+        ORDER BY seq
+    """, (since_seq,)).fetchall()
+
+
+class ValidationCache:
+    """
+    In-memory ``{monitor_id: {'decision', 'reviewer'}}`` map kept current by delta refreshes.
+
+    Each refresh only fetches rows whose change sequence is above the cache's high-water
+    mark, through the seq index, so its cost grows with the number of changes rather than
+    the size of the table. Deletions bump the validations epoch, which forces a full reload.
+    The published dict is replaced, never mutated, so readers can iterate it safely.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.validations = {}
+        self.high_water = 0
+        self.epoch = None
+
+    @property
+    def version(self):
+        return self.epoch, self.high_water
+
+    def refresh(self, conn):
+        """Applies changes since the last refresh and returns the current validations."""
+        with self._lock:
+            epoch = get_meta(conn, 'validations_epoch', '0')
+            validations = self.validations
+            if epoch != self.epoch:
+                validations, self.high_water, self.epoch = {}, 0, epoch
+
+            changes = fetch_validation_changes(conn, self.high_water)
+            if changes:
+                validations = dict(validations)
+                for monitor_id, decision, reviewer, seq in changes:
+                    # 'reviewer' column holds the name of the person who validated the incident
+                    validations[str(monitor_id).strip()] = {'decision': decision, 'reviewer': reviewer}
+                self.high_water = changes[-1][3]
+            self.validations = validations
+            return validations
+
+
+# --- Incidents ---
+def _sql_values(series):
+    """Converts a column to plain Python values, with missing entries as None."""
+    return series.astype(object).where(series.notna(), None).tolist()
+
+
+def incident_records(df):
+    """Yields (monitor_id, name, duration, datetime_ist, owner) tuples for a normalized incident frame."""
+    return zip(
+        df['Monitor ID'].tolist(),
+        _sql_values(df['Name']),
+        _sql_values(df['Duration']),
+        _sql_values(df['Datetime IST'].dt.strftime(DATETIME_FORMAT)),
+        _sql_values(df['Owner']),
+    )
+
+
+def dataset_version(conn, dataset):
+    """Returns (incidents version, epoch) of a stored dataset, or None if it has not been loaded."""
+    row = conn.execute("SELECT version, epoch FROM datasets WHERE dataset = ?", (dataset,)).fetchone()
+    return tuple(row) if row else None
+
+
+def _next_version(conn):
+    # One counter across datasets, so a version is never reused, even by a dropped and reloaded dataset
+    version = int(get_meta(conn, 'incidents_version', '0')) + 1
+    set_meta(conn, 'incidents_version', version)
+    return version
+
+
+def _record_files(conn, dataset, files):
+    ingested_at = time.strftime(DATETIME_FORMAT)
+    rows = []
+    for fingerprint, name, row_count, *stat in files:
+        mtime, size = stat if stat else (None, None)
+        rows.append((dataset, fingerprint, name, row_count, ingested_at, mtime, size))
+    # A file re-exported under the same name replaces its earlier entry
+    conn.executemany("DELETE FROM ingested_files WHERE dataset = ? AND file_name = ?",
+                     [(dataset, row[2]) for row in rows])
+    conn.executemany("""
+        INSERT OR REPLACE INTO ingested_files (dataset, fingerprint, file_name, row_count, ingested_at, mtime, size)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, rows)
+
+
+def _prune_datasets(conn, keep):
+    """Drops uploaded datasets not used for ``DATASET_RETENTION_DAYS``; watched folders are kept."""
+    cutoff = time.strftime(DATETIME_FORMAT, time.localtime(time.time() - DATASET_RETENTION_DAYS * 86_400))
+    stale = [(row[0],) for row in conn.execute("""
+        SELECT dataset FROM datasets WHERE used_at < ? AND dataset != ? AND dataset NOT LIKE 'folder:%'
+    """, (cutoff, keep))]
+    for table in ('incidents', 'ingested_files', 'datasets'):
+        conn.executemany(f"DELETE FROM {table} WHERE dataset = ?", stale)
+
+
+def replace_incidents(conn, records, dataset, files=()):
+    """
+    Write job: replaces the incidents of ``dataset`` and records the reports they came from.
+
+    ``files`` lists the (fingerprint, file name, row count[, mtime, size]) of the reports the
+    rows came from. Other datasets are left alone. The incidents version is bumped and
+    every row gets it; it is returned, and becomes the dataset's epoch too, so views
+    following the dataset know rows may have been deleted and rebuild instead of replaying
+    upserts. Uploaded datasets that have not been used for a while are dropped.
+    """
+    version = _next_version(conn)
+    conn.execute("DELETE FROM incidents WHERE dataset = ?", (dataset,))
+    conn.executemany(f"""
+        INSERT OR REPLACE INTO incidents (dataset, monitor_id, name, duration, datetime_ist, owner, seq)
+        VALUES (?, ?, ?, ?, ?, ?, {version})
+    """, ((dataset, *record) for record in records))
+    conn.execute("DELETE FROM ingested_files WHERE dataset = ?", (dataset,))
+    _record_files(conn, dataset, files)
+    conn.execute("""
+        INSERT OR REPLACE INTO datasets (dataset, version, epoch, used_at) VALUES (?, ?, ?, ?)
+    """, (dataset, version, version, time.strftime(DATETIME_FORMAT)))
+    _prune_datasets(conn, dataset)
+    return version
+
+
+def apply_incident_changes(conn, records, dataset, files=()):
+    """
+    Write job: upserts only the incidents of ``dataset`` that are new or differ from the stored rows.
+
+    The incoming rows are staged in a temporary table and diffed against the dataset's
+    incidents by Monitor ID in SQL; rows that are unchanged are left alone, and incidents
+    missing from ``records`` are kept. Inserted and updated rows get a new incidents
+    version, so views following ``fetch_incident_changes`` only replay those. ``files``
+    are added to ingested_files. Returns (inserted, updated, version).
+    """
+    conn.execute("""
+        CREATE TEMP TABLE IF NOT EXISTS incident_staging (
+            monitor_id TEXT PRIMARY KEY, name TEXT, duration INTEGER, datetime_ist TEXT, owner TEXT
+        )
+    """)
+    conn.execute("DELETE FROM incident_staging")
+    conn.executemany("""
+        INSERT OR REPLACE INTO incident_staging (monitor_id, name, duration, datetime_ist, owner)
+        VALUES (?, ?, ?, ?, ?)
+    """, records)
+    inserted = conn.execute("""
+        SELECT COUNT(*) FROM incident_staging s
+        WHERE NOT EXISTS (SELECT 1 FROM incidents i WHERE i.dataset = ? AND i.monitor_id = s.monitor_id)
+    """, (dataset,)).fetchone()[0]
+    changed = """
+        i.name IS NOT s.name OR i.duration IS NOT s.duration
+        OR i.datetime_ist IS NOT s.datetime_ist OR i.owner IS NOT s.owner
+    """
+    updated = conn.execute(f"""
+        SELECT COUNT(*) FROM incident_staging s JOIN incidents i ON i.dataset = ? AND i.monitor_id = s.monitor_id
+        WHERE {changed}
+    """, (dataset,)).fetchone()[0]
+
+    current = dataset_version(conn, dataset)
+    version, epoch = current or (0, 0)
+    if inserted or updated:
+        version = _next_version(conn)
+        conn.execute(f"""
+            INSERT INTO incidents (dataset, monitor_id, name, duration, datetime_ist, owner, seq)
+            SELECT ?, s.monitor_id, s.name, s.duration, s.datetime_ist, s.owner, {version}
+            FROM incident_staging s LEFT JOIN incidents i ON i.dataset = ? AND i.monitor_id = s.monitor_id
+            WHERE i.monitor_id IS NULL OR {changed}
+            ON CONFLICT(dataset, monitor_id) DO UPDATE SET
+                name=excluded.name, duration=excluded.duration, datetime_ist=excluded.datetime_ist,
+                owner=excluded.owner, seq=excluded.seq
+        """, (dataset, dataset))
+    conn.execute("DELETE FROM incident_staging")
+    _record_files(conn, dataset, files)
+    conn.execute("""
+        INSERT OR REPLACE INTO datasets (dataset, version, epoch, used_at) VALUES (?, ?, ?, ?)
+    """, (dataset, version, epoch if current else version, time.strftime(DATETIME_FORMAT)))
+    return inserted, updated, version
+
+
+def touch_dataset(conn, dataset):
+    """Write job: records that ``dataset`` was just used, which keeps it from being pruned."""
+    conn.execute("UPDATE datasets SET used_at = ? WHERE dataset = ?", (time.strftime(DATETIME_FORMAT), dataset))
+
+
+def sync_incidents(db, df, data_hash, files=()):
+    """
+    Bulk-loads the incident frame as the dataset ``data_hash``, replacing that dataset's rows.
+
+    Datasets are kept side by side, so calling this on every rerun with the same uploads is
+    a single lookup, and sessions with different uploads never overwrite each other's
+    incidents. Returns True if the dataset was (re)loaded.
+    """
+    with db.reader() as conn:
+        row = conn.execute("SELECT used_at FROM datasets WHERE dataset = ?", (data_hash,)).fetchone()
+    if row is not None:
+        if row[0] < time.strftime(DATETIME_FORMAT, time.localtime(time.time() - DATASET_TOUCH_SEC)):
+            db.submit(touch_dataset, data_hash)  # Not waited for; a lost touch is retried on the next call
+        return False
+    db.write(replace_incidents, list(incident_records(df)), data_hash, list(files))
+    return True
+
+
+def fetch_ingested_files(conn, dataset):
+    """Returns (fingerprint, file name, row count, ingested at, mtime, size) for the reports of a dataset."""
+    return [tuple(row) for row in conn.execute("""
+        SELECT fingerprint, file_name, row_count, ingested_at, mtime, size FROM ingested_files
+        WHERE dataset = ?
+        ORDER BY file_name
+    """, (dataset,))]
+
+
+def fetch_incident_changes(conn, dataset, since_seq=0):
+    """
+    Returns (monitor_id, name, duration, datetime_ist, owner, decision, seq) for the incidents
+    of ``dataset`` inserted or updated after incidents version ``since_seq``, with their
+    current decision.
+    """
+    return conn.execute("""
+        SELECT i.monitor_id, i.name, i.duration, i.datetime_ist, i.owner, v.decision, i.seq
+        FROM incidents i
+        LEFT JOIN validations v ON v.monitor_id = i.monitor_id
+        WHERE i.dataset = ? AND i.seq > ?
+    """, (dataset, since_seq)).fetchall()
+
+
+def fetch_incidents(conn, dataset):
+    """Returns the incidents of a dataset with the upload's column names."""
+    return _incidents_frame(conn.execute("""
+        SELECT name, duration, datetime_ist, monitor_id, owner FROM incidents
+        WHERE dataset = ?
+        ORDER BY rowid
+    """, (dataset,)).fetchall())
+
+
+def _incidents_frame(rows):
+    df = pd.DataFrame([tuple(row) for row in rows],
+                      columns=['Name', 'Duration', 'Datetime IST', 'Monitor ID', 'Owner'])
+    df['Datetime IST'] = pd.to_datetime(df['Datetime IST'], format=DATETIME_FORMAT)
+    return df
+
+
+def fetch_validated_tp(conn, dataset):
+    """Returns the incidents of a dataset validated as True Positives, with the upload's column names."""
+    rows = conn.execute("""
+        SELECT i.name, i.duration, i.datetime_ist, i.monitor_id, i.owner
+        FROM validations v
+        JOIN incidents i ON i.dataset = ? AND i.monitor_id = v.monitor_id
+        WHERE v.decision = 'TP'
+        ORDER BY i.rowid
+    """, (dataset,)).fetchall()
+    return _incidents_frame(rows)
+
@@ -0,0 +1,115 @@
+"""Reproducible synthetic incident reports with the same layout as the monitoring exports."""
+import numpy as np
+import pandas as pd
+
+from ingest import INCIDENT_TZ, RAW_DATA_SHEET_NAME
+
+# Column order of the real "Incidents - Raw Data " sheet
+EXPORT_COLUMNS = ['Monitor ID', 'Name', 'logs', 'Datetime', 'Datetime IST', 'Date format', 'Datetime GMT',
+                  'Israel Datetime', 'Duration', 'In hours', 'Error code', 'Error name', 'Reason',
+                  'True/False Positive', 'Owner']
+EXPORT_DATETIME_FORMAT = '%d-%m-%Y %H:%M:%S'
+ERRORS = [(' Reason Code: 888888', ' Reason Detail: Keyword Not Found'),
+          (' Reason Code: 333333', ' Reason Detail: Connection Timeout'),
+          (' Reason Code: 444444', ' Reason Detail: SSL Error'),
+          (' Reason Code: 500000', ' Reason Detail: Internal Server Error')]
+WRITE_CHUNK_ROWS = 50_000
+MONITOR_ID_BASE = 700_000_000
+MONITOR_ID_BLOCK = 10_000_000_000  # Monitor IDs of each seed; the files of different seeds never share one
+
+
+def generate_incidents(rows, customers=200, owners=10, start='2025-01-01', days=90, seed=0):
+    """
+    Returns a DataFrame of ``rows`` synthetic incidents in the export's column layout.
+
+    Customers and owners are drawn from ``customers`` and ``owners`` distinct names, with
+    a skew so a few customers account for most incidents, as in real exports. Incidents are
+    spread over ``days`` days from ``start`` (IST). Durations are long-tailed seconds. The
+    same arguments always give the same data, and each seed draws its Monitor IDs from a
+    range of its own, so files generated with different seeds (e.g. one per month) don't
+    deduplicate against each other.
+    """
+    return pd.concat(list(iter_incidents(rows, customers, owners, start, days, seed)), ignore_index=True)
+
+
+def iter_incidents(rows, customers=200, owners=10, start='2025-01-01', days=90, seed=0):
+    """
+    Yields the incidents of ``generate_incidents`` in DataFrames of at most ``WRITE_CHUNK_ROWS`` rows.
+
+    Each chunk covers its own slice of the time range, so the rows stay in time order,
+    and Monitor IDs keep increasing from one chunk to the next.
+    """
+    weights = 1 / np.arange(1, customers + 1)
+    weights /= weights.sum()
+    span = days * 86_400
+    next_id = MONITOR_ID_BASE + seed * MONITOR_ID_BLOCK
+    for index, offset in enumerate(range(0, rows, WRITE_CHUNK_ROWS)):
+        size = min(WRITE_CHUNK_ROWS, rows - offset)
+        rng = np.random.default_rng((seed, index))
+        customer_ids = rng.choice(customers, size, p=weights)
+        owner_ids = rng.integers(1, owners + 1, size)
+        durations = np.minimum(rng.lognormal(5.5, 1.2, size).round(), 86_400).astype('int64')
+        durations = np.maximum(durations, 1)
+        monitor_ids = next_id + np.cumsum(rng.integers(1, 20, size))  # Unique, about 10 apart
+        next_id = int(monitor_ids[-1])
+        offsets = np.sort(rng.integers(span * offset // rows, max(span * (offset + size) // rows, 1), size))
+
+        ist = pd.Timestamp(start) + pd.to_timedelta(offsets, unit='s')
+        utc = ist.tz_localize(INCIDENT_TZ).tz_convert('UTC').tz_localize(None)
+        israel = ist.tz_localize(INCIDENT_TZ).tz_convert('Asia/Jerusalem').tz_localize(None)
+        errors = rng.integers(0, len(ERRORS), size)
+
+        yield pd.DataFrame({
+            'Monitor ID': monitor_ids.astype('int64'),
+            'Name': pd.Series(customer_ids + 10_000_000).map('customer-{}'.format),
+            'logs': ' Logs: Type: 1',
+            'Datetime': (utc - pd.Timestamp('1970-01-01')).total_seconds().astype('float64'),
+            'Datetime IST': ist.strftime(EXPORT_DATETIME_FORMAT),
+            'Date format': utc,
+            'Datetime GMT': utc.strftime(EXPORT_DATETIME_FORMAT),
+            'Israel Datetime': israel.strftime(EXPORT_DATETIME_FORMAT),
+            'Duration': durations.astype('float64'),
+            'In hours': pd.to_timedelta(durations, unit='s'),
+            'Error code': [ERRORS[i][0] for i in errors],
+            'Error name': [ERRORS[i][1] for i in errors],
+            'Reason': 'Outage',
+            'True/False Positive': np.where(rng.random(size) < 0.7, 'TP', 'FP'),
+            'Owner': pd.Series(owner_ids).map('Engineer {}'.format),
+        }, columns=EXPORT_COLUMNS)
+
+
+def write_incident_xlsx(path, frames):
+    """
+    Writes ``frames`` (a DataFrame, or an iterable of them) to ``path`` as the raw data sheet.
+
+    Rows are streamed in write-only mode, so with an iterable of chunks only one chunk
+    is held in memory at a time. Returns the number of rows written.
+    """
+    from openpyxl import Workbook
+
+    if isinstance(frames, pd.DataFrame):
+        frames = (frames.iloc[offset:offset + WRITE_CHUNK_ROWS] for offset in range(0, len(frames), WRITE_CHUNK_ROWS))
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(RAW_DATA_SHEET_NAME)
+    sheet.append(EXPORT_COLUMNS)
+    written = 0
+    for frame in frames:
+        chunk = frame[EXPORT_COLUMNS].astype(object)
+        # Timestamps and timedeltas go in as native Excel dates and durations
+        chunk['Date format'] = [value.to_pydatetime() for value in chunk['Date format']]
+        chunk['In hours'] = [value.to_pytimedelta() for value in chunk['In hours']]
+        for row in chunk.itertuples(index=False, name=None):
+            sheet.append(row)
+        written += len(chunk)
+    workbook.save(path)
+    return written
+
+
+def generate_incident_xlsx(path, rows, **kwargs):
+    """
+    Generates ``rows`` synthetic incidents (see ``generate_incidents``) and writes them to ``path``.
+
+    The incidents are generated and written one chunk at a time, so memory stays flat
+    however many rows are written. Returns the number of rows written.
+    """
+    return write_incident_xlsx(path, iter_incidents(rows, **kwargs))
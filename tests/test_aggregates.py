@@ -0,0 +1,219 @@
+import math
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from aggregates import (SKETCH_RELATIVE_ACCURACY, DurationSketch, RollupStore, SlaAggregateStore, WorkQueue,
+                        lttb)
+from reports import compute_sla_metrics
+from storage import delete_all_validations, fetch_incidents, init_schema, replace_incidents, upsert_validations
+
+INCIDENTS = [  # (monitor_id, name, duration, datetime_ist, owner)
+    ('m1', 'acme', 100, '2025-04-01 10:15:00', 'Alice'),
+    ('m2', 'acme', 300, '2025-04-02 10:00:00', 'Bob'),
+    ('m3', 'globex', 50, '2025-04-03 10:00:00', 'Alice'),
+    ('m4', 'initech', 20, '2025-04-10 10:00:00', 'Bob'),
+    ('m5', 'globex', 40, '2025-04-01 23:30:00', 'Bob'),
+]
+VALIDATIONS = [  # (monitor_id, decision, reviewer, timestamp)
+    ('m1', 'TP', 'rev1', '2025-04-11 09:00:00'),
+    ('m2', 'TP', 'rev2', '2025-04-11 09:01:00'),
+    ('m3', 'TP', 'rev1', '2025-04-11 09:02:00'),
+    ('m4', 'FP', 'rev1', '2025-04-11 09:03:00'),
+    ('m5', 'TP', 'rev2', '2025-04-11 09:04:00'),
+]
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(':memory:')
+    init_schema(conn)
+    replace_incidents(conn, INCIDENTS, 'ds')
+    upsert_validations(conn, VALIDATIONS)
+    yield conn
+    conn.close()
+
+
+def _totals(merged):
+    return {group: values[2] for group, values in merged.items()}
+
+
+def test_rollup_summary(conn):
+    rollups = RollupStore.from_db(conn, 'ds')
+    summary, no_downtime, incidents = rollups.summary()
+    assert summary['Customer'].tolist() == ['acme', 'globex']
+    assert summary['Total Downtime (sec)'].tolist() == [400, 90]
+    assert summary['Min Downtime (sec)'].tolist() == [100, 40]
+    assert summary['Max Downtime (sec)'].tolist() == [300, 50]
+    assert no_downtime == {'initech'}
+    assert incidents == 4
+
+
+def test_rollup_query_ranges(conn):
+    rollups = RollupStore.from_db(conn, 'ds')
+    assert _totals(rollups.query('2025-04-01', '2025-04-03')) == {'acme': 400, 'globex': 40}
+    assert _totals(rollups.query('2025-04-01 10:00', '2025-04-02 11:00')) == {'acme': 400, 'globex': 40}
+    # Buckets are whole hours: a partial first hour is left out
+    assert _totals(rollups.query('2025-04-01 10:30', '2025-04-02 11:00')) == {'acme': 300, 'globex': 40}
+    assert _totals(rollups.query('2025-04-01', None, by='owner')) == {'Alice': 150, 'Bob': 340}
+    assert _totals(rollups.query(owners={'Alice'})) == {'acme': 100, 'globex': 50}
+
+
+def test_rollup_follows_validation_changes(conn):
+    rollups = RollupStore.from_db(conn, 'ds')
+    upsert_validations(conn, [('m2', 'FP', 'rev2', '2025-04-12 09:00:00'),
+                              ('m4', 'TP', 'rev1', '2025-04-12 09:01:00')])
+    rollups.refresh(conn)
+    assert _totals(rollups.query()) == {'acme': 100, 'globex': 90, 'initech': 20}
+
+
+def test_rollup_query_matches_whole_hour_filter():
+    rng = np.random.default_rng(3)
+    stamps = pd.Timestamp('2025-01-01') + pd.to_timedelta(rng.integers(0, 40 * 86_400, 400), unit='s')
+    incidents = [(f"m{i}", f"c{rng.integers(5)}", int(rng.integers(1, 1000)), stamp.strftime('%Y-%m-%d %H:%M:%S'),
+                  f"o{rng.integers(3)}") for i, stamp in enumerate(stamps)]
+    conn = sqlite3.connect(':memory:')
+    init_schema(conn)
+    replace_incidents(conn, incidents, 'ds')
+    upsert_validations(conn, [(monitor_id, 'TP', 'rev', '2025-03-01 00:00:00') for monitor_id, *_ in incidents])
+    rollups = RollupStore.from_db(conn, 'ds')
+    df = pd.DataFrame(incidents, columns=['Monitor ID', 'Name', 'Duration', 'Datetime IST', 'Owner'])
+    hours = pd.to_datetime(df['Datetime IST']).dt.floor('h')
+    for _ in range(20):
+        start, end = sorted(pd.Timestamp('2025-01-01') + pd.to_timedelta(rng.integers(0, 40 * 86_400, 2), unit='s'))
+        # Only the whole hours in [start, end) are covered
+        inside = (hours >= start.ceil('h')) & (hours < end.floor('h'))
+        assert _totals(rollups.query(start, end)) == df[inside].groupby('Name')['Duration'].sum().to_dict()
+    conn.close()
+
+
+def test_sketch_quantiles_within_relative_accuracy():
+    rng = np.random.default_rng(11)
+    durations = np.maximum(rng.lognormal(5.5, 1.5, 5000).round(), 1)
+    sketch = DurationSketch()
+    for duration in durations:
+        sketch.add(duration)
+    ordered = np.sort(durations)
+    qs = (1, 25, 50, 90, 95, 99, 100)
+    for q, estimate in zip(qs, sketch.quantiles(qs)):
+        exact = ordered[int(q / 100 * (len(ordered) - 1))]
+        assert abs(estimate - exact) <= SKETCH_RELATIVE_ACCURACY * exact
+
+
+def test_sketch_remove_and_merge():
+    first, second, both = DurationSketch(), DurationSketch(), DurationSketch()
+    for duration in (10, 20, 30, 0):
+        first.add(duration)
+        both.add(duration)
+    for duration in (400, 500):
+        second.add(duration)
+        both.add(duration)
+    first.merge(second)
+    assert first.bins == both.bins
+    for duration in (400, 500, 0):
+        first.remove(duration)
+    assert first.quantiles((50,)) == pytest.approx([20], rel=SKETCH_RELATIVE_ACCURACY)
+    assert all(math.isnan(value) for value in DurationSketch().quantiles((50, 99)))
+
+
+def test_rollup_percentiles_and_availability(conn):
+    rollups = RollupStore.from_db(conn, 'ds')
+    summary, _, _ = rollups.summary('2025-04-01', '2025-04-03', percentiles=True)
+    acme = summary.set_index('Customer').loc['acme']
+    assert acme['P50 Downtime (sec)'] == pytest.approx(100, rel=SKETCH_RELATIVE_ACCURACY)
+    assert acme['P99 Downtime (sec)'] == pytest.approx(100, rel=SKETCH_RELATIVE_ACCURACY)  # Rank 0.99 of 2
+    # Estimates are clamped to the group's exact min and max
+    assert summary.set_index('Customer').loc['globex', 'P99 Downtime (sec)'] == 40
+    assert acme['Availability (%)'] == round(100 * (1 - 400 / (2 * 86_400)), 3)
+    owners = rollups.owner_summary().set_index('Owner')
+    assert owners['Incidents'].to_dict() == {'Alice': 2, 'Bob': 2}
+    assert owners.loc['Alice', 'P50 Downtime (sec)'] == 50  # Clamped to the exact min
+
+
+def test_lttb_keeps_ends_and_peaks():
+    x = np.arange(1000)
+    y = np.zeros(1000)
+    y[123], y[777] = 50, -40
+    keep = lttb(x, y, 20)
+    assert len(keep) == 20
+    assert keep[0] == 0 and keep[-1] == 999
+    assert (np.diff(keep) > 0).all()
+    assert {123, 777} <= set(keep.tolist())
+    assert lttb(x[:10], y[:10], 20).tolist() == list(range(10))
+
+
+def test_rollup_trend(conn):
+    rollups = RollupStore.from_db(conn, 'ds')
+    daily, resolution = rollups.trend('2025-04-01', '2025-04-05', resolution='day')
+    assert resolution == 'day'
+    assert daily['Period'].tolist() == list(pd.date_range('2025-04-01', periods=4))
+    assert daily['Downtime (sec)'].tolist() == [140, 300, 50, 0]
+    assert daily['Incidents'].tolist() == [2, 1, 1, 0]
+
+    hourly, resolution = rollups.trend('2025-04-01 09:00', '2025-04-01 12:00')
+    assert resolution == 'hour'
+    assert hourly['Downtime (sec)'].tolist() == [0, 100, 0]
+
+    downsampled, _ = rollups.trend('2025-03-01', '2025-04-30', resolution='hour', max_points=50)
+    assert len(downsampled) == 50
+    assert downsampled['Downtime (sec)'].sum() > 0  # Spikes survive the downsampling
+
+
+def test_sla_aggregates_match_full_recompute_under_churn():
+    rng = np.random.default_rng(5)
+    incidents = [(f"m{i}", f"c{rng.integers(8)}", int(rng.integers(1, 500)), '2025-04-01 10:00:00', 'o')
+                 for i in range(60)]
+    conn = sqlite3.connect(':memory:')
+    init_schema(conn)
+    replace_incidents(conn, incidents, 'ds')
+    store = SlaAggregateStore.from_db(conn, 'ds')
+    all_df = fetch_incidents(conn, 'ds')
+    decisions = {}
+    for step in range(40):
+        if step % 15 == 14:
+            delete_all_validations(conn)
+            decisions.clear()
+        else:
+            batch = [(f"m{i}", rng.choice(['TP', 'FP']), 'rev', '2025-04-11 09:00:00')
+                     for i in rng.integers(0, 60, 10)]
+            upsert_validations(conn, batch)
+            decisions.update((monitor_id, decision) for monitor_id, decision, _, _ in batch)
+        store.refresh(conn)
+        tp_ids = {monitor_id for monitor_id, decision in decisions.items() if decision == 'TP'}
+        expected, expected_none = compute_sla_metrics(all_df[all_df['Monitor ID'].isin(tp_ids)], all_df)
+        summary, no_downtime = store.summary()
+        pd.testing.assert_frame_equal(summary.reset_index(drop=True),
+                                      expected.sort_values('Customer').reset_index(drop=True), check_dtype=False)
+        assert no_downtime == expected_none
+    conn.close()
+
+
+def test_work_queue_selects_and_steps_through_pending(conn):
+    delete_all_validations(conn)
+    upsert_validations(conn, [('m2', 'TP', 'rev2', '2025-04-11 09:01:00')])
+    queue = WorkQueue.from_db(conn, 'ds')
+    assert queue.pending_count == 4
+    assert queue.values('customer') == ['acme', 'globex', 'initech']
+
+    oldest = queue.select()
+    assert [queue.incident(oldest, index)['Monitor ID'] for index in range(len(oldest))] == ['m1', 'm5', 'm3', 'm4']
+    longest = queue.select(sort='Longest first')
+    assert queue.incident(longest, 0)['Monitor ID'] == 'm1'
+    bob = queue.select(owners=['Bob'], start='2025-04-01', end='2025-04-05')
+    assert [queue.incident(bob, index)['Monitor ID'] for index in range(len(bob))] == ['m5']
+
+    generation = queue.generation
+    upsert_validations(conn, [('m5', 'FP', 'rev1', '2025-04-11 09:02:00')])
+    queue.refresh(conn)
+    assert queue.generation == generation  # Selections stay valid; only the pending flags change
+    assert queue.count(oldest) == 3
+    assert queue.step(oldest) == 0
+    assert queue.step(oldest, 0) == 2  # Skips m5, validated meanwhile
+    assert queue.step(oldest, 2, direction=-1) == 0
+    assert queue.step(oldest, 3) is None
+
+    delete_all_validations(conn)
+    queue.refresh(conn)
+    assert queue.pending_count == 5
@@ -0,0 +1,132 @@
+import json
+import sqlite3
+import threading
+from http import HTTPStatus
+from http.client import HTTPConnection
+
+import pytest
+
+from api import MetricsServer, MetricsService
+from storage import init_schema, replace_incidents, upsert_validations
+
+INCIDENTS = [  # (monitor_id, name, duration, datetime_ist, owner)
+    ('m1', 'acme', 100, '2025-04-01 10:00:00', 'Alice'),
+    ('m2', 'acme', 300, '2025-04-02 10:00:00', 'Bob'),
+    ('m3', 'globex', 50, '2025-04-03 10:00:00', 'Alice'),
+    ('m4', 'initech', 20, '2025-04-10 10:00:00', 'Bob'),
+]
+VALIDATIONS = [  # (monitor_id, decision, reviewer, timestamp)
+    ('m1', 'TP', 'rev1', '2025-04-11 09:00:00'),
+    ('m2', 'TP', 'rev2', '2025-04-11 09:01:00'),
+    ('m3', 'FP', 'rev1', '2025-04-11 09:02:00'),
+]
+APRIL_START = {'from': ['2025-04-01'], 'to': ['2025-04-05']}
+
+
+def _write(db_path, job, *args):
+    conn = sqlite3.connect(db_path)
+    try:
+        job(conn, *args)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / 'incidents.db')
+    _write(path, init_schema)
+    _write(path, replace_incidents, INCIDENTS, 'ds', [('fp1', 'april.xlsx', len(INCIDENTS))])
+    _write(path, upsert_validations, VALIDATIONS)
+    return path
+
+
+@pytest.fixture
+def service(db_path):
+    service = MetricsService(db_path, readers=2)
+    yield service
+    service.close()
+
+
+def test_summary(service):
+    status, headers, body = service.respond('/summary', APRIL_START)
+    assert status == HTTPStatus.OK
+    assert headers['Content-Type'] == 'application/json'
+    assert json.loads(body) == {
+        'dataset': 'ds', 'from': '2025-04-01', 'to': '2025-04-05',
+        'customers': [{'Customer': 'acme', 'Total Downtime (sec)': 400, 'Avg Downtime (sec)': 200.0,
+                       'Min Downtime (sec)': 100, 'Max Downtime (sec)': 300}],
+        'no_downtime_customers': ['globex', 'initech'],
+    }
+
+
+def test_counts(service):
+    status, _, body = service.respond('/counts', APRIL_START)
+    assert status == HTTPStatus.OK
+    assert json.loads(body) == {
+        'dataset': 'ds', 'from': '2025-04-01', 'to': '2025-04-05',
+        'decisions': {'TP': 2, 'FP': 1},
+        'owners': {'Alice': 1, 'Bob': 1},
+        'validators': {'rev1': 1, 'rev2': 1},
+    }
+
+
+def test_not_modified_when_etag_matches(service):
+    _, headers, _ = service.respond('/summary', APRIL_START)
+    status, again, body = service.respond('/summary', APRIL_START, if_none_match=headers['ETag'])
+    assert status == HTTPStatus.NOT_MODIFIED
+    assert again['ETag'] == headers['ETag']
+    assert body == b''
+
+
+def test_validation_change_gives_new_etag(service, db_path):
+    _, before, _ = service.respond('/counts', APRIL_START)
+    _write(db_path, upsert_validations, [('m3', 'TP', 'rev2', '2025-04-12 09:00:00')])
+
+    status, after, body = service.respond('/counts', APRIL_START, if_none_match=before['ETag'])
+    assert status == HTTPStatus.OK
+    assert after['ETag'] != before['ETag']
+    assert json.loads(body)['decisions'] == {'TP': 3, 'FP': 0}
+
+
+@pytest.mark.parametrize('query', [
+    {'from': ['2025-13-01']},
+    {'to': ['not-a-day']},
+    {'from': ['2025-04-05'], 'to': ['2025-04-01']},
+])
+def test_bad_period(service, query):
+    status, _, body = service.respond('/summary', query)
+    assert status == HTTPStatus.BAD_REQUEST
+    assert 'error' in json.loads(body)
+
+
+def test_unknown_path(service):
+    status, _, body = service.respond('/incidents', {})
+    assert status == HTTPStatus.NOT_FOUND
+    assert 'error' in json.loads(body)
+
+
+def test_http_round_trip(db_path):
+    server = MetricsServer(db_path, port=0, quiet=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        client = HTTPConnection(*server.server_address, timeout=10)
+        client.request('GET', '/counts?from=2025-04-01&to=2025-04-05')
+        response = client.getresponse()
+        assert response.status == HTTPStatus.OK
+        assert json.loads(response.read())['decisions'] == {'TP': 2, 'FP': 1}
+
+        client.request('GET', '/counts?from=2025-04-01&to=2025-04-05',
+                       headers={'If-None-Match': response.getheader('ETag')})
+        response = client.getresponse()
+        response.read()
+        assert response.status == HTTPStatus.NOT_MODIFIED
+
+        client.request('GET', '/nope')
+        response = client.getresponse()
+        response.read()
+        assert response.status == HTTPStatus.NOT_FOUND
+        client.close()
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,64 @@
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from dashboard import main
+from ingest import RAW_DATA_SHEET_NAME
+from storage import init_schema, upsert_validations
+
+INCIDENTS = [  # (name, duration, datetime_ist, monitor_id, owner)
+    ('acme', 100, '2025-04-01 10:00:00', 'm1', 'Alice'),
+    ('acme', 300, '2025-04-02 10:00:00', 'm2', 'Bob'),
+    ('globex', 50, '2025-04-03 10:00:00', 'm3', 'Alice'),
+    ('globex', 70, '2025-05-03 10:00:00', 'm4', 'Bob'),
+]
+VALIDATIONS = [  # (monitor_id, decision, reviewer, timestamp)
+    ('m1', 'TP', 'rev1', '2025-05-11 09:00:00'),
+    ('m2', 'FP', 'rev2', '2025-05-11 09:01:00'),
+    ('m3', 'TP', 'rev1', '2025-05-11 09:02:00'),
+    ('m4', 'TP', 'rev1', '2025-05-11 09:03:00'),
+]
+
+
+@pytest.fixture
+def inputs(tmp_path):
+    report = tmp_path / 'april.xlsx'
+    pd.DataFrame(INCIDENTS, columns=['Name', 'Duration', 'Datetime IST', 'Monitor ID', 'Owner']).to_excel(
+        report, sheet_name=RAW_DATA_SHEET_NAME, index=False)
+    db_path = tmp_path / 'incidents.db'
+    conn = sqlite3.connect(db_path)
+    init_schema(conn)
+    upsert_validations(conn, VALIDATIONS)
+    conn.commit()
+    conn.close()
+    return report, db_path
+
+
+def _report_args(inputs, out_dir, *extra):
+    report, db_path = inputs
+    return ['report', '--input', str(report), '--db', str(db_path), '--output-dir', str(out_dir),
+            '--format', 'csv', '--no-cache', *extra]
+
+
+def test_report_counts_tp_downtime_in_period(inputs, tmp_path):
+    out_dir = tmp_path / 'out'
+    main(_report_args(inputs, out_dir, '--from', '2025-04-01', '--to', '2025-04-30'))
+    summary = pd.read_csv(out_dir / 'sla_report_20250401_20250430.csv')
+    totals = dict(zip(summary['Customer'], summary['Total Downtime (sec)']))
+    assert totals == {'acme': 100, 'globex': 50}
+
+
+def test_report_per_customer(inputs, tmp_path):
+    out_dir = tmp_path / 'out'
+    main(_report_args(inputs, out_dir, '--per-customer', '--workers', '1'))
+    acme = pd.read_csv(out_dir / 'sla_report_acme_all_time.csv')
+    globex = pd.read_csv(out_dir / 'sla_report_globex_all_time.csv')
+    assert acme['Customer'].tolist() == ['acme']
+    assert acme['Total Downtime (sec)'].tolist() == [100]
+    assert globex['Total Downtime (sec)'].tolist() == [120]
+
+
+def test_report_rejects_unknown_format(inputs, tmp_path):
+    with pytest.raises(SystemExit, match="Unknown report format"):
+        main(_report_args(inputs, tmp_path, '--format', 'docx'))
@@ -0,0 +1,183 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+
+from ingest import (REQUIRED_COLUMNS, RAW_DATA_SHEET_NAME, IngestCache, coalesce_incidents, coalesce_intervals,
+                    load_incident_files, parse_incident_excel, read_incidents_streaming)
+
+
+def _report(rows):
+    """Returns the bytes of an incident report with one row per (name, duration, datetime, monitor id, owner)."""
+    df = pd.DataFrame(rows, columns=['Name', 'Duration', 'Datetime IST', 'Monitor ID', 'Owner'])
+    buffer = io.BytesIO()
+    df.to_excel(buffer, sheet_name=RAW_DATA_SHEET_NAME, index=False)
+    return buffer.getvalue()
+
+
+def test_single_report_keeps_blank_and_repeated_ids():
+    data = _report([
+        ('acme', 60, '2025-04-01 10:00:00', 101, 'Alice'),
+        ('acme', 30, '2025-04-01 11:00:00', None, 'Alice'),
+        ('globex', 45, '2025-04-02 10:00:00', None, 'Bob'),
+        ('globex', 15, '2025-04-02 11:00:00', 101, 'Bob'),
+    ])
+    df, ingested, skipped = load_incident_files([('april.xlsx', data)], workers=1)
+    assert len(df) == 4
+    assert df['Duration'].sum() == 150
+    assert ingested[0][1:] == ('april.xlsx', 4)
+    assert skipped == []
+
+
+def test_later_report_replaces_matching_ids_only():
+    first = _report([
+        ('acme', 60, '2025-04-01 10:00:00', 101, 'Alice'),
+        ('acme', 30, '2025-04-01 11:00:00', 102, 'Alice'),
+        ('acme', 20, '2025-04-01 12:00:00', None, 'Alice'),
+    ])
+    second = _report([
+        ('acme', 90, '2025-04-01 11:00:00', 102, 'Bob'),
+        ('globex', 10, '2025-04-02 10:00:00', None, 'Bob'),
+    ])
+    df, ingested, _ = load_incident_files([('a.xlsx', first), ('b.xlsx', second)], workers=1)
+    assert len(df) == 4
+    assert df['Duration'].tolist() == [60, 20, 90, 10]
+    assert df.loc[df['Duration'] == 90, 'Owner'].tolist() == ['Bob']
+    assert [rows for _, _, rows in ingested] == [3, 2]
+
+
+def test_identical_report_is_skipped():
+    data = _report([('acme', 60, '2025-04-01 10:00:00', 101, 'Alice')])
+    df, ingested, skipped = load_incident_files([('a.xlsx', data), ('copy.xlsx', data)], workers=1)
+    assert len(df) == 1
+    assert [name for _, name, _ in ingested] == ['a.xlsx']
+    assert skipped == ['copy.xlsx']
+
+
+def _sheet(rows):
+    """Returns the bytes of a report written cell by cell, so blank cells and trailing columns stay as given."""
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.title = RAW_DATA_SHEET_NAME
+    sheet.append(['Name', 'Duration', 'Datetime IST', 'Monitor ID', 'Owner', 'Notes'])
+    for row in rows:
+        sheet.append(row)
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize('chunk_rows', [1, 2, 1000])
+@pytest.mark.parametrize('monitor_ids', [
+    [123, None, 1, ' 77 ', 456],
+    [123, 5, 1, 77, 456],
+    ['abc', None, 5, 8.5, 'x1'],
+])
+def test_streaming_reader_matches_read_excel(monitor_ids, chunk_rows):
+    data = _sheet([
+        ['acme', 60, '01/04/2025 10:00', monitor_ids[0], ' Alice '],
+        ['acme', 30, '2025-04-01 11:00:00', monitor_ids[1], None],
+        [None, None, None, None, None, 'only a note'],
+        ['globex', 45.0, '02-04-2025 10:00', monitor_ids[2], 'NA'],
+        [],
+        ['globex', 15, '2025-04-02 11:00:00', monitor_ids[3], 'Bob'],
+        ['initech', 5, '2025-04-03 11:00:00', monitor_ids[4], 'Bob'],
+        [],
+    ])
+    parsed = parse_incident_excel(io.BytesIO(data))
+    streamed = read_incidents_streaming(io.BytesIO(data), chunk_rows=chunk_rows)
+
+    assert streamed['Monitor ID'].tolist() == parsed['Monitor ID'].tolist()
+    assert streamed['Owner'].astype(object).tolist() == parsed['Owner'].tolist()
+    # The streaming reader uses compact dtypes (categoricals, narrow ints); the values are the same.
+    pd.testing.assert_frame_equal(streamed.astype(object), parsed[list(streamed.columns)].astype(object))
+
+
+@pytest.mark.parametrize('streaming', [False, True])
+def test_cache_hit_returns_the_parsed_frame(tmp_path, streaming):
+    pytest.importorskip('pyarrow')
+    data = _sheet([
+        ['acme', 60, '2025-04-01 10:00:00', 101, 'Alice', 'note'],
+        [42, 30, '2025-04-01 11:00:00', None, 'Bob'],  # A number among the names: a mixed-type column
+    ])
+    cache = IngestCache(str(tmp_path / 'cache'))
+
+    parsed, _, _ = load_incident_files([('a.xlsx', data)], cache=cache, streaming=streaming, workers=1)
+    cached, _, _ = load_incident_files([('a.xlsx', data)], cache=cache, streaming=streaming, workers=1)
+
+    assert list(parsed.columns) == REQUIRED_COLUMNS
+    pd.testing.assert_frame_equal(cached, parsed)
+    stats = cache.stats()
+    assert (stats['misses'], stats['hits'], stats['entries'], stats['failures']) == (1, 1, 1, 0)
+
+
+def test_cache_evicts_least_recently_used_entries(tmp_path):
+    pytest.importorskip('pyarrow')
+    cache = IngestCache(str(tmp_path / 'cache'))
+    reports = [_report([('acme', 60 + i, '2025-04-01 10:00:00', 100 + i, 'Alice')]) for i in range(3)]
+    load_incident_files([('first.xlsx', reports[0])], cache=cache, workers=1)
+    cache.max_bytes = cache.stats()['bytes'] * 2  # Room for two entries
+    for i, data in enumerate(reports[1:]):
+        load_incident_files([(f'{i}.xlsx', data)], cache=cache, workers=1)
+
+    assert cache.stats()['entries'] == 2
+    load_incident_files([('first.xlsx', reports[0])], cache=cache, workers=1)
+    assert cache.stats()['hits'] == 0  # The oldest entry was the one evicted
+
+
+def _sweep_groups(keys, starts, ends):
+    """Reference grouping: a plain loop over the intervals of each key in start order."""
+    groups = {}
+    next_group = 0
+    for key in sorted(set(keys)):
+        reach = None
+        for i in sorted((i for i in range(len(keys)) if keys[i] == key), key=lambda i: starts[i]):
+            if reach is None or starts[i] >= reach:
+                group, next_group = next_group, next_group + 1
+                reach = ends[i]
+            reach = max(reach, ends[i])
+            groups[i] = group
+    return [groups[i] for i in range(len(keys))]
+
+
+def test_coalesce_intervals_merges_overlaps_per_key():
+    keys = np.array([0, 0, 0, 1, 1, 0])
+    starts = np.array([0, 5, 10, 3, 20, 30], dtype='int64')
+    ends = np.array([6, 8, 12, 25, 22, 30], dtype='int64')
+    # [0,6) and [5,8) overlap; [10,12) only starts after; key 1 holds [20,22) inside [3,25)
+    assert coalesce_intervals(keys, starts, ends).tolist() == [0, 0, 1, 3, 3, 2]
+    assert coalesce_intervals(keys[:0], starts[:0], ends[:0]).tolist() == []
+
+
+def test_coalesce_intervals_matches_reference():
+    rng = np.random.default_rng(7)
+    keys = rng.integers(0, 5, 300)
+    starts = rng.integers(0, 10_000, 300)
+    ends = starts + rng.integers(0, 400, 300)
+    assert coalesce_intervals(keys, starts, ends).tolist() == _sweep_groups(keys.tolist(), starts.tolist(),
+                                                                             ends.tolist())
+
+
+def test_coalesce_incidents():
+    df = pd.DataFrame({
+        'Name': ['acme', 'acme', 'globex', 'acme', 'globex'],
+        'Datetime IST': pd.to_datetime(['2025-04-01 10:00:00', '2025-04-01 10:01:00', '2025-04-01 10:00:30',
+                                        '2025-04-01 12:00:00', None]),
+        'Duration': [120, 120, 60, 30, 45],
+    }, index=[10, 11, 12, 13, 14])
+    outage_ids, outages = coalesce_incidents(df)
+    assert outage_ids.index.tolist() == [10, 11, 12, 13, 14]
+    assert outage_ids[10] == outage_ids[11]
+    assert len(set(outage_ids)) == 4
+    first = outages.set_index('Outage ID').loc[outage_ids[10]]
+    assert first['Name'] == 'acme'
+    assert first['Incidents'] == 2
+    assert first['Raw Downtime (sec)'] == 240
+    assert first['Merged Downtime (sec)'] == 180
+    # An incident without a time is an outage of its own, counted at its duration
+    undated = outages.set_index('Outage ID').loc[outage_ids[14]]
+    assert undated['Incidents'] == 1
+    assert undated['Merged Downtime (sec)'] == 45
+    assert outages['Merged Downtime (sec)'].sum() == 180 + 60 + 30 + 45
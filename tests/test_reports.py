@@ -0,0 +1,30 @@
+import pandas as pd
+
+from reports import top_n, top_n_counts
+
+
+def test_top_n_keeps_largest_and_rolls_up_the_rest():
+    values = pd.Series({'a': 5, 'b': 50, 'c': 20, 'd': 1, 'e': 7}, name='Downtime')
+    result = top_n(values, 2)
+    assert result.tolist() == [50, 20, 13]
+    assert result.index.tolist() == ['b', 'c', 'Others (3 more)']
+    assert result.name == 'Downtime'
+
+
+def test_top_n_without_limit_sorts_everything():
+    values = pd.Series({'a': 5, 'b': 50, 'c': 20})
+    assert top_n(values, 5).index.tolist() == ['b', 'c', 'a']
+    assert top_n(values, None).index.tolist() == ['b', 'c', 'a']
+
+
+def test_top_n_rollup_never_shares_a_real_label():
+    values = pd.Series({'Others (2 more)': 100, 'b': 50, 'c': 20, 'd': 1})
+    result = top_n(values, 2)
+    assert result.index.is_unique
+    assert result.index[-1] not in values.index
+    assert result.iloc[-1] == 21
+
+
+def test_top_n_counts():
+    result = top_n_counts(['rev1', 'rev2', 'rev1', 'rev3', 'rev1', 'rev2', 'Others'], 2)
+    assert result.to_dict() == {'rev1': 3, 'rev2': 2, 'Others (2 more)': 2}
@@ -0,0 +1,67 @@
+import threading
+import time
+
+import pytest
+
+import results
+from results import ResultCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResultCache(str(tmp_path / 'results.db'))
+
+
+def test_put_then_get(cache):
+    assert cache.get(('summary', 1)) is None
+    assert cache.put(('summary', 1), {'total': 42})
+    assert cache.get(('summary', 1)) == {'total': 42}
+    assert cache.get(('summary', 2)) is None
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['entries']) == (1, 2, 1)
+
+
+def test_unpicklable_values_are_computed_but_not_stored(cache):
+    value = cache.get_or_compute(('lock',), threading.Lock)
+    assert value is not None
+    assert cache.stats()['entries'] == 0
+
+
+def test_concurrent_misses_in_a_process_compute_once(cache):
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.05)
+        return 'value'
+
+    threads = [threading.Thread(target=cache.get_or_compute, args=(('slow',), compute)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert cache.get(('slow',)) == 'value'
+
+
+def test_caches_on_one_file_share_results(tmp_path):
+    path = str(tmp_path / 'results.db')
+    first, second = ResultCache(path), ResultCache(path)
+    first.put(('summary', 1), [1, 2, 3])
+    assert second.get_or_compute(('summary', 1), lambda: pytest.fail("recomputed")) == [1, 2, 3]
+
+
+def test_eviction_keeps_recently_read_entries(cache, monkeypatch):
+    monkeypatch.setattr(results, 'RESULT_CACHE_TOUCH_SEC', -1)  # Every hit counts as a new access
+    blob = b'x' * 10_000
+    cache.put(('a',), blob)
+    time.sleep(0.01)
+    cache.put(('b',), blob)
+    cache.max_bytes = cache.stats()['bytes'] + 100  # Room for two entries
+    time.sleep(0.01)
+    assert cache.get(('a',)) == blob  # 'a' is now more recently used than 'b'
+    cache.put(('c',), blob)
+
+    assert cache.get(('a',)) == blob
+    assert cache.get(('b',)) is None
+    assert cache.get(('c',)) == blob
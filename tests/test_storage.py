@@ -0,0 +1,184 @@
+import sqlite3
+import threading
+from concurrent.futures import TimeoutError
+
+import pandas as pd
+import pytest
+
+from storage import (Database, ValidationCache, apply_incident_changes, dataset_version, delete_all_validations,
+                     fetch_incident_changes, fetch_validation_changes, replace_incidents, sync_incidents,
+                     upsert_validations)
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = Database(str(tmp_path / 'incidents.db'))
+    yield db
+    db.close()
+
+
+def _hold_writer(db):
+    """Queues a job that blocks the writer until the returned event is set."""
+    release = threading.Event()
+    started = threading.Event()
+
+    def wait(conn):
+        started.set()
+        release.wait(10)
+
+    future = db.submit(wait)
+    started.wait(10)
+    return release, future
+
+
+def _decisions(db):
+    with db.reader() as conn:
+        return dict(conn.execute("SELECT monitor_id, decision FROM validations").fetchall())
+
+
+def _validate(monitor_id, decision='TP'):
+    return [(monitor_id, decision, 'rev', '2025-04-01T10:00:00')]
+
+
+def test_queued_jobs_share_one_commit(db):
+    release, held = _hold_writer(db)
+    futures = [db.submit(upsert_validations, _validate(f"m{i}")) for i in range(10)]
+    release.set()
+    held.result(10)
+    for future in futures:
+        future.result(10)
+
+    metrics = db.metrics()
+    assert metrics['batches_committed'] == 2
+    assert metrics['max_batch_size'] == 10
+    assert metrics['jobs_committed'] == 11
+    assert len(_decisions(db)) == 10
+
+
+def test_failing_job_is_rolled_back_alone(db):
+    def insert_then_fail(conn):
+        upsert_validations(conn, _validate('bad'))
+        raise ValueError("rejected")
+
+    release, _ = _hold_writer(db)
+    before = db.submit(upsert_validations, _validate('m1'))
+    failing = db.submit(insert_then_fail)
+    after = db.submit(upsert_validations, _validate('m2', 'FP'))
+    release.set()
+
+    before.result(10)
+    after.result(10)
+    with pytest.raises(ValueError, match="rejected"):
+        failing.result(10)
+    assert _decisions(db) == {'m1': 'TP', 'm2': 'FP'}
+    assert db.metrics()['jobs_failed'] == 1
+
+
+def test_writer_survives_a_failed_rollback(db):
+    def commit_then_fail(conn):
+        # Committing drops the job's savepoint, so rolling back to it fails too.
+        conn.execute("COMMIT")
+        raise ValueError("rejected")
+
+    with pytest.raises(sqlite3.OperationalError):
+        db.write(commit_then_fail, timeout=10)
+    db.write(upsert_validations, _validate('m1'), timeout=10)
+    assert _decisions(db) == {'m1': 'TP'}
+
+
+def test_write_times_out_while_the_writer_is_busy(db):
+    release, held = _hold_writer(db)
+    try:
+        with pytest.raises(TimeoutError):
+            db.write(upsert_validations, _validate('m1'), timeout=0.05)
+    finally:
+        release.set()
+    held.result(10)
+    # The timed-out job stayed queued, ahead of this one, and was committed.
+    db.write(lambda conn: None, timeout=10)
+    assert _decisions(db) == {'m1': 'TP'}
+
+
+def _incidents(monitor_id):
+    return pd.DataFrame({'Monitor ID': [monitor_id], 'Name': ['acme'], 'Duration': [60],
+                         'Datetime IST': [pd.Timestamp('2025-04-01 10:00:00')], 'Owner': ['Alice']})
+
+
+def test_reused_datasets_are_not_pruned(db):
+    assert sync_incidents(db, _incidents('m1'), 'used')
+    assert sync_incidents(db, _incidents('m2'), 'stale')
+    db.write(lambda conn: conn.execute("UPDATE datasets SET used_at = '2000-01-01 00:00:00'"), timeout=10)
+
+    assert not sync_incidents(db, _incidents('m1'), 'used')  # Already stored: only marks it as used
+    db.write(lambda conn: None, timeout=10)
+    assert sync_incidents(db, _incidents('m3'), 'new')  # Loading a dataset prunes the stale ones
+
+    with db.reader() as conn:
+        assert dataset_version(conn, 'used') is not None
+        assert dataset_version(conn, 'stale') is None
+        assert conn.execute("SELECT COUNT(*) FROM incidents WHERE dataset = 'stale'").fetchone()[0] == 0
+
+
+def test_database_from_the_original_app_keeps_its_validations(tmp_path):
+    path = str(tmp_path / 'incidents.db')
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE validations (
+            id INTEGER PRIMARY KEY, monitor_id TEXT UNIQUE, decision TEXT, reviewer TEXT, timestamp TEXT
+        )
+    """)
+    conn.executemany("INSERT INTO validations (monitor_id, decision, reviewer, timestamp) VALUES (?, ?, ?, ?)",
+                     [('m1', 'TP', 'rev', '2025-04-01'), ('m2', 'FP', 'rev', '2025-04-02')])
+    conn.commit()
+    conn.close()
+
+    db = Database(path)
+    try:
+        with db.reader() as conn:
+            changes = fetch_validation_changes(conn)
+        assert [(row[0], row[1], row[3]) for row in changes] == [('m1', 'TP', 1), ('m2', 'FP', 2)]
+    finally:
+        db.close()
+
+
+def test_validation_cache_applies_deltas(db):
+    db.write(upsert_validations, _validate('m1') + _validate(' m2 ', 'FP'))
+    cache = ValidationCache()
+    with db.reader() as conn:
+        first = cache.refresh(conn)
+    assert first == {'m1': {'decision': 'TP', 'reviewer': 'rev'}, 'm2': {'decision': 'FP', 'reviewer': 'rev'}}
+    version = cache.version
+
+    with db.reader() as conn:
+        assert cache.refresh(conn) is first  # Nothing changed, nothing fetched
+    db.write(upsert_validations, _validate('m2') + _validate('m3'))
+    with db.reader() as conn:
+        second = cache.refresh(conn)
+    assert {monitor_id: v['decision'] for monitor_id, v in second.items()} == {'m1': 'TP', 'm2': 'TP', 'm3': 'TP'}
+    assert first['m2']['decision'] == 'FP'  # Published dicts are replaced, never changed
+    assert cache.version != version
+
+    db.write(delete_all_validations)
+    db.write(upsert_validations, _validate('m4'))
+    with db.reader() as conn:
+        assert cache.refresh(conn) == {'m4': {'decision': 'TP', 'reviewer': 'rev'}}
+
+
+def test_apply_incident_changes_writes_only_the_difference(db):
+    version = db.write(replace_incidents, [('m1', 'acme', 100, '2025-04-01 10:00:00', 'Alice'),
+                                           ('m2', 'globex', 50, '2025-04-02 10:00:00', 'Bob')], 'folder:x')
+    inserted, updated, new_version = db.write(
+        apply_incident_changes, [('m1', 'acme', 100, '2025-04-01 10:00:00', 'Alice'),
+                                 ('m2', 'globex', 60, '2025-04-02 10:00:00', 'Bob'),
+                                 ('m3', 'initech', 20, '2025-04-03 10:00:00', 'Bob')], 'folder:x')
+    assert (inserted, updated) == (1, 1)
+    with db.reader() as conn:
+        changes = fetch_incident_changes(conn, 'folder:x', version)
+        assert sorted((row[0], row[2]) for row in changes) == [('m2', 60), ('m3', 20)]
+        # The epoch is kept, so followers replay the changes instead of rebuilding
+        assert dataset_version(conn, 'folder:x') == (new_version, version)
+
+    assert db.write(apply_incident_changes, [('m1', 'acme', 100, '2025-04-01 10:00:00', 'Alice')],
+                    'folder:x') == (0, 0, new_version)
+    with db.reader() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM incidents WHERE dataset = 'folder:x'").fetchone()[0] == 3
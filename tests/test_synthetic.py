@@ -0,0 +1,25 @@
+import pandas as pd
+
+import synthetic
+from ingest import RAW_DATA_SHEET_NAME
+
+
+def test_chunked_generation_matches_whole_frame(tmp_path, monkeypatch):
+    monkeypatch.setattr(synthetic, 'WRITE_CHUNK_ROWS', 40)
+    df = synthetic.generate_incidents(100, seed=3)
+    assert df['Monitor ID'].dtype == 'int64'
+    assert df['Monitor ID'].is_unique
+    assert df['Date format'].is_monotonic_increasing
+
+    path = tmp_path / 'incidents.xlsx'
+    assert synthetic.generate_incident_xlsx(path, 100, seed=3) == 100
+    written = pd.read_excel(path, sheet_name=RAW_DATA_SHEET_NAME)
+    assert written['Monitor ID'].dtype == 'int64'
+    assert written['Monitor ID'].tolist() == df['Monitor ID'].tolist()
+    assert written['Name'].tolist() == df['Name'].tolist()
+
+
+def test_seeds_never_share_monitor_ids():
+    first = synthetic.generate_incidents(50, seed=0)
+    second = synthetic.generate_incidents(50, seed=1)
+    assert not set(first['Monitor ID']) & set(second['Monitor ID'])
@@ -0,0 +1,68 @@
+import os
+
+import pandas as pd
+import pytest
+
+from aggregates import SlaAggregateStore
+from ingest import RAW_DATA_SHEET_NAME
+from storage import Database, fetch_incidents, upsert_validations
+from watch import FolderWatcher
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = Database(str(tmp_path / 'incidents.db'))
+    yield db
+    db.close()
+
+
+def _export(path, rows, mtime):
+    """Writes a report with one row per (name, duration, datetime, monitor id, owner) and sets its mtime."""
+    pd.DataFrame(rows, columns=['Name', 'Duration', 'Datetime IST', 'Monitor ID', 'Owner']).to_excel(
+        path, sheet_name=RAW_DATA_SHEET_NAME, index=False)
+    os.utime(path, (mtime, mtime))
+
+
+def test_watcher_applies_only_changed_rows(db, tmp_path):
+    folder = tmp_path / 'exports'
+    folder.mkdir()
+    export = folder / 'april.xlsx'
+    _export(export, [('acme', 100, '2025-04-01 10:00:00', 'm1', 'Alice'),
+                     ('globex', 50, '2025-04-02 10:00:00', 'm2', 'Bob')], 1_000_000)
+    watcher = FolderWatcher(db, folder)
+
+    first = watcher.poll()
+    assert first['files'] == ['april.xlsx']
+    assert (first['inserted'], first['updated']) == (2, 0)
+    assert watcher.poll() is None
+
+    db.write(upsert_validations, [('m1', 'TP', 'rev', '2025-04-03 09:00:00'),
+                                  ('m2', 'TP', 'rev', '2025-04-03 09:00:00')])
+    with db.reader() as conn:
+        store = SlaAggregateStore.from_db(conn, watcher.data_hash)
+
+    os.utime(export, (1_000_100, 1_000_100))  # Touched, content unchanged
+    assert watcher.poll() is None
+
+    _export(export, [('acme', 100, '2025-04-01 10:00:00', 'm1', 'Alice'),
+                     ('globex', 80, '2025-04-02 10:00:00', 'm2', 'Bob'),
+                     ('initech', 20, '2025-04-03 10:00:00', 'm3', 'Bob')], 1_000_200)
+    second = watcher.poll()
+    assert (second['inserted'], second['updated']) == (1, 1)
+    assert second['version'] > first['version']
+
+    with db.reader() as conn:
+        assert sorted(fetch_incidents(conn, watcher.data_hash)['Monitor ID']) == ['m1', 'm2', 'm3']
+        store.refresh(conn)
+    summary, no_downtime = store.summary()
+    assert dict(zip(summary['Customer'], summary['Total Downtime (sec)'])) == {'acme': 100, 'globex': 80}
+    assert no_downtime == {'initech'}
+
+
+def test_new_watcher_resumes_from_the_stored_files(db, tmp_path):
+    folder = tmp_path / 'exports'
+    folder.mkdir()
+    _export(folder / 'april.xlsx', [('acme', 100, '2025-04-01 10:00:00', 'm1', 'Alice')], 1_000_000)
+    assert FolderWatcher(db, folder).poll()['inserted'] == 1
+    # A restarted app already has the folder's files recorded and has nothing to read
+    assert FolderWatcher(db, folder).poll() is None